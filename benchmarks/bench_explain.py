@@ -0,0 +1,113 @@
+"""
+Explanation timing: per-feature contributions on the compiled ensemble.
+
+Times ``contributions_one`` (the dashboard's single slider state), a cached
+``engine.explain`` lookup and ``predict_contributions`` over ``--rows``
+synthetic rows, next to ``predict_proba`` on the same rows. For comparison,
+a per-row walk of the scikit-learn trees' decision paths is timed on 100
+rows and extrapolated. Also checks that every explanation sums to the
+model's raw score (the probability for forests, the margin for boosted models).
+
+Usage:
+    python benchmarks/bench_explain.py [--rows 100000] [--repeat 3] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_inference import best_time, synthetic_rows  # noqa: E402
+from mekong_drought import engine  # noqa: E402
+from mekong_drought.cache import PredictionCache  # noqa: E402
+from mekong_drought.compiled import CompiledEnsemble  # noqa: E402
+from mekong_drought.model_store import load_model_file  # noqa: E402
+
+REFERENCE_ROWS = 100
+
+
+def path_walk(sklearn_model, row):
+    """
+    Contributions of one row by following each scikit-learn tree's decision path
+    """
+    contributions = np.zeros((len(sklearn_model.classes_), len(row)))
+    for estimator in sklearn_model.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :] / tree.value[:, 0, :].sum(axis=1, keepdims=True)
+        node = 0
+        while tree.children_left[node] >= 0:
+            feature = tree.feature[node]
+            child = (tree.children_left[node] if row[feature] <= tree.threshold[node]
+                     else tree.children_right[node])
+            contributions[:, feature] += value[child] - value[node]
+            node = child
+    return contributions / len(sklearn_model.estimators_)
+
+
+def run(n_rows=100_000, repeat=3):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        sklearn_model = load_model_file(engine.MODEL_PATH).model
+    compiled = CompiledEnsemble.from_model(sklearn_model)
+    started = time.perf_counter()
+    compiled.contributions_one(np.zeros(compiled.n_features_in_))
+    table_build = time.perf_counter() - started
+
+    rows = synthetic_rows(n_rows).to_numpy()
+    cache = PredictionCache()
+    engine.explain(compiled, rows[0], cache=cache, model_key='bench')
+
+    contributions = compiled.predict_contributions(rows[:1000])
+    reference = np.stack([path_walk(sklearn_model, row) for row in rows[:REFERENCE_ROWS]])
+    walk_seconds = best_time(lambda: path_walk(sklearn_model, rows[0]), repeat)
+
+    results = {
+        'rows': n_rows,
+        'contribution_table_build_ms': table_build * 1000,
+        'explain_one_us': best_time(lambda: compiled.contributions_one(rows[0]), repeat, number=200) * 1e6,
+        'explain_one_cached_us': best_time(lambda: engine.explain(compiled, rows[0], cache=cache, model_key='bench'),
+                                           repeat, number=200) * 1e6,
+        'explain_batch_seconds': best_time(lambda: compiled.predict_contributions(rows), repeat),
+        'predict_proba_batch_seconds': best_time(lambda: compiled.predict_proba(rows), repeat),
+        'path_walk_batch_seconds_estimate': walk_seconds * n_rows,
+        'max_sum_error': float(np.abs(compiled.proba_from_contributions(contributions)
+                                      - compiled.predict_proba(rows[:1000])).max()),
+        'max_reference_error': float(np.abs(contributions[:REFERENCE_ROWS, :, :-1] - reference).max()),
+    }
+    results['explain_rows_per_sec'] = n_rows / results['explain_batch_seconds']
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Contribution table built in {results['contribution_table_build_ms']:.1f} ms\n")
+    print(f"  {'one row':<28}{results['explain_one_us']:>10.1f} µs")
+    print(f"  {'one row, cached':<28}{results['explain_one_cached_us']:>10.1f} µs")
+    print(f"  {f'{args.rows:,} rows':<28}{results['explain_batch_seconds']:>10.2f} s "
+          f"({results['explain_rows_per_sec']:,.0f} rows/sec)")
+    print(f"  {f'{args.rows:,} rows predict_proba':<28}{results['predict_proba_batch_seconds']:>10.2f} s")
+    print(f"  {f'{args.rows:,} rows path walk (est.)':<28}{results['path_walk_batch_seconds_estimate']:>10.0f} s")
+    print(f"\n  max |sum - probability| {results['max_sum_error']:.1e}, "
+          f"max |compiled - path walk| {results['max_reference_error']:.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Monte Carlo forecast timing: trajectory sampling, batched scoring, end to end.
+
+Times ``simulate`` (sampling and rolling the features forward for every
+scenario), the whole ``forecast`` (one ``predict_proba`` over scenarios x
+horizons), and, for comparison, scoring the same rows one ``engine.predict``
+call at a time, extrapolated from the first 500.
+
+Usage:
+    python benchmarks/bench_forecast.py [--scenarios 10000] [--horizons 3] [--repeat 3] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_inference import best_time  # noqa: E402
+from mekong_drought import engine  # noqa: E402
+from mekong_drought.forecast import ScenarioSampler, forecast, simulate  # noqa: E402
+from mekong_drought.features import RAW_COLUMNS  # noqa: E402
+
+PER_ROW_SAMPLE = 500
+
+
+def run(n_scenarios=10_000, horizons=3, repeat=3):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        model, _ = engine.load_model()
+    history = pd.read_csv(engine.DATASET_PATH, usecols=RAW_COLUMNS)
+    sampler = ScenarioSampler(history)
+
+    _, _, features = simulate(history, n_scenarios, horizons, seed=0, sampler=sampler)
+    rows = features.reshape(-1, len(engine.FEATURE_COLUMNS))[:PER_ROW_SAMPLE]
+    started = time.perf_counter()
+    for row in rows:
+        engine.predict(model, row)
+    per_row = (time.perf_counter() - started) / len(rows)
+
+    results = {
+        'scenarios': n_scenarios,
+        'horizons': horizons,
+        'sampler_build_ms': best_time(lambda: ScenarioSampler(history), repeat) * 1000,
+        'simulate_ms': best_time(lambda: simulate(history, n_scenarios, horizons, seed=0, sampler=sampler),
+                                 repeat) * 1000,
+        'forecast_ms': best_time(lambda: forecast(model, history, n_scenarios, horizons, seed=0, sampler=sampler),
+                                 repeat) * 1000,
+        'per_row_scoring_ms': per_row * n_scenarios * horizons * 1000,
+    }
+    results['scored_rows_per_second'] = n_scenarios * horizons / (results['forecast_ms'] / 1000)
+    results['batched_speedup'] = results['per_row_scoring_ms'] / results['forecast_ms']
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scenarios', type=int, default=10_000)
+    parser.add_argument('--horizons', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.scenarios, args.horizons, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['scenarios']:,} scenarios x {results['horizons']} months\n")
+    for name in ('sampler_build_ms', 'simulate_ms', 'forecast_ms', 'per_row_scoring_ms'):
+        print(f"  {name:<24}{results[name]:>10.1f} ms")
+    print(f"\n  {results['scored_rows_per_second']:,.0f} scenario-months/s, "
+          f"{results['batched_speedup']:,.1f}x faster than per-row scoring (estimated)")
+
+
+if __name__ == '__main__':
+    main()
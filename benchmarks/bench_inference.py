@@ -0,0 +1,113 @@
+"""
+Inference latency and throughput: scikit-learn vs the compiled NumPy engine.
+
+Measures single-row latency (the dashboard's case) and batch throughput at
+growing row counts to show that batch cost scales linearly with rows. Also
+checks that both paths agree on every probability.
+
+Usage:
+    python benchmarks/bench_inference.py [--max-rows 100000] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from mekong_drought.compiled import CompiledEnsemble  # noqa: E402
+from mekong_drought.engine import DATASET_PATH, FEATURE_COLUMNS, MODEL_PATH  # noqa: E402
+from mekong_drought.model_store import load_model_file  # noqa: E402
+
+
+def best_time(function, repeat, number=1):
+    """
+    Best-of-``repeat`` seconds per call of ``function``
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def synthetic_rows(n_rows, seed=0):
+    """
+    Random feature rows spanning the dataset's observed ranges
+    """
+    dataset = pd.read_csv(DATASET_PATH)[FEATURE_COLUMNS]
+    rng = np.random.default_rng(seed)
+    rows = rng.uniform(dataset.min().to_numpy(), dataset.max().to_numpy(), (n_rows, len(FEATURE_COLUMNS)))
+    return pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+
+
+def run(max_rows=100_000):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        sklearn_model = load_model_file(MODEL_PATH).model
+    compiled = CompiledEnsemble.from_model(sklearn_model)
+
+    rows = synthetic_rows(max_rows)
+    row_frame = rows.iloc[[0]]
+    row_array = rows.to_numpy()[0]
+
+    results = {
+        'model': {'trees': compiled.n_trees, 'nodes': compiled.n_nodes, 'max_depth': compiled.max_depth},
+        'max_abs_proba_diff': float(np.abs(
+            sklearn_model.predict_proba(rows.iloc[:10_000]) - compiled.predict_proba(rows.iloc[:10_000])
+        ).max()),
+        'single_row_us': {
+            'sklearn_predict_proba': best_time(lambda: sklearn_model.predict_proba(row_frame), 5, 10) * 1e6,
+            'compiled_predict_one': best_time(lambda: compiled.predict_one(row_array), 5, 2000) * 1e6,
+            'compiled_predict_proba': best_time(lambda: compiled.predict_proba(row_array), 5, 2000) * 1e6,
+        },
+        'batch_rows_per_sec': {'sklearn': {}, 'compiled': {}},
+    }
+
+    n_rows = 1000
+    while n_rows <= max_rows:
+        batch = rows.iloc[:n_rows]
+        batch_array = batch.to_numpy()
+        results['batch_rows_per_sec']['sklearn'][n_rows] = n_rows / best_time(
+            lambda: sklearn_model.predict_proba(batch), 3)
+        results['batch_rows_per_sec']['compiled'][n_rows] = n_rows / best_time(
+            lambda: compiled.predict_proba(batch_array), 3)
+        n_rows *= 10
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--max-rows', type=int, default=100_000)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.max_rows)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    model = results['model']
+    print(f"model: {model['trees']} trees, {model['nodes']} nodes, max depth {model['max_depth']}")
+    print(f"max |proba difference| vs sklearn: {results['max_abs_proba_diff']:.2e}")
+    print("\nsingle-row latency")
+    for name, micros in results['single_row_us'].items():
+        print(f"  {name:<26}{micros:>12.1f} us")
+    print("\nbatch throughput (rows/sec)")
+    print(f"  {'rows':>10}{'sklearn':>14}{'compiled':>14}")
+    for n_rows, sklearn_rate in results['batch_rows_per_sec']['sklearn'].items():
+        compiled_rate = results['batch_rows_per_sec']['compiled'][n_rows]
+        print(f"  {n_rows:>10,}{sklearn_rate:>14,.0f}{compiled_rate:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Grid ingestion timing: cached region masks vs per-region boolean masks.
+
+Writes ``--months`` of synthetic NDVI, rainfall and temperature grids of
+``--size`` x ``--size`` pixels (float32 ``.npy``), plus a label grid with
+``--regions`` regions, to a temporary directory. Times building the region
+masks and loading them from the cache. Then reduces one grid to region means
+with the cached masks and with one ``grid[labels == k]`` per region (the
+usual way), checking that both agree. Finally runs ``ingest.zonal_means``
+over all grids with 1 and ``--workers`` processes.
+
+Usage:
+    python benchmarks/bench_ingest.py [--size 2000] [--regions 60] [--months 6] [--workers 4] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_inference import best_time  # noqa: E402
+from mekong_drought import ingest  # noqa: E402
+
+
+def write_grids(directory, size, n_regions, n_months, seed=0):
+    rng = np.random.default_rng(seed)
+    # Regions are Voronoi cells of random seeds, drawn on a coarse grid and scaled up
+    coarse = max(1, size // 50)
+    seeds = rng.integers(0, coarse, (n_regions, 2))
+    rows, cols = np.mgrid[0:coarse, 0:coarse]
+    distance = (rows[..., None] - seeds[:, 0]) ** 2 + (cols[..., None] - seeds[:, 1]) ** 2
+    cells = distance.argmin(axis=2) + 1
+    labels = np.kron(cells, np.ones((size // coarse + 1, size // coarse + 1), dtype=np.int16))[:size, :size]
+    labels[rng.random((size, size)) < 0.2] = 0  # water and out-of-delta pixels
+    np.save(os.path.join(directory, 'regions.npy'), labels.astype(np.int16))
+    for month in range(1, n_months + 1):
+        for variable, low, high in (('ndvi', 0.1, 0.8), ('precipitation_mm', 0, 400), ('temp_mean_c', 20, 35)):
+            grid = rng.uniform(low, high, (size, size)).astype(np.float32)
+            grid[rng.random((size, size)) < 0.05] = np.nan  # cloud / gaps
+            np.save(os.path.join(directory, f'{variable}_2025-{month:02d}.npy'), grid)
+    return labels
+
+
+def run(size=2000, n_regions=60, n_months=6, workers=None, repeat=3):
+    workers = workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as directory:
+        labels = write_grids(directory, size, n_regions, n_months)
+        labels_path = os.path.join(directory, 'regions.npy')
+        cache_path = os.path.join(directory, 'regions' + ingest.MASKS_SUFFIX)
+        grid_path = os.path.join(directory, 'ndvi_2025-01.npy')
+
+        def build():
+            os.remove(cache_path) if os.path.exists(cache_path) else None
+            return ingest.load_masks(labels_path)[0]
+
+        masks = build()
+        grid = ingest.open_grid(grid_path)
+
+        def cached():
+            sums, counts = masks.zonal(grid)
+            return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+        def boolean_masks():
+            values = np.load(grid_path, mmap_mode='r')
+            means = []
+            for k in range(1, len(masks.names) + 1):
+                region = values[labels == k]
+                region = region[~np.isnan(region)]
+                means.append(region.mean(dtype=np.float64) if len(region) else np.nan)
+            return np.array(means)
+
+        results = {
+            'size': size,
+            'regions': len(masks.names),
+            'grids': 3 * n_months,
+            'mask_build_ms': best_time(build, repeat) * 1000,
+            'mask_load_ms': best_time(lambda: ingest.load_masks(labels_path), repeat) * 1000,
+            'grid_cached_masks_ms': best_time(cached, repeat) * 1000,
+            'grid_boolean_masks_ms': best_time(boolean_masks, repeat) * 1000,
+            'max_error': float(np.nanmax(np.abs(cached() - boolean_masks()))),
+            'runs': [],
+        }
+        for n_workers in sorted({1, workers}):
+            _, stats = ingest.zonal_means(directory, labels_path, workers=n_workers)
+            results['runs'].append({'workers': n_workers, 'seconds': stats['seconds'],
+                                    'pixels_per_sec': stats['pixels_per_sec']})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=2000)
+    parser.add_argument('--regions', type=int, default=60)
+    parser.add_argument('--months', type=int, default=6)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.size, args.regions, args.months, args.workers, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['size']:,} x {results['size']:,} grids, {results['regions']} regions\n")
+    print(f"  region masks: built in {results['mask_build_ms']:.0f} ms, loaded from cache in "
+          f"{results['mask_load_ms']:.1f} ms")
+    print(f"  one grid: {results['grid_cached_masks_ms']:.0f} ms with cached masks, "
+          f"{results['grid_boolean_masks_ms']:.0f} ms with a boolean mask per region "
+          f"(max difference {results['max_error']:.1e})\n")
+    for r in results['runs']:
+        print(f"  {results['grids']} grids, {r['workers']} worker(s): {r['seconds']:.2f}s "
+              f"({r['pixels_per_sec']:,.0f} pixels/sec)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Startup timing: pickled model vs native export vs compact export.
+
+Each loader runs in a fresh interpreter so import and first-load costs are
+included, as they would be for a worker process starting up. Memory is what
+the loaded, compiled model still holds (``compact.artifact_stats``).
+
+Usage:
+    python benchmarks/bench_model_load.py [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOAD_CODE = (
+    "import time; t = time.perf_counter(); "
+    "from mekong_drought.model_store import load_model_file; "
+    "load_model_file({path!r}); print(time.perf_counter() - t)"
+)
+
+
+def time_cold_start(code, repeat):
+    wall, load = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-c', code], cwd=BASE_DIR,
+            check=True, capture_output=True, text=True
+        ).stdout
+        wall.append(time.perf_counter() - start)
+        load.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(wall), statistics.median(load)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, BASE_DIR)
+    import warnings
+
+    from mekong_drought.compact import artifact_stats
+    from mekong_drought.engine import COMPACT_MODEL_PATH, MODEL_PATH, NATIVE_MODEL_PATH
+
+    paths = {'pickle (joblib)': MODEL_PATH, 'native (.npz)': NATIVE_MODEL_PATH, 'compact (.npz)': COMPACT_MODEL_PATH}
+    results = {}
+    for name, path in paths.items():
+        if not os.path.exists(path):
+            print(f"skipping {name}: {path} not found", file=sys.stderr)
+            continue
+        wall, load = time_cold_start(LOAD_CODE.format(path=path), args.repeat)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            stats = artifact_stats(path, repeat=1)
+        results[name] = {'file_bytes': os.path.getsize(path), 'process_seconds': wall, 'import_and_load_seconds': load,
+                         'model_bytes': stats.model_bytes}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'format':<18}{'file size':>12}{'process':>12}{'import+load':>14}{'memory':>10}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['file_bytes'] / 1024:>10.0f}KB{r['process_seconds'] * 1000:>10.0f}ms"
+              f"{r['import_and_load_seconds'] * 1000:>12.1f}ms{r['model_bytes'] / 1024:>8.0f}KB")
+
+
+if __name__ == '__main__':
+    main()
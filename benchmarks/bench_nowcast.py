@@ -0,0 +1,139 @@
+"""
+Streaming nowcast timing: daily ingest throughput and skipped re-scores.
+
+Seeds ``--streams`` synthetic stations with ten years of monthly history,
+then replays ``--days`` of daily records for all of them, one batch per day.
+Each station reports rainfall (dry on most days) and temperature daily, and
+an NDVI composite every eighth day. ``Nowcaster`` ingests each batch and re-scores only the
+stations whose features crossed a split threshold. The baseline re-scores
+every station each day. Also checks that both give the same probabilities,
+and reports state memory per station.
+
+Usage:
+    python benchmarks/bench_nowcast.py [--streams 5000] [--days 90] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mekong_drought.engine import compile_model, predict_proba, resolve_model_path  # noqa: E402
+from mekong_drought.model_store import load_model_file  # noqa: E402
+from mekong_drought.nowcast import Nowcaster, days_in_month  # noqa: E402
+from mekong_drought.regions import month_key  # noqa: E402
+
+HISTORY_MONTHS = 120
+
+
+def seeded(model, n_streams, projection, seed=0):
+    rng = np.random.default_rng(seed)
+    nowcaster = Nowcaster(model, projection)
+    months = month_key(2015, 1) + np.arange(HISTORY_MONTHS)
+    season = 1 + np.sin(np.arange(HISTORY_MONTHS) * np.pi / 6)
+    for i in range(n_streams):
+        nowcaster.seed(f'station_{i:05d}', months, rng.gamma(2, 60, HISTORY_MONTHS) * season,
+                       rng.uniform(0.3, 0.7, HISTORY_MONTHS), rng.normal(27, 2, HISTORY_MONTHS))
+    return nowcaster
+
+
+def daily_batches(names, first_month, n_days, seed=1):
+    rng = np.random.default_rng(seed)
+    n = len(names)
+    level = rng.normal(27, 2, n)
+    month, day = first_month, 1
+    for i in range(n_days):
+        rain = np.where(rng.random(n) < 0.3, rng.gamma(0.8, 12, n), 0.0)
+        ndvi = rng.uniform(0.3, 0.7, n) if i % 8 == 7 else None
+        yield names, np.full(n, month), np.full(n, day), rain, ndvi, level + rng.normal(0, 0.7, n)
+        day += 1
+        if day > days_in_month(month):
+            month, day = month + 1, 1
+
+
+def replay(nowcaster, n_days, full=False):
+    """
+    Ingest every day's batch; ``full`` re-scores every station instead of only changed ones
+    """
+    names = list(nowcaster.names)
+    slots = np.arange(len(names))
+    events = 0
+    ingest_s = score_s = 0.0
+    for batch in daily_batches(names, month_key(2015, 1) + HISTORY_MONTHS, n_days):
+        started = time.perf_counter()
+        nowcaster.ingest(*batch)
+        ingested = time.perf_counter()
+        if full:
+            predict_proba(nowcaster.model, nowcaster.features(slots))
+            nowcaster._dirty[slots] = False
+        else:
+            result = nowcaster.score()
+            events += int((result.predicted != result.previous).sum())
+        ingest_s += ingested - started
+        score_s += time.perf_counter() - ingested
+    return ingest_s, score_s, events
+
+
+def run(n_streams=5000, n_days=90, projection='none'):
+    model = compile_model(load_model_file(resolve_model_path()).model)
+    incremental = seeded(model, n_streams, projection)
+    baseline = seeded(model, n_streams, projection)
+    records = n_streams * n_days
+
+    ingest_s, score_s, events = replay(incremental, n_days)
+    _, baseline_score_s, _ = replay(baseline, n_days, full=True)
+    slots = np.arange(n_streams)
+    features = incremental.features(slots)
+    complete = ~np.isnan(features).any(axis=1)
+    expected = predict_proba(model, features[complete])
+    return {
+        'streams': n_streams,
+        'days': n_days,
+        'projection': projection,
+        'records': records,
+        'ingest_s': ingest_s,
+        'ingest_records_per_s': records / ingest_s,
+        'score_changed_s': score_s,
+        'score_all_s': baseline_score_s,
+        'rescored': incremental.scored,
+        'skipped': incremental.skipped,
+        'class_changes': events,
+        'state_bytes_per_stream': incremental.nbytes_per_stream(),
+        'max_proba_error': float(np.abs(incremental._proba[slots][complete] - expected).max()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--streams', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--projection', choices=('climatology', 'none'), default='none')
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.streams, args.days, args.projection)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['streams']:,} stations x {results['days']} days = {results['records']:,} records "
+          f"(projection: {results['projection']})\n")
+    print(f"  {'ingest':<26}{results['ingest_s']:>8.2f}s  ({results['ingest_records_per_s']:,.0f} records/s)")
+    print(f"  {'re-score changed only':<26}{results['score_changed_s']:>8.2f}s")
+    print(f"  {'re-score every station':<26}{results['score_all_s']:>8.2f}s")
+    total = results['rescored'] + results['skipped']
+    print(f"\n  re-scored {results['rescored']:,} of {total:,} station-days "
+          f"({results['skipped'] / max(total, 1):.0%} skipped), {results['class_changes']:,} class changes")
+    print(f"  state {results['state_bytes_per_stream']:,} bytes per station, "
+          f"max |proba - full re-score| {results['max_proba_error']:.1e}")
+
+
+if __name__ == '__main__':
+    main()
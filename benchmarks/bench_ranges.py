@@ -0,0 +1,106 @@
+"""
+Range-query timing: prefix-sum index vs filtering the monthly table.
+
+Builds a synthetic ``--months``-long series and answers the same questions
+with ``ranges.RangeIndex`` and with pandas boolean masks over a DataFrame
+(what answering them from the CSV would do, without re-reading it):
+random date-range means, every year's Dec-Apr rainfall total and class
+counts. Also times building the index and appending one month to it.
+
+Usage:
+    python benchmarks/bench_ranges.py [--months 1200] [--queries 1000] [--repeat 3] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_inference import best_time  # noqa: E402
+from mekong_drought.ranges import RangeIndex  # noqa: E402
+from mekong_drought.regions import month_key  # noqa: E402
+from mekong_drought.store import FLOAT_COLUMNS  # noqa: E402
+
+
+def synthetic_series(n_months, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(rng.uniform(0, 300, (n_months, len(FLOAT_COLUMNS))), columns=FLOAT_COLUMNS)
+    frame['key'] = month_key(1900, 1) + np.arange(n_months)
+    frame['drought_label'] = rng.integers(-1, 5, n_months)
+    return frame
+
+
+def pandas_seasonal(frame, starts, ends):
+    keys = frame['key'].to_numpy()
+    return [frame['precipitation_mm'][(keys >= start) & (keys <= end)].sum() for start, end in zip(starts, ends)]
+
+
+def run(n_months=1200, n_queries=1000, repeat=3):
+    frame = synthetic_series(n_months)
+
+    def build():
+        return RangeIndex(frame['key'], frame[list(FLOAT_COLUMNS)].to_numpy(), frame['drought_label'])
+
+    index = build()
+    rng = np.random.default_rng(1)
+    bounds = np.sort(rng.integers(frame['key'].min(), frame['key'].max() + 1, (n_queries, 2)), axis=1)
+    _, starts, ends = index.season_bounds()
+    keys = frame['key'].to_numpy()
+
+    def pandas_means():
+        return [frame['vci'][(keys >= start) & (keys <= end)].mean() for start, end in bounds]
+
+    def pandas_counts():
+        return [np.bincount(frame['drought_label'][(keys >= start) & (keys <= end) & (frame['drought_label'] >= 0)],
+                            minlength=5) for start, end in bounds]
+
+    expected = np.array(pandas_seasonal(frame, starts, ends))
+    appended = build()
+    results = {
+        'months': n_months,
+        'queries': n_queries,
+        'build_ms': best_time(build, repeat) * 1000,
+        'append_us': best_time(lambda: appended.append(appended.last + 1, {'vci': 50.0}, 1), repeat, number=200) * 1e6,
+        'range_mean_index_ms': best_time(lambda: index.mean('vci', bounds[:, 0], bounds[:, 1]), repeat) * 1000,
+        'range_mean_pandas_ms': best_time(pandas_means, repeat) * 1000,
+        'class_counts_index_ms': best_time(lambda: index.class_counts(bounds[:, 0], bounds[:, 1]), repeat) * 1000,
+        'class_counts_pandas_ms': best_time(pandas_counts, repeat) * 1000,
+        'seasonal_index_ms': best_time(lambda: index.seasonal('precipitation_mm'), repeat) * 1000,
+        'seasonal_pandas_ms': best_time(lambda: pandas_seasonal(frame, starts, ends), repeat) * 1000,
+        'max_seasonal_error': float(np.abs(index.sum('precipitation_mm', starts, ends) - expected).max()),
+    }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--months', type=int, default=1200)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.months, args.queries, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['months']:,} months: index built in {results['build_ms']:.2f} ms, "
+          f"append {results['append_us']:.1f} µs\n")
+    print(f"  {'':<34}{'index':>10}{'pandas':>12}")
+    for label, name in ((f"{args.queries:,} range means", 'range_mean'),
+                        (f"{args.queries:,} range class counts", 'class_counts'),
+                        ("Dec-Apr rainfall, every year", 'seasonal')):
+        print(f"  {label:<34}{results[name + '_index_ms']:>8.2f}ms{results[name + '_pandas_ms']:>10.1f}ms")
+    print(f"\n  max |index - pandas| seasonal sum {results['max_seasonal_error']:.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Cross-region scoring: one batched call per month vs one call per region.
+
+Builds a temporary column store with ``--regions`` synthetic districts, each
+a jittered copy of the 120-month dataset, then times building the region
+index, ``score_month`` for all regions (one ``predict_proba`` over the region
+x feature matrix), the same month scored region by region with
+``engine.predict``, lookups in the precomputed forecasts, and the 3-month
+transition-matrix outlook for every stored region and month.
+
+Usage:
+    python benchmarks/bench_regions.py [--regions 500] [--repeat 5] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_inference import best_time  # noqa: E402
+from mekong_drought import engine  # noqa: E402
+from mekong_drought.regions import RegionForecasts, RegionIndex, feature_matrix, score_month  # noqa: E402
+from mekong_drought.store import ColumnStore  # noqa: E402
+from mekong_drought.transitions import load_transitions, trend_bin  # noqa: E402
+
+
+def synthetic_store(path, n_regions, seed=0):
+    dataset = pd.read_csv(engine.DATASET_PATH)
+    rng = np.random.default_rng(seed)
+    frames = []
+    for region in range(n_regions):
+        frame = dataset.copy()
+        frame.insert(0, 'region', f'district_{region:04d}')
+        for name in ('ndvi', 'precipitation_mm', 'vci', 'precip_anomaly'):
+            frame[name] = frame[name] * rng.normal(1.0, 0.05, len(frame))
+        frames.append(frame)
+    # Month-major order, as monthly ingestion appends it
+    combined = pd.concat(frames).sort_values(['year', 'month'], kind='stable')
+    store = ColumnStore.create(path)
+    store.append(combined)
+    return store
+
+
+def run(n_regions=500, repeat=5):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        model, _ = engine.load_model()
+    with tempfile.TemporaryDirectory() as directory:
+        store = synthetic_store(os.path.join(directory, 'store'), n_regions)
+        index = RegionIndex.from_store(store)
+        year, month = 2024, 3
+        rows = index.rows_for_month(year, month)
+        features = feature_matrix(store, rows)
+        forecasts = RegionForecasts.compute(model, store)
+        transitions = load_transitions()
+        labelled = forecasts.predicted >= 0
+
+        def all_outlooks():
+            trend = trend_bin(store.column('ndvi')[labelled] - store.column('ndvi_lag1')[labelled],
+                              store.column('precip_anomaly')[labelled], store.column('vci')[labelled] - 60)
+            return transitions.outlook(forecasts.proba[labelled], trend, month=store.column('month')[labelled])
+
+        def per_region():
+            return [engine.predict(model, row) for row in features]
+
+        results = {
+            'regions': n_regions,
+            'rows': len(store),
+            'index_build_ms': best_time(lambda: RegionIndex.from_store(store), repeat) * 1000,
+            'score_month_batched_ms': best_time(lambda: score_month(model, store, index, year, month), repeat) * 1000,
+            'score_month_per_region_ms': best_time(per_region, repeat) * 1000,
+            'precomputed_month_ms': best_time(lambda: forecasts.for_month(index, year, month), repeat) * 1000,
+            'precomputed_region_series_ms': best_time(lambda: forecasts.for_region(index, index.regions[0]),
+                                                      repeat) * 1000,
+            'transition_outlook_all_rows_ms': best_time(all_outlooks, repeat) * 1000,
+        }
+    results['batched_speedup'] = results['score_month_per_region_ms'] / results['score_month_batched_ms']
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--regions', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.regions, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['regions']:,} regions, {results['rows']:,} stored rows\n")
+    for name in ('index_build_ms', 'score_month_batched_ms', 'score_month_per_region_ms',
+                 'precomputed_month_ms', 'precomputed_region_series_ms', 'transition_outlook_all_rows_ms'):
+        print(f"  {name:<32}{results[name]:>10.2f} ms")
+    print(f"\n  batched month scoring is {results['batched_speedup']:,.1f}x faster than per-region calls")
+
+
+if __name__ == '__main__':
+    main()
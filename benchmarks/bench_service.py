@@ -0,0 +1,118 @@
+"""
+Prediction service throughput: concurrent /score clients against one server.
+
+Starts the service in-process on a free port and runs keep-alive HTTP
+clients that each send requests back to back. Reports requests/sec and the
+service's own latency percentiles and micro-batch sizes for three cases:
+batching disabled (max batch 1), the default zero window (requests that
+queue up while a batch is being scored are coalesced) and a 1 ms window.
+
+Usage:
+    python benchmarks/bench_service.py [--clients 64] [--requests 100] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from mekong_drought.engine import DATASET_PATH, FEATURE_COLUMNS  # noqa: E402
+from mekong_drought.service import PredictionService  # noqa: E402
+
+
+def request_bodies(n_bodies, seed=0):
+    dataset = pd.read_csv(DATASET_PATH)[FEATURE_COLUMNS].dropna()
+    rows = dataset.sample(n_bodies, replace=True, random_state=seed)
+    return [json.dumps(record).encode() for record in rows.to_dict('records')]
+
+
+async def _client(port, bodies, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            writer.write(b"POST /score HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def _run_case(n_clients, n_requests, window, max_batch, bodies):
+    service = await PredictionService(window=window, max_batch=max_batch).start(port=0)
+    try:
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            _client(service.port, bodies[i * n_requests:(i + 1) * n_requests], latencies)
+            for i in range(n_clients)
+        ])
+        elapsed = time.perf_counter() - start
+        stats = service.stats.snapshot()
+    finally:
+        await service.stop()
+
+    score = stats['endpoints']['/score']
+    return {
+        'window_ms': window * 1000,
+        'max_batch': max_batch,
+        'requests': len(latencies),
+        'requests_per_sec': len(latencies) / elapsed,
+        'client_p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'client_p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'server_p50_ms': score['p50_ms'],
+        'server_p99_ms': score['p99_ms'],
+        'mean_batch_size': stats['batches']['mean_size'],
+        'batch_size_histogram': stats['batches']['size_histogram'],
+    }
+
+
+def run(n_clients=64, n_requests=100):
+    bodies = request_bodies(n_clients * n_requests)
+    cases = [('unbatched', 0.0, 1), ('batched, no window', 0.0, 1024), ('batched, 1 ms window', 0.001, 1024)]
+    return {
+        'clients': n_clients,
+        'requests_per_client': n_requests,
+        'cases': {name: asyncio.run(_run_case(n_clients, n_requests, window, max_batch, bodies))
+                  for name, window, max_batch in cases},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=100, help="Requests per client")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.clients, args.requests)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['clients']} clients x {results['requests_per_client']} requests\n")
+    print(f"  {'case':<22}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'mean batch':>12}")
+    for name, case in results['cases'].items():
+        print(f"  {name:<22}{case['requests_per_sec']:>10,.0f}{case['server_p50_ms']:>10.2f}"
+              f"{case['server_p99_ms']:>10.2f}{case['mean_batch_size']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Dataset load timing: processed CSV vs the column store.
+
+Tiles the monthly dataset to ``--rows`` rows (as if it covered hundreds of
+districts), writes it both as CSV and as a ``ColumnStore`` in a temporary
+directory, then times ``pd.read_csv``, opening the store as a DataFrame,
+and opening it plus one pass over a feature column (which pages the data in).
+
+Usage:
+    python benchmarks/bench_store.py [--rows 1000000] [--repeat 3] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_inference import best_time  # noqa: E402
+from mekong_drought.engine import DATASET_PATH  # noqa: E402
+from mekong_drought.store import ColumnStore  # noqa: E402
+
+
+def synthetic_dataset(n_rows):
+    dataset = pd.read_csv(DATASET_PATH)
+    tiled = dataset.iloc[np.resize(np.arange(len(dataset)), n_rows)].reset_index(drop=True)
+    noise = np.random.default_rng(0).normal(1.0, 0.01, n_rows)
+    for name in ('ndvi', 'precipitation_mm', 'temp_mean_c'):
+        tiled[name] = tiled[name] * noise
+    return tiled
+
+
+def run(n_rows=1_000_000, repeat=3):
+    frame = synthetic_dataset(n_rows)
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'dataset.csv')
+        store_path = os.path.join(directory, 'store')
+        frame.to_csv(csv_path, index=False)
+        store = ColumnStore.import_csv(csv_path, store_path)
+
+        results = {
+            'rows': n_rows,
+            'csv_bytes': os.path.getsize(csv_path),
+            'store_bytes': store.nbytes(),
+            'read_csv_seconds': best_time(lambda: pd.read_csv(csv_path), repeat),
+            'store_open_seconds': best_time(lambda: ColumnStore.open(store_path).to_frame(), repeat),
+            'store_open_and_scan_seconds': best_time(
+                lambda: float(ColumnStore.open(store_path).to_frame()['ndvi'].sum()), repeat
+            ),
+        }
+    results['speedup'] = results['read_csv_seconds'] / results['store_open_seconds']
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['rows']:,} rows: CSV {results['csv_bytes'] / 1e6:,.1f} MB, "
+          f"store {results['store_bytes'] / 1e6:,.1f} MB\n")
+    print(f"  {'read_csv':<26}{results['read_csv_seconds'] * 1000:>10.1f} ms")
+    print(f"  {'store -> DataFrame':<26}{results['store_open_seconds'] * 1000:>10.1f} ms")
+    print(f"  {'store -> DataFrame + scan':<26}{results['store_open_and_scan_seconds'] * 1000:>10.1f} ms")
+    print(f"\n  {results['speedup']:,.0f}x faster to open")
+
+
+if __name__ == '__main__':
+    main()
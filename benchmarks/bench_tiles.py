@@ -0,0 +1,125 @@
+"""
+Drought map tile timing: pyramid build, and switching months from the tile cache.
+
+Writes ``--months`` of synthetic ``raster.py`` output (class and confidence
+grids of ``--size`` x ``--size`` cells, with patches of nodata) to a temporary
+directory. Builds their tile pyramids with 1 and ``--workers`` processes.
+Then times showing a month's map three ways: composing it from tiles on disk
+(a cold cache), looking it up in the store's LRU tile cache (what the
+dashboard does when switching months), and colouring and encoding the full
+grid on every switch, as one would without tiles.
+
+Usage:
+    python benchmarks/bench_tiles.py [--size 2000] [--months 3] [--workers 4] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_inference import best_time  # noqa: E402
+from mekong_drought import tiles  # noqa: E402
+from mekong_drought.raster import CLASS_FILE, CONFIDENCE_FILE, NODATA_CLASS  # noqa: E402
+from mekong_drought.regions import month_key  # noqa: E402
+
+
+def write_maps(directory, size, n_months, seed=0):
+    rng = np.random.default_rng(seed)
+    sources = []
+    rows, cols = np.mgrid[0:size, 0:size] / size
+    for month in range(1, n_months + 1):
+        # Smooth drought fields, so neighbouring cells mostly share a class
+        phase = rng.uniform(0, 2 * np.pi, 2)
+        field = np.sin(3 * rows + phase[0]) + np.cos(4 * cols + phase[1]) + rng.normal(0, 0.3, (size, size))
+        classes = np.digitize(field, [-1.2, -0.4, 0.4, 1.2]).astype(np.int8)
+        confidence = rng.uniform(0.4, 1.0, (size, size)).astype(np.float32)
+        classes[(rows - 0.5) ** 2 + (cols - 0.8) ** 2 < 0.02] = NODATA_CLASS  # sea / out of delta
+        confidence[classes == NODATA_CLASS] = np.nan
+        source = os.path.join(directory, f'2025-{month:02d}')
+        os.makedirs(source)
+        np.save(os.path.join(source, CLASS_FILE), classes)
+        np.save(os.path.join(source, CONFIDENCE_FILE), confidence)
+        sources.append((source, int(month_key(2025, month))))
+    return sources
+
+
+def run(size=2000, n_months=3, workers=None, repeat=3):
+    workers = workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as directory:
+        sources = write_maps(directory, size, n_months)
+        tiles_dir = os.path.join(directory, 'tiles')
+        results = {'size': size, 'months': n_months, 'runs': []}
+        for n_workers in sorted({1, workers}):
+            seconds = 0.0
+            for source, month in sources:
+                stats = tiles.build_tiles(source, tiles_dir, month, workers=n_workers, force=True)
+                seconds += stats['seconds']
+            results['runs'].append({'workers': n_workers, 'seconds': seconds})
+        results['tiles_per_month'] = stats['tiles']
+        results['kb_per_month'] = stats['bytes'] / 1024
+        results['zooms'] = list(stats['zooms'])
+        results['rebuild_unchanged_ms'] = best_time(
+            lambda: tiles.build_tiles(sources[0][0], tiles_dir, sources[0][1]), repeat) * 1000
+
+        months = [month for _, month in sources]
+        store = tiles.TileStore(tiles_dir)
+
+        def cold():
+            store.cache.clear()
+            for month in months:
+                store.overview(month, 'class')
+
+        def warm():
+            for month in months:
+                store.overview(month, 'class')
+
+        def full_grid():
+            for source, _ in sources:
+                classes = np.load(os.path.join(source, CLASS_FILE))
+                confidence = np.load(os.path.join(source, CONFIDENCE_FILE))
+                tiles.encode_png(tiles.tile_indices(classes, confidence)['class'], 'class')
+
+        results['switch_cold_ms'] = best_time(cold, repeat) / n_months * 1000
+        warm()
+        results['switch_cached_ms'] = best_time(warm, repeat) / n_months * 1000
+        results['switch_full_grid_ms'] = best_time(full_grid, repeat) / n_months * 1000
+        results['cache'] = {'hits': store.cache.hits, 'misses': store.cache.misses, 'entries': len(store.cache)}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=2000)
+    parser.add_argument('--months', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.size, args.months, args.workers, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['size']:,} x {results['size']:,} grids, {results['months']} months, "
+          f"zoom {results['zooms'][0]}-{results['zooms'][1]}: {results['tiles_per_month']:,} tiles "
+          f"({results['kb_per_month']:,.0f} KB) per month\n")
+    for r in results['runs']:
+        print(f"  build, {r['workers']} worker(s): {r['seconds']:.2f}s")
+    print(f"  build again, grids unchanged: {results['rebuild_unchanged_ms']:.1f} ms\n")
+    print("  switching months (per month):")
+    print(f"    {'overview from tiles on disk':<32}{results['switch_cold_ms']:>8.1f} ms")
+    print(f"    {'overview from the tile cache':<32}{results['switch_cached_ms']:>8.3f} ms")
+    print(f"    {'full grid coloured and encoded':<32}{results['switch_full_grid_ms']:>8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+History chart timing: payload size and render time with and without downsampling.
+
+Builds synthetic timelines of ``--months`` lengths and, for each, a Plotly
+figure with the same traces as the dashboard's history chart, from every
+month and from ``timeline.downsample``. Reports the figure's JSON size
+(what Streamlit sends to the browser) and the time to downsample, build
+and serialize it. Also times a cached ``Timeline.window`` lookup.
+
+Usage:
+    python benchmarks/bench_timeline.py [--months 120 1200 12000 120000] [--repeat 3] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_inference import best_time  # noqa: E402
+from mekong_drought import timeline  # noqa: E402
+from mekong_drought.regions import month_key, month_label  # noqa: E402
+
+
+def synthetic_timeline(n_months, seed=0):
+    rng = np.random.default_rng(seed)
+    predicted = rng.integers(0, 5, n_months).astype(np.int8)
+    observed = np.where(rng.random(n_months) < 0.9, predicted, rng.integers(-1, 5, n_months)).astype(np.int8)
+    return timeline.Timeline(month_key(1900, 1) + np.arange(n_months), predicted, rng.uniform(0.3, 1.0, n_months),
+                             rng.random(n_months), observed)
+
+
+def history_figure(points):
+    """
+    The dashboard's history chart traces (band, P(severe), observed, predicted)
+    """
+    import plotly.graph_objects as go
+
+    x = [month_label(key) for key in points.start.tolist()]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=x, y=points.severe_high * 100, yaxis='y2', mode='lines', line=dict(width=0)))
+    fig.add_trace(go.Scatter(x=x, y=points.severe_low * 100, yaxis='y2', mode='lines', fill='tonexty'))
+    fig.add_trace(go.Scatter(x=x, y=points.severe * 100, yaxis='y2', mode='lines'))
+    fig.add_trace(go.Scatter(x=x, y=[c if c >= 0 else None for c in points.observed.tolist()],
+                             mode='lines', line_shape='hv'))
+    fig.add_trace(go.Scatter(x=x, y=[c if c >= 0 else None for c in points.predicted.tolist()],
+                             mode='lines+markers', line_shape='hv', marker=dict(color=points.predicted.tolist())))
+    fig.update_layout(xaxis=dict(type='date'), yaxis2=dict(overlaying='y', side='right'))
+    return fig
+
+
+def render(series, max_points):
+    return history_figure(timeline.downsample(series, max_points)).to_json()
+
+
+def run(lengths=(120, 1200, 12_000, 120_000), repeat=3, max_points=timeline.MAX_POINTS):
+    results = {'max_points': max_points, 'timelines': []}
+    for n_months in lengths:
+        series = synthetic_timeline(n_months)
+        middle = int(series.months[n_months // 2])
+        results['timelines'].append({
+            'months': n_months,
+            'full_payload_bytes': len(render(series, n_months)),
+            'downsampled_payload_bytes': len(render(series, max_points)),
+            'full_render_ms': best_time(lambda: render(series, n_months), repeat) * 1000,
+            'downsampled_render_ms': best_time(lambda: render(series, max_points), repeat) * 1000,
+            'downsample_ms': best_time(lambda: timeline.downsample(series, max_points), repeat, number=20) * 1000,
+            'window_us': best_time(lambda: series.window(middle, middle + 120), repeat, number=200) * 1e6,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--months', type=int, nargs='+', default=[120, 1200, 12_000, 120_000])
+    parser.add_argument('--max-points', type=int, default=timeline.MAX_POINTS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.months, args.repeat, args.max_points)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Downsampled to at most {results['max_points']} points\n")
+    print(f"  {'':>8}{'payload':^26}{'build + serialize':^26}")
+    print(f"  {'months':>8}{'full':>12}{'downsampled':>14}{'full':>12}{'downsampled':>14}{'downsample':>12}")
+    for r in results['timelines']:
+        print(f"  {r['months']:>8,}{r['full_payload_bytes'] / 1024:>10.0f}KB{r['downsampled_payload_bytes'] / 1024:>12.0f}KB"
+              f"{r['full_render_ms']:>10.1f}ms{r['downsampled_render_ms']:>12.1f}ms{r['downsample_ms']:>10.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
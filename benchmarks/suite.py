@@ -0,0 +1,294 @@
+"""
+Benchmark suite: one JSON report for every performance-sensitive path.
+
+Covers interpreter cold start and imports, model loading, single-row and
+batch inference (1 / 1k / 100k / 1M rows), outlook and risk rule
+throughput and dashboard reruns through Streamlit's AppTest harness. Each
+metric records its value, unit and whether lower or higher is better, so a
+report can be compared with a stored baseline after upgrading a pinned
+dependency: ``--baseline`` prints the change per metric and exits with
+status 1 when any gated metric is worse than ``--tolerance``.
+
+Timings are the best of ``--repeat`` runs (of at least ``MICRO_REPEAT``
+short loops for microsecond metrics, the median for cold starts and
+dashboard reruns), so one slow run from a busy machine does not count. A
+slowdown must also exceed ``NOISE_FLOORS`` in absolute terms, which keeps
+microsecond-scale metrics from flagging on timer jitter. Single-sample and
+derived metrics (the first dashboard run, the slowest rerun, batch rows per
+second) are reported but not gated.
+
+Usage:
+    python benchmarks/suite.py --output benchmarks/baseline.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json [--tolerance 0.5]
+    python benchmarks/suite.py --groups inference rules --quick
+"""
+
+import argparse
+import builtins
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_inference import best_time, synthetic_rows  # noqa: E402
+from bench_model_load import LOAD_CODE, time_cold_start  # noqa: E402
+from mekong_drought import engine, rules  # noqa: E402
+from mekong_drought.engine import COMPACT_MODEL_PATH, MODEL_PATH, NATIVE_MODEL_PATH  # noqa: E402
+
+DASHBOARD_PATH = os.path.join(BASE_DIR, 'mekong-drought-ai.py')
+
+BATCH_SIZES = (1, 1_000, 100_000, 1_000_000)
+QUICK_BATCH_SIZES = (1, 1_000, 100_000)
+RULE_ROWS = 1_000_000
+
+# Back-to-back runs of identical code on a shared machine differ by up to ~35%
+DEFAULT_TOLERANCE = 0.5
+# Smallest absolute slowdown, per unit, that can count as a regression: below a dashboard rerun's jitter
+NOISE_FLOORS = {'us': 100.0, 'ms': 1.0}
+# Repeats for batches of 100k rows and more, which take seconds each
+LARGE_BATCH_REPEAT = 3
+# Microsecond metrics: best of many short loops, since a long loop rarely misses every scheduler hiccup
+MICRO_REPEAT = 20
+MICRO_NUMBER = 200
+
+IMPORT_CODE = "import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+IMPORTS = {
+    'engine': "import mekong_drought.engine",
+    'streamlit': "import streamlit",
+    'plotly': "import plotly.graph_objects as go; go.Figure()",  # graph_objects loads lazily
+}
+
+
+def metric(value, unit, better='lower', gate=True):
+    return {'value': float(value), 'unit': unit, 'better': better, 'gate': gate}
+
+
+def bench_startup(repeat):
+    results = {}
+    interpreter, _ = time_cold_start("print(0)", repeat)
+    results['interpreter_start_ms'] = metric(interpreter * 1000, 'ms')
+    for name, statement in IMPORTS.items():
+        wall, imported = time_cold_start(IMPORT_CODE.format(statement=statement), repeat)
+        results[f'import_{name}_ms'] = metric(imported * 1000, 'ms')
+        results[f'process_import_{name}_ms'] = metric(wall * 1000, 'ms')
+    return results
+
+
+def bench_model_load(repeat):
+    results = {}
+    for name, path in (('pickle', MODEL_PATH), ('native', NATIVE_MODEL_PATH), ('compact', COMPACT_MODEL_PATH)):
+        if not os.path.exists(path):
+            continue
+        wall, load = time_cold_start(LOAD_CODE.format(path=path), repeat)
+        results[f'cold_load_{name}_ms'] = metric(load * 1000, 'ms')
+        results[f'cold_process_{name}_ms'] = metric(wall * 1000, 'ms')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        results['engine_load_model_ms'] = metric(best_time(engine.load_model, repeat) * 1000, 'ms')
+    return results
+
+
+def bench_inference(batch_sizes, repeat):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        model, _ = engine.load_model()
+    rows = synthetic_rows(max(batch_sizes)).to_numpy()
+    input_data = engine.build_input_data(0.55, 80, 28, 250, 600, 0.52, 65, 10, 0.5)
+
+    results = {
+        'predict_single_row_us': metric(best_time(lambda: engine.predict(model, input_data), max(repeat, MICRO_REPEAT),
+                                                     MICRO_NUMBER) * 1e6, 'us'),
+    }
+    for n_rows in batch_sizes:
+        batch = rows[:n_rows]
+        seconds = best_time(lambda: engine.predict_proba(model, batch),
+                            repeat if n_rows < 100_000 else min(repeat, LARGE_BATCH_REPEAT), max(1, 1000 // n_rows))
+        results[f'batch_{n_rows}_ms'] = metric(seconds * 1000, 'ms')
+        # Same measurement as batch_*_ms, which is the one gated
+        results[f'batch_{n_rows}_rows_per_sec'] = metric(n_rows / seconds, 'rows/s', 'higher', gate=False)
+    return results
+
+
+def bench_rules(repeat):
+    rng = np.random.default_rng(0)
+    vci, precip, precip_3month = rng.uniform(0, 100, RULE_ROWS), rng.gamma(2, 40, RULE_ROWS), rng.gamma(3, 60, RULE_ROWS)
+    ndvi = rng.uniform(0.2, 0.8, RULE_ROWS)
+    ndvi_trend, precip_trend = rng.normal(0, 0.05, RULE_ROWS), rng.normal(0, 20, RULE_ROWS)
+    season = rng.random(RULE_ROWS) < 0.4
+
+    risk = best_time(lambda: rules.risk_score(vci, precip, precip_3month, ndvi), repeat)
+    outlook = best_time(lambda: rules.short_term_outlook(ndvi_trend, precip_trend, vci - 60, season), repeat)
+    micro_repeat = max(repeat, MICRO_REPEAT)
+    scalar_risk = best_time(lambda: engine.compute_risk_score(20.0, 15.0, 40.0, 0.4), micro_repeat, MICRO_NUMBER)
+    scalar_outlook = best_time(lambda: engine.predict_short_term_outlook(0, -0.03, -15.0, -7.0, engine.DRY_SEASON),
+                               micro_repeat, MICRO_NUMBER)
+    return {
+        'risk_rows_per_sec': metric(RULE_ROWS / risk, 'rows/s', 'higher'),
+        'outlook_rows_per_sec': metric(RULE_ROWS / outlook, 'rows/s', 'higher'),
+        'risk_scalar_us': metric(scalar_risk * 1e6, 'us'),
+        'outlook_scalar_us': metric(scalar_outlook * 1e6, 'us'),
+    }
+
+
+def bench_dashboard(repeat):
+    """
+    First run and rerun time of the dashboard script body.
+
+    AppTest runs the script on a worker thread and polls for completion in
+    100 ms steps, so the script's own ``exec`` is timed instead of the
+    ``run()`` call.
+    """
+    from streamlit.runtime.scriptrunner import script_runner
+    from streamlit.testing.v1 import AppTest
+
+    timings = []
+
+    def timed_exec(code, namespace, *args):
+        start = time.perf_counter()
+        try:
+            return builtins.exec(code, namespace, *args)
+        finally:
+            timings.append(time.perf_counter() - start)
+
+    script_runner.exec = timed_exec
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            app = AppTest.from_file(DASHBOARD_PATH, default_timeout=120)
+            app.run()
+            first_run = timings[-1]
+            reruns = []
+            for value in [20.0, 30.0, 40.0, 50.0, 60.0][:max(repeat, 2)] * 2:
+                app.sidebar.slider[1].set_value(value)
+                app.run()
+                if app.exception:
+                    raise RuntimeError(f"Dashboard raised: {app.exception}")
+                reruns.append(timings[-1])
+    finally:
+        del script_runner.exec
+    # One first run per process, and the slowest rerun is an outlier by definition: both too noisy to gate
+    return {
+        'first_run_ms': metric(first_run * 1000, 'ms', gate=False),
+        'rerun_median_ms': metric(statistics.median(reruns) * 1000, 'ms'),
+        'rerun_max_ms': metric(max(reruns) * 1000, 'ms', gate=False),
+    }
+
+
+GROUPS = ('startup', 'model_load', 'inference', 'rules', 'dashboard')
+
+
+def environment():
+    versions = {}
+    for package in ('numpy', 'pandas', 'sklearn', 'xgboost', 'streamlit', 'plotly'):
+        try:
+            versions[package] = __import__(package).__version__
+        except ImportError:
+            versions[package] = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit,
+        'packages': versions,
+    }
+
+
+def run(groups=GROUPS, repeat=5, quick=False):
+    runners = {
+        'startup': lambda: bench_startup(repeat),
+        'model_load': lambda: bench_model_load(repeat),
+        'inference': lambda: bench_inference(QUICK_BATCH_SIZES if quick else BATCH_SIZES, repeat),
+        'rules': lambda: bench_rules(repeat),
+        'dashboard': lambda: bench_dashboard(repeat),
+    }
+    results = {}
+    for group in groups:
+        for name, value in runners[group]().items():
+            results[f'{group}.{name}'] = value
+    return {'environment': environment(), 'metrics': results}
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    ``(rows, regressions)``: per shared metric ``(name, old, new, change, status)``.
+
+    A gated metric regresses when it is more than ``tolerance`` worse and the
+    difference is above its unit's ``NOISE_FLOORS`` entry.
+    """
+    rows, regressions = [], []
+    for name, current in report['metrics'].items():
+        previous = baseline['metrics'].get(name)
+        if previous is None or previous['value'] == 0:
+            continue
+        change = current['value'] / previous['value'] - 1
+        worse = change > tolerance if current['better'] == 'lower' else change < -tolerance / (1 + tolerance)
+        better = change < -tolerance / (1 + tolerance) if current['better'] == 'lower' else change > tolerance
+        if abs(current['value'] - previous['value']) <= NOISE_FLOORS.get(current['unit'], 0.0):
+            worse = better = False
+        if worse and not current.get('gate', True):
+            status = 'slower (not gated)'
+        else:
+            status = 'REGRESSION' if worse else 'improved' if better else 'ok'
+        rows.append((name, previous['value'], current['value'], change, status))
+        if status == 'REGRESSION':
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help="Skip the 1M-row batch")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    parser.add_argument('--baseline', help="JSON report to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative slowdown before a metric counts as a regression")
+    args = parser.parse_args(argv)
+
+    report = run(args.groups, args.repeat, args.quick)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+    if not args.baseline:
+        if not args.output:
+            print(json.dumps(report, indent=2))
+        else:
+            for name, value in report['metrics'].items():
+                print(f"  {name:<46}{value['value']:>16,.2f} {value['unit']}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows, regressions = compare(report, baseline, args.tolerance)
+    print(f"  {'metric':<46}{'baseline':>14}{'current':>14}{'change':>9}")
+    for name, old, new, change, status in rows:
+        print(f"  {name:<46}{old:>14,.2f}{new:>14,.2f}{change:>+9.0%}  {status}")
+    if regressions:
+        print(f"❌ {len(regressions)} gated metric(s) regressed by more than {args.tolerance:.0%}", file=sys.stderr)
+        return 1
+    print(f"✅ No regressions beyond {args.tolerance:.0%} ({len(rows)} metrics compared)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,19 @@
+import calendar
+import os
+import threading
+
 import streamlit as st
 import pandas as pd
-import numpy as np
-import joblib
 import plotly.graph_objects as go
-import plotly.express as px
-import os
-from datetime import datetime, timedelta
+
+from mekong_drought import engine, forecast, ranges, sweep, telemetry, timeline, transitions
+from mekong_drought.cache import LRUCache, PredictionCache
+from mekong_drought.climatology import Climatology
+from mekong_drought.model_store import ModelWatcher
+from mekong_drought.regions import RegionIndex, load_forecasts, month_key, month_label
+from mekong_drought.store import MANIFEST_FILE, STORE_PATH, ColumnStore, load_dataset
+from mekong_drought.tiles import TileStore
+from mekong_drought.engine import DROUGHT_CATEGORIES, DROUGHT_COLORS, DROUGHT_DESCRIPTIONS, DROUGHT_GRADIENTS
 
 # Page configuration
 st.set_page_config(
@@ -15,8 +23,30 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Timing spans for this rerun, logged as one JSON line at the end of the script;
+# add ?profile=1 to the URL to also cProfile the rerun. A rerun that never gets there (an
+# error, or interrupted by a widget change) is finished when the session's next rerun starts,
+# timed up to its last span, so its profiler is always stopped and its line always logged
+@st.cache_resource
+def start_telemetry():
+    telemetry.log_to_stderr()
+    port = os.environ.get('MEKONG_METRICS_PORT')
+    return telemetry.serve_metrics(int(port)) if port else None
+
+start_telemetry()
+if 'rerun_trace' in st.session_state:
+    previous_trace = st.session_state['rerun_trace']
+    previous_trace.finish(end=previous_trace.last_activity, completed=False)
+rerun_trace = st.session_state['rerun_trace'] = telemetry.trace(
+    'dashboard.rerun', profile=st.experimental_get_query_params().get('profile', ['0'])[0] != '0'
+).start()
+
+# Streamlit calls that serialize HTML and figures, timed per rerun
+markdown = telemetry.timed('dashboard.markdown')(st.markdown)
+plotly_chart = telemetry.timed('dashboard.plotly_chart')(st.plotly_chart)
+
 # Custom CSS for professional styling - UPDATED CSS
-st.markdown("""
+markdown("""
     <style>
     .main-header {
         font-size: 2.5rem;
@@ -224,7 +254,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Title Section
-st.markdown("""
+markdown("""
     <div class="main-header">
         🌾 Agricultural Drought Early Warning System
         <div class="sub-header">Mekong Delta Region</div>
@@ -232,7 +262,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Author information
-st.markdown("""
+markdown("""
     <div class="author-info">
         🎭 <strong>Authors:</strong> Nguyen Van Quy & Dinh Ba Duy<br>
         <strong>Affiliation:</strong> Joint Vietnam-Russia Tropical Science and Technology Research Center
@@ -242,7 +272,7 @@ st.markdown("""
 # Header Information Cards
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.markdown("""
+    markdown("""
         <div class="info-card">
             <h3 style='color: white; margin: 0;'>🗺️ Region</h3>
             <p style='color: white; font-size: 1.1rem; margin: 0.5rem 0 0 0;'>Mekong Delta, Vietnam</p>
@@ -250,7 +280,7 @@ with col1:
     """, unsafe_allow_html=True)
     
 with col2:
-    st.markdown("""
+    markdown("""
         <div class="info-card">
             <h3 style='color: white; margin: 0;'>🛰️ Data Source</h3>
             <p style='color: white; font-size: 1.1rem; margin: 0.5rem 0 0 0;'>Satellite-based (2015-2024)</p>
@@ -258,39 +288,70 @@ with col2:
     """, unsafe_allow_html=True)
     
 with col3:
-    st.markdown("""
+    markdown("""
         <div class="info-card">
             <h3 style='color: white; margin: 0;'>💻 System</h3>
             <p style='color: white; font-size: 1.1rem; margin: 0.5rem 0 0 0;'>Python and R Models</p>
         </div>
     """, unsafe_allow_html=True)
 
-st.markdown("<br>", unsafe_allow_html=True)
+markdown("<br>", unsafe_allow_html=True)
 
 # Load model with improved error handling
+# The watcher reloads the model in the background whenever its file changes;
+# the prediction cache is shared by all sessions and emptied on every reload.
+# The map tile cache is shared too (tiles are keyed by their build, not the model)
 @st.cache_resource
 def load_model():
     try:
-        if not os.path.exists('models/XGBoost_drought_model.pkl'):
-            st.error("❌ Model file not found. Please check the models folder.")
-            return None, None
-            
-        model = joblib.load('models/XGBoost_drought_model.pkl')
-        scaler = joblib.load('models/scaler.pkl')
-        return model, scaler
+        prediction_cache = PredictionCache()
+        watcher = ModelWatcher(
+            engine.resolve_model_path(), transform=engine.compile_model,
+            on_reload=lambda loaded: prediction_cache.clear()
+        ).start()
+        scaler = engine.load_scaler()
+        return watcher, scaler, prediction_cache, TileStore()
+    except FileNotFoundError:
+        st.error("❌ Model file not found. Please check the models folder.")
+        return None, None, None, None
     except Exception as e:
         st.error(f"❌ Error loading model: {str(e)}")
-        return None, None
+        return None, None, None, None
 
-model, scaler = load_model()
+with telemetry.span('dashboard.load_model'):
+    model_watcher, scaler, prediction_cache, tile_store = load_model()
 
-if model is None or scaler is None:
+if model_watcher is None or scaler is None:
     st.error("🚫 Unable to load required model files. Please check your deployment.")
+    rerun_trace.finish(completed=False)
     st.stop()
 
+loaded_model = model_watcher.current
+model = loaded_model.model
+
+# Per-month NDVI and rainfall baselines for VCI / anomaly and the learned class transitions
+# for the outlook, both built from the dataset if not shipped (one resource: see load_regions)
+@st.cache_resource
+def load_baselines():
+    try:
+        climatology = Climatology.load()
+    except FileNotFoundError:
+        try:
+            climatology = Climatology.from_frame(load_dataset(['month', 'ndvi', 'precipitation_mm']))
+        except FileNotFoundError:
+            climatology = None
+    try:
+        transition_model = transitions.load_transitions()
+    except FileNotFoundError:
+        transition_model = None
+    return climatology, transition_model
+
+climatology, transition_model = load_baselines()
+MONTH_NAMES = list(calendar.month_name[1:])
+
 # Season data for Mekong Delta - UPDATED WITH STANDARD TERMINOLOGY
 SEASON_DATA = {
-    "Dry Season (Dec-Apr)": {
+    engine.DRY_SEASON: {
         "description": "Characterized by low rainfall, high temperatures, and increased drought vulnerability",
         "characteristics": [
             "🌵 Low rainfall: 100-200 mm (5-10% of annual total)",
@@ -311,7 +372,7 @@ SEASON_DATA = {
         "color": "season-dry",
         "risk_level": "🟠 High Alert"
     },
-    "Rainy Season (May-Nov)": {
+    engine.RAINY_SEASON: {
         "description": "Features abundant rainfall, flooding, and optimal vegetation growth conditions",
         "characteristics": [
             "🌧️ High rainfall: 1,300-2,000 mm (90-95% of annual total)",
@@ -334,9 +395,396 @@ SEASON_DATA = {
     }
 }
 
+# Section renderers are cached on their own inputs, so a rerun triggered by an
+# unrelated widget reuses them. Figures live in st.cache_resource (shared, not
+# copied) and must not be mutated after they are returned.
+@st.cache_data(max_entries=8)
+def season_panel_html(season):
+    season_info = SEASON_DATA[season]
+    statistics = season_info['statistics']
+    risk_class = "season-stat-risk-high" if statistics['drought_risk'] == "High" else "season-stat-risk-low"
+    characteristics = "\n".join(f"- {characteristic}" for characteristic in season_info['characteristics'])
+    stat_boxes = [
+        ("season-stat-rainfall", "🌧️ Rainfall:", statistics['rainfall']),
+        ("season-stat-humidity", "💧 Humidity:", statistics['humidity']),
+        ("season-stat-temperature", "🌡️ Temperature:", statistics['temperature']),
+        (risk_class, "⚠️ Drought Risk:", statistics['drought_risk']),
+    ]
+    stats_html = "".join(f"""
+        <div class="{css_class}">
+            <strong>{label}</strong><br>
+            <span style='font-size: 1.1rem; font-weight: bold;'>{value}</span>
+        </div>""" for css_class, label, value in stat_boxes)
+    return f"""**{season_info['risk_level']}: {season_info['description']}**
+
+**🔍 Key Characteristics:**
+
+{characteristics}
+
+**📊 Seasonal Statistics:**
+
+<div style='display: grid; grid-template-columns: 1fr 1fr; column-gap: 1rem;'>{stats_html}
+</div>
+"""
+
+
+@st.cache_resource(max_entries=1024)
+def probability_figure(probabilities_pct):
+    return go.Figure(
+        data=[go.Bar(
+            x=DROUGHT_CATEGORIES,
+            y=list(probabilities_pct),
+            marker_color=DROUGHT_COLORS,
+            text=[f'{prob:.1f}%' for prob in probabilities_pct],
+            textposition='outside',
+            textfont=dict(size=16, color='black', family='Arial Black'),
+            hovertemplate='<b>%{x}</b><br>Probability: %{y:.1f}%<extra></extra>'
+        )],
+        layout=dict(
+            height=500,
+            margin=dict(l=50, r=50, t=80, b=80),
+            yaxis_title="Probability (%)",
+            yaxis=dict(
+                title_font=dict(size=18, color='#2c3e50'),
+                tickfont=dict(size=14),
+                gridcolor='rgba(0,0,0,0.1)',
+                range=[0, max(probabilities_pct) * 1.2]
+            ),
+            xaxis=dict(tickfont=dict(size=12), tickangle=45),
+            showlegend=False,
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            title=dict(
+                text='Drought Category Probability Distribution',
+                font=dict(size=20, color='#2c3e50'),
+                x=0.5
+            )
+        )
+    )
+
+
+@st.cache_resource(max_entries=1024)
+def precipitation_figure(precip_current, precip_3month, precip_6month):
+    amounts = [precip_current, precip_3month, precip_6month]
+    return go.Figure(
+        data=[go.Bar(
+            x=['Current Month', '3-Month', '6-Month'],
+            y=amounts,
+            marker_color=['#3498db', '#2980b9', '#21618c'],
+            text=amounts,
+            texttemplate='%{text:.0f} mm',
+            textposition='outside',
+            textfont=dict(size=14, color='black', family='Arial Black'),
+            marker_line_color='rgba(0,0,0,0.3)',
+            marker_line_width=1.5
+        )],
+        layout=dict(
+            height=350,
+            margin=dict(l=20, r=20, t=40, b=20),
+            yaxis_title="Precipitation (mm)",
+            yaxis=dict(
+                title_font=dict(size=16),
+                tickfont=dict(size=12),
+                gridcolor='rgba(0,0,0,0.1)',
+                range=[0, max(amounts) * 1.15]
+            ),
+            xaxis=dict(tickfont=dict(size=12)),
+            showlegend=False,
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+    )
+
+
+@st.cache_resource(max_entries=64)
+def what_if_response(_model, model_key, base_features, x_feature, y_feature, n_points):
+    """
+    Scored sweep grid; swept features are masked out of ``base_features`` by the caller
+    """
+    x_values = sweep.sweep_values(x_feature, n_points)
+    y_values = None if y_feature is None else sweep.sweep_values(y_feature, n_points)
+    return sweep.sweep(_model, base_features, x_feature, x_values, y_feature, y_values)
+
+
+@st.cache_resource(max_entries=64)
+def what_if_analysis(_model, model_key, base_features, x_feature, y_feature, n_points):
+    """
+    Scored sweep grid plus its figures, cached on the model checksum and every input
+    """
+    feature_label = lambda name: sweep.SWEEP_FEATURES[name][0]
+    swept = {x_feature, y_feature} | {derived for derived, (source, _) in engine.DERIVED_FEATURES.items()
+                                      if source in (x_feature, y_feature)}
+    grid_base = tuple(0.0 if name in swept else value for name, value in zip(engine.FEATURE_COLUMNS, base_features))
+    sweep_result = what_if_response(_model, model_key, grid_base, x_feature, y_feature, n_points)
+    x_values, y_values = sweep_result.x_values, sweep_result.y_values
+    current_x = base_features[engine.FEATURE_COLUMNS.index(x_feature)]
+
+    if y_feature is None:
+        fig_sweep = go.Figure()
+        for i, category in enumerate(DROUGHT_CATEGORIES):
+            fig_sweep.add_trace(go.Scatter(
+                x=x_values, y=sweep_result.proba[:, i] * 100, mode='lines', name=category,
+                line=dict(color=DROUGHT_COLORS[i], width=3)
+            ))
+        fig_sweep.add_vline(x=current_x, line_dash='dash', line_color='#2c3e50', annotation_text='Current')
+        fig_sweep.update_layout(
+            height=450, xaxis_title=feature_label(x_feature), yaxis_title="Probability (%)",
+            plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', legend=dict(orientation='h')
+        )
+        return sweep_result, [fig_sweep]
+
+    class_colorscale = []
+    for i, color in enumerate(DROUGHT_COLORS):
+        class_colorscale += [[i / len(DROUGHT_COLORS), color], [(i + 1) / len(DROUGHT_COLORS), color]]
+    current_marker = go.Scatter(
+        x=[current_x], y=[base_features[engine.FEATURE_COLUMNS.index(y_feature)]], mode='markers',
+        showlegend=False, marker=dict(symbol='x', size=14, color='white', line=dict(width=2, color='black')),
+        hovertemplate='Current conditions<extra></extra>'
+    )
+    fig_class = go.Figure(data=[
+        go.Heatmap(
+            x=x_values, y=y_values, z=sweep_result.predicted_class,
+            zmin=-0.5, zmax=len(DROUGHT_CATEGORIES) - 0.5, colorscale=class_colorscale,
+            customdata=[[DROUGHT_CATEGORIES[c] for c in row] for row in sweep_result.predicted_class],
+            hovertemplate='%{customdata}<extra></extra>',
+            colorbar=dict(tickvals=list(range(len(DROUGHT_CATEGORIES))), ticktext=DROUGHT_CATEGORIES)
+        ),
+        current_marker
+    ])
+    fig_class.update_layout(height=450, title="Predicted Category",
+                            xaxis_title=feature_label(x_feature), yaxis_title=feature_label(y_feature))
+    fig_conf = go.Figure(data=[
+        go.Heatmap(
+            x=x_values, y=y_values, z=sweep_result.confidence * 100, colorscale='Viridis',
+            hovertemplate='Confidence: %{z:.1f}%<extra></extra>', colorbar=dict(title='%')
+        ),
+        current_marker
+    ])
+    fig_conf.update_layout(height=450, title="Model Confidence",
+                           xaxis_title=feature_label(x_feature), yaxis_title=feature_label(y_feature))
+    return sweep_result, [fig_class, fig_conf]
+
+
+def store_version():
+    """
+    Modification time of the column store manifest (changes on every append), None without a store
+    """
+    try:
+        return os.path.getmtime(os.path.join(STORE_PATH, MANIFEST_FILE))
+    except FileNotFoundError:
+        return None
+
+
+# Bounds for the per-key memos in load_regions, shared by all sessions
+REGION_TABLES_CACHE_SIZE = 256
+REGION_FIGURES_CACHE_SIZE = 64
+REGION_OUTLOOKS_CACHE_SIZE = 32
+
+
+# Every stored region and month scored once per model and store version. Tables and
+# figures are memoized in the same resource: each st.cache_* decorator costs ~2 ms
+# per rerun to re-register, more than a lookup here. Memos keyed by month or year
+# range are bounded LRUs; timelines are one per region. Every memo is an LRUCache,
+# so sessions filling them concurrently never race on a plain dict
+@st.cache_resource(max_entries=2)
+def load_regions(_model, model_key, version):
+    store = ColumnStore.open()
+    index = RegionIndex.from_store(store)
+    return {'store': store, 'index': index, 'forecasts': load_forecasts(store, _model, model_key),
+            'tables': LRUCache(REGION_TABLES_CACHE_SIZE),
+            'timelines': LRUCache(max(len(index.regions), 1)),
+            'figures': LRUCache(REGION_FIGURES_CACHE_SIZE), 'outlooks': LRUCache(REGION_OUTLOOKS_CACHE_SIZE)}
+
+
+def region_month_table(regions, month):
+    def load():
+        table = regions['forecasts'].for_month(regions['index'], month // 12, month % 12 + 1)
+        table = table[table['predicted_class'] >= 0].sort_values(['predicted_class', 'confidence'], ascending=False)
+        columns = ['region', 'predicted_category', 'confidence', 'risk_score', 'risk_level']
+        return table[columns].reset_index(drop=True)
+
+    return regions['tables'].get_or_load(month, load)
+
+
+def region_timeline(regions, region):
+    return regions['timelines'].get_or_load(region, lambda: timeline.Timeline.from_forecasts(
+        regions['forecasts'], regions['index'], regions['store'], region))
+
+
+# Range indexes outlive store versions: after an append, each is brought up to date
+# with RangeIndex.refresh instead of rebuilt. Keyed on the store directory's inode, so
+# a store deleted and imported again starts over. The lock serializes refreshes and
+# queries, since a refresh updates an index in place
+@st.cache_resource(max_entries=2)
+def load_range_indexes(store_id):
+    return {'indexes': {}, 'lock': threading.Lock()}
+
+
+def range_statistics(regions, region, first_year, last_year):
+    """
+    Summary line and per-dry-season table for whole years of ``region``, from its prefix-sum index
+    """
+    store = regions['store']
+    shared = load_range_indexes(os.stat(STORE_PATH).st_ino)
+
+    def load():
+        with shared['lock']:
+            index = shared['indexes'].get(region)
+            if index is None or index.rows_seen > len(store):
+                index = shared['indexes'][region] = ranges.RangeIndex.from_store(store, regions['index'], region)
+            elif index.rows_seen < len(store):
+                index.refresh(store)
+            return range_summary(index, first_year, last_year)
+
+    return regions['tables'].get_or_load(('ranges', region, first_year, last_year), load)
+
+
+def range_summary(index, first_year, last_year):
+    """
+    Summary line and per-dry-season table for whole years, from a ``RangeIndex``
+    """
+    start, end = month_key(first_year, 1), month_key(last_year, 12)
+    counts = ", ".join(f"{count} {category.split()[0]}"
+                       for category, count in zip(DROUGHT_CATEGORIES, index.class_counts(start, end).tolist()))
+    recent_vci, recent_years = index.recent_seasons('vci', 3)
+    summary = (f"**{first_year}–{last_year}:** {index.sum('precipitation_mm', start, end):,.0f} mm rainfall, "
+               f"mean VCI {index.mean('vci', start, end):.1f}, mean NDVI {index.mean('ndvi', start, end):.2f} · "
+               f"observed months: {counts}")
+    if len(recent_years):
+        summary += (f" · mean VCI over the last {len(recent_years)} complete dry seasons "
+                    f"({recent_years[0]}–{recent_years[-1]}): {recent_vci:.1f}")
+    rain, vci = index.seasonal('precipitation_mm'), index.seasonal('vci')
+    in_range = (rain.index >= first_year) & (rain.index <= last_year)
+    table = pd.DataFrame({
+        'Dry season': rain['start'] + ' – ' + rain['end'], 'Rainfall (mm)': rain['sum'],
+        'Mean VCI': vci['mean'], 'Months': rain['months'],
+    })[in_range].iloc[::-1]
+    return summary, table
+
+
+def region_history_figure(regions, region, first_year, last_year):
+    """
+    Predicted vs observed history of ``region`` over whole years, downsampled to ``timeline.MAX_POINTS``
+    """
+    def load():
+        window = region_timeline(regions, region).window(month_key(first_year, 1), month_key(last_year, 12))
+        return build_history_figure(timeline.downsample(window), region)
+
+    return regions['figures'].get_or_load(('history', region, first_year, last_year), load)
+
+
+def region_outlook(regions, model, region, month, n_scenarios):
+    """
+    Monte Carlo outlook for ``region`` starting after ``month``: summary table and fan chart figures
+    """
+    def load():
+        history = forecast.region_history(regions['store'], regions['index'], region)
+        result = forecast.forecast(model, forecast.until(history, month // 12, month % 12 + 1), n_scenarios,
+                                   sampler=forecast.ScenarioSampler(history), seed=0)
+        return forecast.summary(result), build_outlook_figures(result)
+
+    return regions['outlooks'].get_or_load((region, month, n_scenarios), load)
+
+
+def build_outlook_figures(result):
+    # Quantiles over scenarios of P(Severe or worse), as 5-95% and 25-75% bands around the median
+    low, lower_mid, median, upper_mid, high = forecast.fan(forecast.severe_probability(result)) * 100
+    fig_fan = go.Figure()
+    for lower, upper, opacity, name in ((low, high, 0.2, "5-95%"), (lower_mid, upper_mid, 0.4, "25-75%")):
+        fig_fan.add_trace(go.Scatter(x=result.months, y=upper, mode='lines', line=dict(width=0),
+                                     showlegend=False, hoverinfo='skip'))
+        fig_fan.add_trace(go.Scatter(x=result.months, y=lower, mode='lines', line=dict(width=0),
+                                     fill='tonexty', fillcolor=f'rgba(192, 57, 43, {opacity})', name=name))
+    fig_fan.add_trace(go.Scatter(x=result.months, y=median, mode='lines+markers', name="Median",
+                                 line=dict(color='#c0392b', width=3)))
+    fig_fan.update_layout(
+        height=380, margin=dict(l=20, r=20, t=40, b=20), title=dict(text="P(Severe or worse) across scenarios", x=0.5),
+        xaxis=dict(type='category'), yaxis=dict(title="Probability (%)", range=[0, 100]), legend=dict(orientation='h'),
+        plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)'
+    )
+
+    proba = forecast.class_probabilities(result) * 100
+    fig_classes = go.Figure(
+        data=[go.Bar(x=proba.index, y=proba[category], name=category, marker_color=DROUGHT_COLORS[i],
+                     hovertemplate=f'{category}: %{{y:.1f}}%<extra></extra>')
+              for i, category in enumerate(proba.columns)],
+        layout=dict(
+            barmode='stack', height=380, margin=dict(l=20, r=20, t=40, b=20),
+            title=dict(text="Class probabilities by month", x=0.5), yaxis=dict(title="Probability (%)"),
+            legend=dict(orientation='h'), plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)'
+        )
+    )
+    return [fig_fan, fig_classes]
+
+
+def build_history_figure(points, region):
+    # One point per month, or per bucket of months when the range was downsampled: classes are
+    # the bucket's worst, P(Severe or worse) its mean with a min-max band. Unscored and
+    # unlabelled months are None so Plotly leaves gaps
+    x = [month_label(key) for key in points.start.tolist()]
+    predicted = [c if c >= 0 else None for c in points.predicted.tolist()]
+    observed = [c if c >= 0 else None for c in points.observed.tolist()]
+    bucketed = bool((points.bucket_months > 1).any())
+    fig = go.Figure()
+    if bucketed:
+        fig.add_trace(go.Scatter(x=x, y=points.severe_high * 100, yaxis='y2', mode='lines', line=dict(width=0),
+                                 showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=x, y=points.severe_low * 100, yaxis='y2', mode='lines', line=dict(width=0),
+                                 fill='tonexty', fillcolor='rgba(192, 57, 43, 0.15)', name="P(severe) range"))
+    fig.add_trace(go.Scatter(x=x, y=points.severe * 100, yaxis='y2', mode='lines', name="P(severe or worse)",
+                             line=dict(color='rgba(192, 57, 43, 0.6)', width=1.5),
+                             hovertemplate='%{x}: %{y:.0f}%<extra></extra>'))
+    fig.add_trace(go.Scatter(x=x, y=observed, mode='lines', name="Observed", line_shape='hv',
+                             line=dict(color='#2c3e50', width=1.5, dash='dot'), hoverinfo='skip'))
+    fig.add_trace(go.Scatter(
+        x=x, y=predicted, mode='lines+markers', name="Predicted", line_shape='hv',
+        line=dict(color='#95a5a6', width=2),
+        marker=dict(size=7, color=[DROUGHT_COLORS[c] if c >= 0 else '#bdc3c7' for c in points.predicted.tolist()]),
+        hovertemplate='%{x}: %{y}<extra></extra>'
+    ))
+    title = f"Prediction History - {region.replace('_', ' ').title()}"
+    if bucketed:
+        title += f" ({int(points.bucket_months.max())}-month buckets, worst class shown)"
+    fig.update_layout(
+        height=350, margin=dict(l=20, r=20, t=40, b=20), title=dict(text=title, x=0.5),
+        xaxis=dict(type='date'),
+        yaxis=dict(tickvals=list(range(len(DROUGHT_CATEGORIES))), ticktext=DROUGHT_CATEGORIES,
+                   range=[-0.5, len(DROUGHT_CATEGORIES) - 0.5]),
+        yaxis2=dict(overlaying='y', side='right', range=[0, 100], showgrid=False, title="P(severe) %"),
+        legend=dict(orientation='h', y=-0.15), plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)'
+    )
+    return fig
+
+
+MAP_HEIGHT = 480
+MAP_LAYERS = {"Predicted class": 'class', "Confidence": 'confidence'}
+
+
+def drought_map_html(tiles, month, layer):
+    """
+    Folium map of one month's layer, composed from precomputed tiles; the HTML is cached with the tiles
+    """
+    def render():
+        import base64
+        import folium  # about 0.8 s to import, so only once there are tiles to show
+
+        image, image_bounds = tiles.overview(month, layer)
+        south, west, north, east = tiles.metadata(month)['bounds']
+        fmap = folium.Map(location=[(south + north) / 2, (west + east) / 2], zoom_start=8, control_scale=True)
+        folium.raster_layers.ImageOverlay(
+            image='data:image/png;base64,' + base64.b64encode(image).decode(), bounds=image_bounds,
+            opacity=0.75, name=month_label(month)
+        ).add_to(fmap)
+        fmap.fit_bounds([[south, west], [north, east]])
+        return fmap.get_root().render()
+
+    built = tiles.metadata(month)['built']
+    return tiles.cache.get_or_load(('map', month, built, layer), render)
+
+
 # Sidebar - Professional Design
 with st.sidebar:
-    st.markdown("""
+    markdown("""
         <div class="sidebar-content">
             <h2 style='color: white; text-align: center;'>🎛️ Control Panel</h2>
             <p style='color: white; text-align: center;'>Adjust parameters for prediction analysis</p>
@@ -351,67 +799,36 @@ with st.sidebar:
             help="Mekong Delta seasonal patterns and characteristics"
         )
         
-        # Display detailed season information
-        season_info = SEASON_DATA[season]
-        
-        # Display risk level
-        st.markdown(f"**{season_info['risk_level']}: {season_info['description']}**")
-        
-        st.markdown("**🔍 Key Characteristics:**")
-        for characteristic in season_info['characteristics']:
-            st.markdown(f"• {characteristic}")
-        
-        st.markdown("**📊 Seasonal Statistics:**")
-        col_stat1, col_stat2 = st.columns(2)
-        
-        with col_stat1:
-            # Rainfall
-            st.markdown(f"""
-                <div class="season-stat-rainfall">
-                    <strong>🌧️ Rainfall:</strong><br>
-                    <span style='font-size: 1.1rem; font-weight: bold;'>{season_info['statistics']['rainfall']}</span>
-                </div>
-            """, unsafe_allow_html=True)
-            
-            # Temperature
-            st.markdown(f"""
-                <div class="season-stat-temperature">
-                    <strong>🌡️ Temperature:</strong><br>
-                    <span style='font-size: 1.1rem; font-weight: bold;'>{season_info['statistics']['temperature']}</span>
-                </div>
-            """, unsafe_allow_html=True)
-        
-        with col_stat2:
-            # Humidity
-            st.markdown(f"""
-                <div class="season-stat-humidity">
-                    <strong>💧 Humidity:</strong><br>
-                    <span style='font-size: 1.1rem; font-weight: bold;'>{season_info['statistics']['humidity']}</span>
-                </div>
-            """, unsafe_allow_html=True)
-            
-            # Drought Risk
-            risk_class = "season-stat-risk-high" if season_info['statistics']['drought_risk'] == "High" else "season-stat-risk-low"
-            st.markdown(f"""
-                <div class="{risk_class}">
-                    <strong>⚠️ Drought Risk:</strong><br>
-                    <span style='font-size: 1.1rem; font-weight: bold;'>{season_info['statistics']['drought_risk']}</span>
-                </div>
-            """, unsafe_allow_html=True)
+        # Whole panel rendered as one cached HTML block (changes only with the season)
+        markdown(season_panel_html(season), unsafe_allow_html=True)
 
     # Vegetation Health Indicators
     with st.expander("🌱 **Vegetation Health Indicators**", expanded=True):
+        use_climatology = st.checkbox(
+            "📐 Derive VCI and anomaly from climatology", value=False, disabled=climatology is None,
+            help="Compute VCI and precipitation anomaly from the historical baselines of a calendar month"
+        )
+        if use_climatology:
+            calendar_month = MONTH_NAMES.index(st.selectbox("Calendar month", MONTH_NAMES)) + 1
+
         ndvi = st.slider(
             "🌿 NDVI - Normalized Difference Vegetation Index",
             min_value=0.20, max_value=0.80, value=0.55, step=0.01,
             help="Vegetation health index ranging from 0.2 (sparse vegetation) to 0.8 (dense vegetation)"
         )
         
-        vci = st.slider(
-            "📊 VCI - Vegetation Condition Index",
-            min_value=0.0, max_value=100.0, value=65.0, step=1.0,
-            help="Vegetation condition relative to historical minimum and maximum (0-100%)"
-        )
+        if use_climatology:
+            # The model's VCI is against the whole record's NDVI range; the per-month index is shown alongside
+            vci = round(float(climatology.record_vci(ndvi, climatology.locations[0])), 1)
+            monthly_vci = float(climatology.vci(calendar_month, ndvi, climatology.locations[0]))
+            markdown(f"📊 **VCI:** {vci:.1f}% (vs. record NDVI range) · {monthly_vci:.0f}% vs. "
+                     f"{MONTH_NAMES[calendar_month - 1]} range")
+        else:
+            vci = st.slider(
+                "📊 VCI - Vegetation Condition Index",
+                min_value=0.0, max_value=100.0, value=65.0, step=1.0,
+                help="Vegetation condition relative to historical minimum and maximum (0-100%)"
+            )
         
         ndvi_3month_avg = st.slider(
             "📈 3-Month Average NDVI",
@@ -440,11 +857,17 @@ with st.sidebar:
             min_value=0.0, max_value=3000.0, value=600.0, step=20.0
         )
         
-        precip_anomaly = st.slider(
-            "📊 Precipitation Anomaly (%)",
-            min_value=-100.0, max_value=150.0, value=10.0, step=5.0,
-            help="Deviation from long-term average precipitation"
-        )
+        if use_climatology:
+            precip_anomaly = round(float(climatology.precip_anomaly(calendar_month, precip_current,
+                                                                    climatology.locations[0])), 1)
+            markdown(f"📊 **Precipitation Anomaly:** {precip_anomaly:+.1f}% "
+                     f"(vs. {MONTH_NAMES[calendar_month - 1]} mean)")
+        else:
+            precip_anomaly = st.slider(
+                "📊 Precipitation Anomaly (%)",
+                min_value=-100.0, max_value=150.0, value=10.0, step=5.0,
+                help="Deviation from long-term average precipitation"
+            )
 
     # Temperature Data
     with st.expander("🌡️ **Temperature Data**", expanded=False):
@@ -453,61 +876,32 @@ with st.sidebar:
             min_value=20.0, max_value=35.0, value=28.0, step=0.5
         )
 
-# Calculate derived features
-precip_3month_avg = precip_3month / 3
-precip_lag1 = precip_current * 0.9  # Simplified assumption
-
-# Prepare input for prediction
-input_data = pd.DataFrame({
-    'ndvi': [ndvi],
-    'precipitation_mm': [precip_current],
-    'temp_mean_c': [temp_mean],
-    'precip_3month': [precip_3month],
-    'precip_6month': [precip_6month],
-    'ndvi_3month_avg': [ndvi_3month_avg],
-    'precip_3month_avg': [precip_3month_avg],
-    'vci': [vci],
-    'precip_anomaly': [precip_anomaly],
-    'precip_lag1': [precip_lag1],
-    'ndvi_lag1': [ndvi_lag1]
-})
+# Prepare input for prediction (derived features are filled in by the engine)
+input_data = engine.build_input_data(
+    ndvi, precip_current, temp_mean, precip_3month, precip_6month,
+    ndvi_3month_avg, vci, precip_anomaly, ndvi_lag1
+)
 
 # Make prediction
 try:
-    prediction = model.predict(input_data)[0]
-    prediction_proba = model.predict_proba(input_data)[0]
+    prediction, prediction_proba = engine.predict(
+        model, input_data, cache=prediction_cache, model_key=loaded_model.checksum
+    )
 except Exception as e:
     st.error(f"❌ Prediction error: {str(e)}")
+    rerun_trace.finish(completed=False)
     st.stop()
 
-# 5-Level Drought Classification System - STANDARD TERMINOLOGY
-drought_categories = ['No Drought', 'Mild Drought', 'Moderate Drought', 'Severe Drought', 'Extreme Drought']
-drought_colors = ['#2ecc71', '#f1c40f', '#e67e22', '#e74c3c', '#8b0000']
-drought_gradients = [
-    'linear-gradient(135deg, #2ecc71 0%, #27ae60 100%)',
-    'linear-gradient(135deg, #f1c40f 0%, #f39c12 100%)',
-    'linear-gradient(135deg, #e67e22 0%, #d35400 100%)',
-    'linear-gradient(135deg, #e74c3c 0%, #c0392b 100%)',
-    'linear-gradient(135deg, #8b0000 0%, #600000 100%)'
-]
-drought_descriptions = [
-    "🌿 Normal vegetation conditions with adequate rainfall patterns",
-    "💧 Minor vegetation stress with slightly below normal rainfall", 
-    "⚠️ Moderate vegetation stress with significant rainfall deficit",
-    "🔥 Severe vegetation stress with prolonged rainfall deficit",
-    "🚨 Extreme vegetation stress with critical water shortage conditions"
-]
-
 # Main content - Current Forecast Result
-st.markdown('<div class="section-header">🎯 Current Drought Forecast</div>', unsafe_allow_html=True)
+markdown('<div class="section-header">🎯 Current Drought Forecast</div>', unsafe_allow_html=True)
 
-predicted_category = drought_categories[prediction]
-predicted_gradient = drought_gradients[prediction]
-predicted_description = drought_descriptions[prediction]
+predicted_category = DROUGHT_CATEGORIES[prediction]
+predicted_gradient = DROUGHT_GRADIENTS[prediction]
+predicted_description = DROUGHT_DESCRIPTIONS[prediction]
 confidence = prediction_proba[prediction] * 100
 
 # Large forecast display
-st.markdown(f"""
+markdown(f"""
     <div class="current-forecast" style='background: {predicted_gradient}'>
         <h1 style='color: white; margin: 0; font-size: 3.5rem; font-weight: 800; text-shadow: 2px 2px 4px rgba(0,0,0,0.3);'>{predicted_category}</h1>
         <div class="confidence-badge">
@@ -520,71 +914,14 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # SHORT-TERM OUTLOOK SECTION - UPDATED
-st.markdown('<div class="section-header">🔮 Short-term Outlook (Next 30 Days)</div>', unsafe_allow_html=True)
-
-def predict_short_term_outlook(current_prediction, ndvi_trend, precip_trend, vci_trend, season):
-    """
-    Forecast drought conditions for next month based on current trends
-    """
-    # Trend scoring
-    trend_score = 0
-    
-    # NDVI trend analysis
-    if ndvi_trend < -0.05:  # Sharp decrease
-        trend_score += 2
-    elif ndvi_trend < -0.02:  # Slight decrease
-        trend_score += 1
-    elif ndvi_trend > 0.05:  # Sharp increase
-        trend_score -= 2
-    elif ndvi_trend > 0.02:  # Slight increase
-        trend_score -= 1
-    
-    # Precipitation trend analysis
-    if precip_trend < -20:  # Sharp decrease
-        trend_score += 2
-    elif precip_trend < -10:  # Slight decrease
-        trend_score += 1
-    elif precip_trend > 20:  # Sharp increase
-        trend_score -= 2
-    elif precip_trend > 10:  # Slight increase
-        trend_score -= 1
-    
-    # VCI trend analysis
-    if vci_trend < -10:  # Sharp decrease
-        trend_score += 2
-    elif vci_trend < -5:  # Slight decrease
-        trend_score += 1
-    elif vci_trend > 10:  # Sharp increase
-        trend_score -= 2
-    elif vci_trend > 5:  # Slight increase
-        trend_score -= 1
-    
-    # Seasonal adjustment
-    if season == "Dry Season (Dec-Apr)":
-        trend_score += 1
-    
-    # Outlook classification
-    if trend_score >= 3:
-        outlook = "worsening"
-    elif trend_score >= 1:
-        outlook = "slightly_worsening"
-    elif trend_score <= -3:
-        outlook = "improving"
-    elif trend_score <= -1:
-        outlook = "slightly_improving"
-    else:
-        outlook = "stable"
-    
-    return outlook, trend_score
+markdown('<div class="section-header">🔮 Short-term Outlook (Next 30 Days)</div>', unsafe_allow_html=True)
 
 # Calculate trends
-ndvi_trend = ndvi - ndvi_lag1
-precip_trend = precip_anomaly
-vci_trend = vci - 60
+ndvi_trend, precip_trend, vci_trend = engine.compute_trends(ndvi, ndvi_lag1, precip_anomaly, vci)
 
-# Generate short-term forecast
-outlook, trend_score = predict_short_term_outlook(
-    prediction, ndvi_trend, precip_trend, vci_trend, season
+# Generate short-term forecast: learned class transitions from the current probabilities
+outlook, trend_score = engine.predict_short_term_outlook(
+    prediction, ndvi_trend, precip_trend, vci_trend, season, transition_model, prediction_proba
 )
 
 # Display outlook results
@@ -625,13 +962,16 @@ with col_out1:
     }
     
     outlook_info = outlook_config[outlook]
+    outlook_basis = ("Based on the current forecast and historical month-to-month drought transitions"
+                     if transition_model is not None else
+                     "Based on current vegetation trends and precipitation patterns")
     
-    st.markdown(f"""
+    markdown(f"""
         <div class="outlook-card {outlook_info['class']}">
             <h2 style='color: white; margin: 0; font-size: 2.5rem;'>{outlook_info['icon']} {outlook_info['level']}</h2>
             <p style='color: white; font-size: 1.2rem; margin: 1rem 0;'>{outlook_info['message']}</p>
             <p style='color: white; font-size: 1rem; margin: 0.5rem 0 0 0; opacity: 0.9;'>
-                Based on current vegetation trends and precipitation patterns
+                {outlook_basis}
             </p>
         </div>
     """, unsafe_allow_html=True)
@@ -642,7 +982,7 @@ with col_out2:
     trend_precip = "↘️ Below normal" if precip_trend < 0 else "↗️ Above normal" if precip_trend > 0 else "➡️ Normal"
     trend_vci = "↘️ Decreasing" if vci_trend < 0 else "↗️ Increasing" if vci_trend > 0 else "➡️ Stable"
     
-    st.markdown(f"""
+    markdown(f"""
         <div class="metric-card">
             <h3 style='color: #2c3e50; margin-bottom: 1rem;'>📈 Trend Indicators</h3>
             <p style='color: #5d6d7e; margin: 0.5rem 0;'>• NDVI Trend: {trend_ndvi}</p>
@@ -652,11 +992,29 @@ with col_out2:
         </div>
     """, unsafe_allow_html=True)
 
+    if transition_model is not None:
+        # Matrix products of the learned transitions applied to the current probabilities
+        month_outlook = transition_model.outlook(
+            prediction_proba, transitions.trend_bin(ndvi_trend, precip_trend, vci_trend), season=season
+        )[0]
+        outlook_lines = "".join(
+            f"<p style='color: #5d6d7e; margin: 0.5rem 0;'>• Month +{step + 1}: "
+            f"{DROUGHT_CATEGORIES[int(proba.argmax())]} · "
+            f"Severe or worse {proba[list(forecast.SEVERE_CLASSES)].sum():.0%}</p>"
+            for step, proba in enumerate(month_outlook)
+        )
+        markdown(f"""
+            <div class="metric-card">
+                <h3 style='color: #2c3e50; margin-bottom: 1rem;'>📅 Next 3 Months</h3>
+                {outlook_lines}
+            </div>
+        """, unsafe_allow_html=True)
+
 # Recommendations based on outlook
-st.markdown("#### 💡 Management Recommendations")
+markdown("#### 💡 Management Recommendations")
 
 if outlook in ["worsening", "slightly_worsening"]:
-    st.markdown("""
+    markdown("""
         <div class="recommendation-box">
             <h4 style='color: #e74c3c; margin-bottom: 1rem;'>⚠️ Preparedness Actions Recommended:</h4>
             <ul style='color: #5d6d7e;'>
@@ -669,7 +1027,7 @@ if outlook in ["worsening", "slightly_worsening"]:
         </div>
     """, unsafe_allow_html=True)
 elif outlook in ["improving", "slightly_improving"]:
-    st.markdown("""
+    markdown("""
         <div class="recommendation-box">
             <h4 style='color: #27ae60; margin-bottom: 1rem;'>✅ Favorable Outlook:</h4>
             <ul style='color: #5d6d7e;'>
@@ -681,7 +1039,7 @@ elif outlook in ["improving", "slightly_improving"]:
         </div>
     """, unsafe_allow_html=True)
 else:
-    st.markdown("""
+    markdown("""
         <div class="recommendation-box">
             <h4 style='color: #f39c12; margin-bottom: 1rem;'>🔍 Monitoring Recommended:</h4>
             <ul style='color: #5d6d7e;'>
@@ -694,49 +1052,110 @@ else:
     """, unsafe_allow_html=True)
 
 # Probability Distribution
-st.markdown('<div class="section-header">📊 Drought Category Probability Distribution</div>', unsafe_allow_html=True)
-
-fig_proba = go.Figure()
-for i, (category, prob) in enumerate(zip(drought_categories, prediction_proba)):
-    fig_proba.add_trace(go.Bar(
-        x=[category],
-        y=[prob * 100],
-        marker_color=drought_colors[i],
-        text=[f'{prob*100:.1f}%'],
-        textposition='outside',
-        textfont=dict(size=16, color='black', family='Arial Black'),
-        hovertemplate=f'<b>{category}</b><br>Probability: {prob*100:.1f}%<extra></extra>'
-    ))
+markdown('<div class="section-header">📊 Drought Category Probability Distribution</div>', unsafe_allow_html=True)
+
+with telemetry.span('dashboard.figures'):
+    fig_proba = probability_figure(tuple(round(float(prob) * 100, 2) for prob in prediction_proba))
+plotly_chart(fig_proba, use_container_width=True)
+
+# Per-prediction explanation: path contributions on the compiled trees, cached next to the prediction
+markdown('<div class="section-header">🧭 Why This Forecast?</div>', unsafe_allow_html=True)
 
-fig_proba.update_layout(
-    height=500,
-    margin=dict(l=50, r=50, t=80, b=80),
-    yaxis_title="Probability (%)",
-    yaxis=dict(
-        title_font=dict(size=18, color='#2c3e50'), 
-        tickfont=dict(size=14), 
-        gridcolor='rgba(0,0,0,0.1)',
-        range=[0, max(prediction_proba * 100) * 1.2]
-    ),
-    xaxis=dict(tickfont=dict(size=12), tickangle=45),
-    showlegend=False,
-    plot_bgcolor='rgba(0,0,0,0)',
-    paper_bgcolor='rgba(0,0,0,0)',
-    title=dict(
-        text='Drought Category Probability Distribution',
-        font=dict(size=20, color='#2c3e50'),
-        x=0.5
+FEATURE_LABELS = {name: label for name, (label, _, _) in sweep.SWEEP_FEATURES.items()}
+FEATURE_LABELS.update({'precip_3month_avg': "3-Month Average Rainfall (mm)",
+                       'precip_lag1': "Previous Month Rainfall (mm)"})
+
+try:
+    with telemetry.span('dashboard.explain'):
+        contributions = engine.explain(model, input_data, cache=prediction_cache,
+                                       model_key=loaded_model.checksum)
+except ValueError:
+    st.info("Explanations are not available for this model type.")
+else:
+    feature_values = dict(zip(engine.FEATURE_COLUMNS, input_data[engine.FEATURE_COLUMNS].iloc[0].tolist()))
+    ranked = engine.top_contributions(contributions, prediction)
+    # Forests explain probabilities directly; boosted models explain the log-odds margin before softmax
+    log_odds = getattr(model, 'transform', 'identity') == 'softmax'
+    contribution_text = (lambda value: f"{value:+.2f}") if log_odds else (lambda value: f"{value * 100:+.1f} pp")
+    if log_odds:
+        explanation_intro = (f"The model starts from a baseline score of {contributions[prediction, -1]:.2f} "
+                             f"(log-odds) for <b>{predicted_category}</b>; each input below moved it up (blue) "
+                             f"or down (grey). The scores of all classes together give the {confidence:.1f}% "
+                             f"shown above.")
+    else:
+        explanation_intro = (f"The model starts from the average probability of <b>{predicted_category}</b> "
+                             f"({contributions[prediction, -1] * 100:.1f}%); each input below moved it up (blue) "
+                             f"or down (grey), to the {confidence:.1f}% shown above.")
+    largest = max(abs(value) for _, value in ranked) or 1.0
+    explanation_rows = "".join(
+        f"<div style='display: flex; align-items: center; margin: 0.35rem 0;'>"
+        f"<span style='width: 40%; color: #2c3e50;'>{FEATURE_LABELS[name]} = {feature_values[name]:,.2f}</span>"
+        f"<span style='width: 45%;'><span style='display: inline-block; height: 0.8rem; border-radius: 4px; "
+        f"width: {abs(value) / largest * 100:.0f}%; background: {'#3498db' if value > 0 else '#95a5a6'};'>"
+        f"</span></span>"
+        f"<span style='width: 15%; text-align: right; color: #5d6d7e;'>{contribution_text(value)}</span></div>"
+        for name, value in ranked
     )
-)
-st.plotly_chart(fig_proba, use_container_width=True)
+    markdown(f"""
+        <div class="metric-card">
+            <p style='color: #5d6d7e; margin: 0 0 1rem 0;'>{explanation_intro}</p>
+            {explanation_rows}
+        </div>
+    """, unsafe_allow_html=True)
+
+# What-if Sensitivity Analysis - whole grid scored in one batched call
+markdown('<div class="section-header">🔬 What-if Sensitivity Analysis</div>', unsafe_allow_html=True)
+
+with st.expander("Explore how the forecast responds to one or two inputs", expanded=False):
+    sweep_features = {label: name for name, (label, _, _) in sweep.SWEEP_FEATURES.items()}
+    sweep_label = lambda name: sweep.SWEEP_FEATURES[name][0]
+    no_y_axis = "None (1-D sweep)"
+
+    col_sw1, col_sw2, col_sw3 = st.columns([2, 2, 1])
+    with col_sw1:
+        x_choices = list(sweep_features)
+        x_feature = sweep_features[st.selectbox("Horizontal axis", x_choices,
+                                                index=x_choices.index(sweep_label('precip_3month')))]
+    with col_sw2:
+        y_choices = [no_y_axis] + [label for label in sweep_features if sweep_features[label] != x_feature]
+        y_choice = st.selectbox("Vertical axis", y_choices, index=y_choices.index(sweep_label('vci')))
+        y_feature = None if y_choice == no_y_axis else sweep_features[y_choice]
+    with col_sw3:
+        sweep_points = st.select_slider("Grid size", options=[25, 50, 100], value=100)
+
+    run_sweep = st.checkbox("Compute response", value=False,
+                            help="Scores the whole grid in one batched call on every change while enabled")
+
+    if run_sweep:
+        base_features = tuple(float(value) for value in input_data[engine.FEATURE_COLUMNS].iloc[0])
+        with telemetry.span('dashboard.what_if'):
+            sweep_result, sweep_figures = what_if_analysis(
+                model, loaded_model.checksum, base_features, x_feature, y_feature, sweep_points
+            )
+
+        if y_feature is None:
+            plotly_chart(sweep_figures[0], use_container_width=True)
+
+            if prediction > 0:
+                needed = sweep.first_value_below(sweep_result, prediction)
+                if needed is None:
+                    st.info(f"No {sweep_label(x_feature)} value in range lowers the forecast below {predicted_category}.")
+                else:
+                    st.info(f"📉 {sweep_label(x_feature)} of {needed:,.2f} would move the forecast out of {predicted_category}.")
+        else:
+            col_hm1, col_hm2 = st.columns(2)
+            with col_hm1:
+                plotly_chart(sweep_figures[0], use_container_width=True)
+            with col_hm2:
+                plotly_chart(sweep_figures[1], use_container_width=True)
 
 # Detailed Analysis Sections
-st.markdown('<div class="section-header">📈 Detailed Analysis</div>', unsafe_allow_html=True)
+markdown('<div class="section-header">📈 Detailed Analysis</div>', unsafe_allow_html=True)
 
 col_a, col_b = st.columns(2, gap="large")
 
 with col_a:
-    st.markdown("### 🌱 Vegetation Health Analysis")
+    markdown("### 🌱 Vegetation Health Analysis")
     
     # NDVI Status Assessment
     if ndvi >= 0.6:
@@ -770,7 +1189,7 @@ with col_a:
     col_a1, col_a2 = st.columns(2)
     
     with col_a1:
-        st.markdown(f"""
+        markdown(f"""
             <div class="metric-card">
                 <h3 style='color: #2c3e50; margin-bottom: 0.5rem;'>NDVI Status</h3>
                 <p style='color: {ndvi_color}; font-size: 1.2rem; font-weight: bold; margin: 0;'>{ndvi_icon} {ndvi_status}</p>
@@ -780,7 +1199,7 @@ with col_a:
     
     with col_a2:
         ndvi_percentage = ((ndvi - 0.2) / (0.8 - 0.2)) * 100
-        st.markdown(f"""
+        markdown(f"""
             <div class="metric-card">
                 <h3 style='color: #2c3e50; margin-bottom: 0.5rem;'>Health Level</h3>
                 <p style='color: #2c3e50; font-size: 1.2rem; font-weight: bold; margin: 0;'>{ndvi_percentage:.1f}%</p>
@@ -789,7 +1208,7 @@ with col_a:
         """, unsafe_allow_html=True)
     
     # VCI metric
-    st.markdown(f"""
+    markdown(f"""
         <div class="metric-card">
             <div style='display: flex; align-items: center; justify-content: space-between;'>
                 <div>
@@ -803,127 +1222,126 @@ with col_a:
     """, unsafe_allow_html=True)
 
 with col_b:
-    st.markdown("### ⛈️ Precipitation Analysis")
+    markdown("### ⛈️ Precipitation Analysis")
     
     # Precipitation chart
-    precip_data = pd.DataFrame({
-        'Period': ['Current Month', '3-Month', '6-Month'],
-        'Precipitation (mm)': [precip_current, precip_3month, precip_6month],
-        'Color': ['#3498db', '#2980b9', '#21618c']
-    })
-    
-    fig_precip = go.Figure(data=[
-        go.Bar(
-            x=precip_data['Period'],
-            y=precip_data['Precipitation (mm)'],
-            marker_color=precip_data['Color'],
-            text=precip_data['Precipitation (mm)'],
-            texttemplate='%{text:.0f} mm',
-            textposition='outside',
-            textfont=dict(size=14, color='black', family='Arial Black'),
-            marker_line_color='rgba(0,0,0,0.3)',
-            marker_line_width=1.5
-        )
-    ])
-    
-    max_precip = max(precip_current, precip_3month, precip_6month)
-    y_range_max = max_precip * 1.15
-    
-    fig_precip.update_layout(
-        height=350,
-        margin=dict(l=20, r=20, t=40, b=20),
-        yaxis_title="Precipitation (mm)",
-        yaxis=dict(
-            title_font=dict(size=16), 
-            tickfont=dict(size=12), 
-            gridcolor='rgba(0,0,0,0.1)',
-            range=[0, y_range_max]
-        ),
-        xaxis=dict(tickfont=dict(size=12)),
-        showlegend=False,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
-    )
-    st.plotly_chart(fig_precip, use_container_width=True)
+    with telemetry.span('dashboard.figures'):
+        fig_precip = precipitation_figure(precip_current, precip_3month, precip_6month)
+    plotly_chart(fig_precip, use_container_width=True)
     
     # Risk assessment
-    risk_score = 0
-    
-    # VCI-based risk
-    if vci <= 15:
-        risk_score += 4
-    elif vci <= 30:
-        risk_score += 3
-    elif vci <= 45:
-        risk_score += 2
-    elif vci <= 60:
-        risk_score += 1
-    
-    # Precipitation-based risk
-    if precip_current < 10:
-        risk_score += 4
-    elif precip_current < 20:
-        risk_score += 3
-    elif precip_current < 35:
-        risk_score += 2
-    elif precip_current < 50:
-        risk_score += 1
-        
-    if precip_3month < 30:
-        risk_score += 4
-    elif precip_3month < 50:
-        risk_score += 3
-    elif precip_3month < 80:
-        risk_score += 2
-    elif precip_3month < 120:
-        risk_score += 1
-    
-    # NDVI-based risk
-    if ndvi < 0.35:
-        risk_score += 3
-    elif ndvi < 0.45:
-        risk_score += 2
-    elif ndvi < 0.55:
-        risk_score += 1
-    
-    # Determine risk level
-    if risk_score <= 3:
-        risk_level = "Low Risk"
-        risk_color = "#2ecc71"
-        risk_icon = "✅"
-    elif risk_score <= 6:
-        risk_level = "Medium Risk" 
-        risk_color = "#f39c12"
-        risk_icon = "🔴"
-    elif risk_score <= 9:
-        risk_level = "High Risk"
-        risk_color = "#e67e22"
-        risk_icon = "☀️"
-    else:
-        risk_level = "Severe Risk"
-        risk_color = "#e74c3c"
-        risk_icon = "🚨"
+    risk_score = engine.compute_risk_score(vci, precip_current, precip_3month, ndvi)
+    risk_level, risk_color, risk_icon = engine.classify_risk(risk_score)
     
-    st.markdown(f"""
+    markdown(f"""
         <div class="metric-card">
             <div style='display: flex; align-items: center; justify-content: space-between;'>
                 <div>
                     <p style='color: #7f8c8d; font-size: 14px; margin: 0;'>Overall Risk Assessment</p>
                     <h2 style='color: #2c3e50; margin: 5px 0;'>{risk_icon} {risk_level}</h2>
-                    <p style='color: {risk_color}; font-weight: bold; margin: 0;'>Risk Score: {risk_score}/15</p>
+                    <p style='color: {risk_color}; font-weight: bold; margin: 0;'>Risk Score: {risk_score}/{engine.MAX_RISK_SCORE}</p>
                 </div>
                 <div style='font-size: 3rem;'>{risk_icon}</div>
             </div>
         </div>
     """, unsafe_allow_html=True)
 
+# Regional Overview - precomputed for every stored region and month, only looked up here
+markdown('<div class="section-header">🗺️ Regional Overview</div>', unsafe_allow_html=True)
+
+version = store_version()
+if version is None:
+    st.info("No regional data store found. Run `python -m mekong_drought.build` to enable this view.")
+else:
+    with telemetry.span('dashboard.regions'):
+        regions = load_regions(model, loaded_model.checksum, version)
+    region_index = regions['index']
+    region_names = {name.replace('_', ' ').title(): name for name in region_index.regions}
+    region_months = {month_label(month): month for month in region_index.available_months()[::-1].tolist()}
+
+    col_reg1, col_reg2 = st.columns(2)
+    with col_reg1:
+        region = region_names[st.selectbox("Region", list(region_names), key='region')]
+    with col_reg2:
+        region_month = region_months[st.selectbox("Month", list(region_months), key='region_month')]
+
+    col_reg3, col_reg4 = st.columns([3, 2])
+    with col_reg3:
+        history_years = region_timeline(regions, region).months // 12
+        if len(history_years) == 0:
+            st.info("No history stored for this region.")
+        else:
+            first_year, last_year = int(history_years[0]), int(history_years[-1])
+            if first_year < last_year:
+                first_year, last_year = st.slider("History", first_year, last_year, (first_year, last_year),
+                                                  key='history_years')
+            plotly_chart(region_history_figure(regions, region, first_year, last_year), use_container_width=True)
+            range_summary, dry_seasons = range_statistics(regions, region, first_year, last_year)
+            st.markdown(range_summary)
+            with st.expander("🌵 Dry seasons (Dec–Apr) in range", expanded=False):
+                st.dataframe(dry_seasons, use_container_width=True,
+                             column_config={'Rainfall (mm)': st.column_config.NumberColumn(format='%.0f'),
+                                            'Mean VCI': st.column_config.NumberColumn(format='%.1f')})
+    with col_reg4:
+        st.markdown(f"**All regions, {month_label(region_month)}** (most severe first)")
+        st.dataframe(region_month_table(regions, region_month),
+                     hide_index=True, use_container_width=True,
+                     column_config={'confidence': st.column_config.NumberColumn(format='%.2f')})
+
+    # Thousands of sampled rainfall / NDVI trajectories, all months scored in one batched call
+    with st.expander(f"🎲 Probabilistic outlook after {month_label(region_month)}", expanded=False):
+        n_scenarios = st.select_slider("Scenarios", options=[1_000, 5_000, 10_000], value=10_000)
+        run_outlook = st.checkbox("Simulate the next 3 months", value=False,
+                                  help="Samples rainfall and NDVI paths from this region's own history")
+        if run_outlook:
+            try:
+                with telemetry.span('dashboard.outlook'):
+                    outlook_table, outlook_figures = region_outlook(regions, model, region, region_month, n_scenarios)
+            except ValueError as error:
+                st.warning(f"Cannot simulate from this month: {error}")
+            else:
+                col_mc1, col_mc2 = st.columns(2)
+                with col_mc1:
+                    plotly_chart(outlook_figures[0], use_container_width=True)
+                with col_mc2:
+                    plotly_chart(outlook_figures[1], use_container_width=True)
+                st.dataframe(outlook_table, use_container_width=True,
+                             column_config={name: st.column_config.NumberColumn(format='%.2f')
+                                            for name in outlook_table.columns})
+
+# Drought Map - tile pyramids are built offline from gridded predictions; switching months
+# or layers only looks tiles (and the composed map) up in the shared LRU cache
+markdown('<div class="section-header">🛰️ Drought Map</div>', unsafe_allow_html=True)
+
+map_months = {month_label(month): month for month in tile_store.months()[::-1]}
+if not map_months:
+    st.info("No map tiles found. Score a month's grids with `python -m mekong_drought.raster`, then run "
+            "`python -m mekong_drought.tiles build` to enable this view.")
+else:
+    col_map1, col_map2 = st.columns([4, 1])
+    with col_map2:
+        map_month = map_months[st.selectbox("Map month", list(map_months), key='map_month')]
+        map_layer = MAP_LAYERS[st.radio("Layer", list(MAP_LAYERS), key='map_layer')]
+        if map_layer == 'class':
+            markdown(''.join(
+                f"<div><span style='color: {color}; font-size: 18px;'>■</span> {category}</div>"
+                for category, color in zip(DROUGHT_CATEGORIES, DROUGHT_COLORS)
+            ), unsafe_allow_html=True)
+        else:
+            st.caption("Light = low confidence, dark blue = high. Zoomed out, each pixel shows its area's "
+                       "worst class and mean confidence.")
+    with col_map1:
+        with telemetry.span('dashboard.map'):
+            map_html = drought_map_html(tile_store, map_month, map_layer)
+        st.components.v1.html(map_html, height=MAP_HEIGHT)
+
 # System Information
-st.markdown('<div class="section-header">ℹ️ System Overview</div>', unsafe_allow_html=True)
+markdown('<div class="section-header">ℹ️ System Overview</div>', unsafe_allow_html=True)
 
 col_sys1, col_sys2, col_sys3 = st.columns(3)
 
 with col_sys1:
-    st.markdown("""
+    markdown("""
         <div class="metric-card">
             <h3 style='color: #2c3e50; margin-bottom: 1rem;'>💾 Classification System</h3>
             <p style='color: #5d6d7e; margin: 0.5rem 0;'>• 5-Level Drought Classification</p>
@@ -934,7 +1352,7 @@ with col_sys1:
     """, unsafe_allow_html=True)
 
 with col_sys2:
-    st.markdown("""
+    markdown("""
         <div class="metric-card">
             <h3 style='color: #2c3e50; margin-bottom: 1rem;'>🎯 Monitoring Features</h3>
             <p style='color: #5d6d7e; margin: 0.5rem 0;'>• NDVI & VCI Vegetation Indices</p>
@@ -945,7 +1363,7 @@ with col_sys2:
     """, unsafe_allow_html=True)
 
 with col_sys3:
-    st.markdown("""
+    markdown("""
         <div class="metric-card">
             <h3 style='color: #2c3e50; margin-bottom: 1rem;'>🛠️ Technology Stack</h3>
             <p style='color: #5d6d7e; margin: 0.5rem 0;'>• Streamlit Web Framework</p>
@@ -955,8 +1373,15 @@ with col_sys3:
         </div>
     """, unsafe_allow_html=True)
 
+# Prediction cache counters (shared across all sessions)
+cache_stats = prediction_cache.stats()
+st.caption(
+    f"⚡ Prediction cache: {cache_stats['hits']:,} hits · {cache_stats['misses']:,} misses · "
+    f"{cache_stats['evictions']:,} evictions · {cache_stats['hit_rate']:.0%} hit rate"
+)
+
 # Footer
-st.markdown("""
+markdown("""
     <div class="footer">
         <h4 style='color: #2c3e50; margin-bottom: 1rem;'>Agricultural Drought Early Warning System - Mekong Delta</h4>
         <p style='color: #5d6d7e; margin: 0.5rem 0; font-size: 14px;'>
@@ -966,4 +1391,6 @@ st.markdown("""
             Data Sources: Google Earth Engine (MODIS, CHIRPS, ERA5) | Region: Mekong Delta, Vietnam | November 2024
         </p>
     </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+rerun_trace.finish(prediction=prediction)
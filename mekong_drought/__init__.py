@@ -0,0 +1,5 @@
+"""
+Agricultural Drought Early Warning System - Mekong Delta
+
+Scoring tools shared by the Streamlit dashboard and the command-line utilities.
+"""
@@ -0,0 +1,220 @@
+"""
+Headless batch scoring of feature tables.
+
+Streams a CSV or Parquet file of feature rows through the drought model in
+fixed-size chunks, so memory stays bounded no matter how large the input is.
+Each chunk is scored with a single ``predict_proba`` call and the class is
+taken as the argmax of the probabilities instead of a second model pass.
+With ``--explain`` each row also gets the per-feature contributions for its
+predicted class (``compiled.CompiledEnsemble.predict_contributions``); they sum
+to the model's raw score for the class (the probability for forests, the margin
+for boosted models).
+
+Usage:
+    python -m mekong_drought.batch data/drought_dataset_processed.csv predictions.csv
+    python -m mekong_drought.batch extract.parquet scored.parquet --chunk-size 500000
+    python -m mekong_drought.batch data/drought_dataset_processed.csv explained.csv --explain
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .engine import DROUGHT_CATEGORIES, FEATURE_COLUMNS, compile_model, predict_proba, resolve_model_path
+from .model_store import load_model_file
+
+PROBA_COLUMNS = ['proba_' + category.lower().replace(' ', '_') for category in DROUGHT_CATEGORIES]
+CONTRIBUTION_COLUMNS = ['contrib_' + name for name in FEATURE_COLUMNS] + ['contrib_bias']
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def _file_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    if extension in ('.csv', '.txt', ''):
+        return 'csv'
+    raise ValueError(f"Unsupported file type '{extension}', expected .csv or .parquet")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet support requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def iter_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, columns=None):
+    """
+    Yield DataFrames of at most ``chunk_size`` rows from a CSV or Parquet file
+    """
+    if _file_format(path) == 'parquet':
+        pa = _require_pyarrow()
+        parquet_file = pa.parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns)
+
+
+def score_frame(model, frame, explain=False):
+    """
+    Score a DataFrame of feature rows with one ``predict_proba`` call.
+
+    Rows with any missing feature are not sent to the model; their outputs are
+    left empty (class -1, NaN confidence and probabilities). ``explain`` adds
+    ``CONTRIBUTION_COLUMNS`` for the predicted class; they sum to the model's raw
+    score for the class (the probability for forests, the margin for boosted models).
+    Returns a DataFrame of predictions aligned to ``frame``.
+    """
+    missing = [column for column in FEATURE_COLUMNS if column not in frame.columns]
+    if missing:
+        raise KeyError(f"Input is missing feature columns: {', '.join(missing)}")
+
+    features = frame[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    complete = ~np.isnan(features).any(axis=1)
+
+    n_rows = len(frame)
+    proba = np.full((n_rows, len(DROUGHT_CATEGORIES)), np.nan)
+    predicted_class = np.full(n_rows, -1, dtype=np.int64)
+
+    if explain:
+        if not hasattr(model, 'predict_contributions'):
+            raise ValueError("Explanations need a compiled tree model")
+        contributions = np.full((n_rows, len(CONTRIBUTION_COLUMNS)), np.nan)
+
+    if complete.any():
+        if explain:
+            # Contributions sum to the model output, so one tree pass gives both
+            chunk_contributions = model.predict_contributions(features[complete])
+            chunk_proba = model.proba_from_contributions(chunk_contributions)
+            best = chunk_proba.argmax(axis=1)
+            contributions[complete] = chunk_contributions[np.arange(len(best)), best]
+        else:
+            chunk_proba = predict_proba(model, features[complete])
+        proba[complete] = chunk_proba
+        predicted_class[complete] = np.asarray(model.classes_)[chunk_proba.argmax(axis=1)]
+
+    categories = np.array(DROUGHT_CATEGORIES + [''], dtype=object)
+    result = pd.DataFrame(proba, columns=PROBA_COLUMNS, index=frame.index)
+    result.insert(0, 'predicted_class', predicted_class)
+    result.insert(1, 'predicted_category', categories[predicted_class])
+    result.insert(2, 'confidence', proba.max(axis=1))
+    if explain:
+        result[CONTRIBUTION_COLUMNS] = contributions
+    return result
+
+
+class _ChunkWriter:
+    """
+    Appends scored chunks to a CSV or Parquet file without holding them in memory
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = _file_format(path)
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, frame):
+        if self.format == 'parquet':
+            pa = _require_pyarrow()
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pa.parquet.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='a' if self._wrote_header else 'w',
+                         header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def score_file(input_path, output_path, model=None, chunk_size=DEFAULT_CHUNK_SIZE,
+               keep_columns=None, log=None, explain=False):
+    """
+    Score every row of ``input_path`` and write the results to ``output_path``.
+
+    ``keep_columns`` selects the input columns copied to the output next to the
+    predictions (all columns by default, an empty list for predictions only).
+    ``explain`` adds per-feature contributions (see ``score_frame``).
+    Returns a dict with row counts, elapsed seconds and rows per second.
+    """
+    if model is None:
+        model = compile_model(load_model_file(resolve_model_path()).model)
+
+    columns = None
+    if keep_columns is not None:
+        columns = list(dict.fromkeys(list(keep_columns) + FEATURE_COLUMNS))
+
+    writer = _ChunkWriter(output_path)
+    n_rows = 0
+    n_scored = 0
+    start = time.perf_counter()
+    try:
+        for chunk in iter_chunks(input_path, chunk_size, columns):
+            predictions = score_frame(model, chunk, explain)
+            passthrough = chunk if keep_columns is None else chunk[list(keep_columns)]
+            writer.write(pd.concat([passthrough, predictions], axis=1))
+
+            n_rows += len(chunk)
+            n_scored += int((predictions['predicted_class'] >= 0).sum())
+            if log is not None:
+                elapsed = time.perf_counter() - start
+                log(f"{n_rows:,} rows scored ({n_rows / elapsed:,.0f} rows/sec)")
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': n_rows,
+        'scored': n_scored,
+        'skipped': n_rows - n_scored,
+        'seconds': elapsed,
+        'rows_per_sec': n_rows / elapsed if elapsed > 0 else float('inf'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-score a CSV/Parquet table of drought features")
+    parser.add_argument('input', help="CSV or Parquet file with the 11 model feature columns")
+    parser.add_argument('output', help="Destination .csv or .parquet file")
+    parser.add_argument('--model', default=None,
+                        help="Model file, pickle or native format (default: native export if present)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Rows scored per model call (bounds memory use)")
+    parser.add_argument('--keep-columns', nargs='*', default=None,
+                        help="Input columns copied to the output (default: all; no names: predictions only)")
+    parser.add_argument('--explain', action='store_true',
+                        help="Add per-feature contributions to the predicted class's raw score "
+                             "(the probability for forests, the margin for boosted models)")
+    parser.add_argument('--quiet', action='store_true', help="Only print the final summary")
+    args = parser.parse_args(argv)
+
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size must be positive")
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    model = compile_model(load_model_file(args.model or resolve_model_path()).model)
+    stats = score_file(args.input, args.output, model=model, chunk_size=args.chunk_size,
+                       keep_columns=args.keep_columns, log=None if args.quiet else log, explain=args.explain)
+    log(f"✅ Scored {stats['scored']:,} of {stats['rows']:,} rows "
+        f"({stats['skipped']:,} skipped for missing features) in {stats['seconds']:.2f}s "
+        f"- {stats['rows_per_sec']:,.0f} rows/sec")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
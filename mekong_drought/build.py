@@ -0,0 +1,80 @@
+"""
+Build the generated data and model files that are not kept in git.
+
+Everything here is derived from ``data/drought_dataset_processed.csv`` and
+``models/XGBoost_drought_model.pkl``: the column store, the native and
+compact model exports (with their ``.sha256`` sidecars), the precomputed
+regional forecasts, the climatology baselines and the transition counts.
+Each step runs through its module's own command and is skipped when its
+output is already there; delete a file to rebuild it. Forecasts are also
+rebuilt when they no longer match the store or the model.
+
+Without these files the package still works: models load from the pickle,
+and baselines, transitions and forecasts are computed on first use. Only
+the dashboard's Regional Overview needs the store.
+
+Usage:
+    python -m mekong_drought.build
+    python -m mekong_drought.build --dry-run
+"""
+
+import argparse
+import os
+import sys
+from collections import namedtuple
+
+from . import climatology, compact, model_store, regions, store, transitions
+from .engine import COMPACT_MODEL_PATH, DATASET_PATH, MODEL_PATH, NATIVE_MODEL_PATH
+
+Step = namedtuple('Step', ['name', 'output', 'is_built', 'run'])
+
+
+def _forecasts_current():
+    path = os.path.join(store.STORE_PATH, regions.FORECASTS_FILE)
+    if not os.path.exists(path):
+        return False
+    checksum = model_store.file_checksum(regions.resolve_model_path())
+    try:
+        return regions.RegionForecasts.load(path).is_current(store.ColumnStore.open(), checksum)
+    except (FileNotFoundError, ValueError, KeyError):
+        return False
+
+
+STEPS = (
+    Step('column store', store.STORE_PATH,
+         lambda: os.path.exists(os.path.join(store.STORE_PATH, store.MANIFEST_FILE)),
+         lambda: store.main(['import', DATASET_PATH, store.STORE_PATH])),
+    Step('native model', NATIVE_MODEL_PATH, lambda: os.path.exists(NATIVE_MODEL_PATH),
+         lambda: model_store.main(['export', MODEL_PATH, NATIVE_MODEL_PATH])),
+    Step('compact model', COMPACT_MODEL_PATH, lambda: os.path.exists(COMPACT_MODEL_PATH),
+         lambda: compact.main([NATIVE_MODEL_PATH, COMPACT_MODEL_PATH])),
+    Step('regional forecasts', os.path.join(store.STORE_PATH, regions.FORECASTS_FILE), _forecasts_current,
+         lambda: regions.main(['precompute'])),
+    Step('climatology', climatology.CLIMATOLOGY_PATH, lambda: os.path.exists(climatology.CLIMATOLOGY_PATH),
+         lambda: climatology.main(['build', DATASET_PATH, climatology.CLIMATOLOGY_PATH])),
+    Step('transitions', transitions.TRANSITIONS_PATH, lambda: os.path.exists(transitions.TRANSITIONS_PATH),
+         lambda: transitions.main(['fit', transitions.TRANSITIONS_PATH])),
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the generated data and model files")
+    parser.add_argument('--dry-run', action='store_true', help="Only list the steps that would run")
+    args = parser.parse_args(argv)
+
+    for step in STEPS:
+        if step.is_built():
+            print(f"  {step.name:<20}up to date ({os.path.relpath(step.output)})")
+            continue
+        if args.dry_run:
+            print(f"  {step.name:<20}would build {os.path.relpath(step.output)}")
+            continue
+        print(f"🔨 Building {step.name}")
+        if step.run() != 0:
+            print(f"❌ Failed to build {step.name}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Prediction memoization.
+
+Dashboard sliders move on fixed steps, so sessions keep revisiting the same
+input vectors. ``PredictionCache`` is a bounded, thread-safe LRU cache of
+class probabilities keyed on the model's checksum plus the 11-feature vector
+quantized to float32 - the resolution the tree models compare at, so two
+inputs with the same key always get the same prediction. ``LRUCache`` bounds
+other memoized results shared across sessions (tables, figures, outlooks).
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAXSIZE = 4096
+
+
+def quantize_features(features):
+    """
+    Hashable cache key for one feature vector (its float32 bytes)
+    """
+    return np.asarray(features, dtype=np.float32).reshape(-1).tobytes()
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of prediction probabilities.
+
+    Entries are keyed on ``(model_key, quantized features)``, so results from
+    a previous model are never served after a reload; call ``clear`` from
+    the reload hook to release them right away. Cached arrays are read-only.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, model_key, features):
+        key = (model_key, quantize_features(features))
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, model_key, features, value):
+        key = (model_key, quantize_features(features))
+        value = np.array(value)
+        value.setflags(write=False)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, model_key, features, compute):
+        """
+        Cached value for ``features``, or ``compute()`` stored and returned.
+
+        ``compute`` runs outside the lock so concurrent misses do not block each other.
+        """
+        value = self.get(model_key, features)
+        if value is None:
+            value = self.put(model_key, features, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe LRU cache of arbitrary values under hashable keys
+    """
+
+    def __init__(self, maxsize):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_load(self, key, load):
+        """
+        Cached value for ``key``, or ``load()`` stored and returned (outside the lock)
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = load()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
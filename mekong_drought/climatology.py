@@ -0,0 +1,251 @@
+"""
+Per-calendar-month climatology baselines.
+
+A ``Climatology`` keeps, for every calendar month and every location (a
+named region or a raster pixel), the count, mean, standard deviation,
+minimum and maximum of each tracked variable. New months are folded in with
+Welford's update, so nothing is ever recomputed from the full history, and
+VCI / precipitation anomaly become O(1) array lookups instead of numbers
+typed in by hand:
+
+* ``record_vci`` = (NDVI - record min) / (record max - record min) * 100,
+  with the extremes taken over every month of the record. This is the VCI
+  the model was trained on (see ``features.py``) and the one to feed it.
+* ``vci`` = (NDVI - month min) / (month max - month min) * 100, the standard
+  per-calendar-month Vegetation Condition Index. Monthly NDVI ranges are
+  narrow, so it saturates at 0 or 100 quickly; it is for display only and
+  is not the model's ``vci`` feature.
+* ``precip_anomaly`` = percent departure from the month's mean rainfall,
+  the convention used in ``drought_dataset_processed.csv``
+
+Baselines are saved as a small uncompressed ``.npz`` (no pickled objects).
+
+Usage:
+    python -m mekong_drought.climatology build data/drought_dataset_processed.csv data/climatology.npz
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .engine import BASE_DIR, DATASET_PATH
+
+CLIMATOLOGY_PATH = os.path.join(BASE_DIR, 'data', 'climatology.npz')
+
+FORMAT_VERSION = 1
+
+VARIABLES = ('ndvi', 'precipitation_mm')
+DEFAULT_LOCATION = 'mekong_delta'
+
+MonthlyStats = namedtuple('MonthlyStats', ['count', 'mean', 'std', 'min', 'max'])
+
+
+class Climatology:
+    """
+    Running per-month statistics for ``variables`` at ``locations``.
+
+    Every statistic is an array of shape (12, n_locations), so a lookup for
+    one month is a row slice and a whole raster is scored at once.
+    """
+
+    def __init__(self, locations=(DEFAULT_LOCATION,), variables=VARIABLES):
+        self.locations = [str(location) for location in locations]
+        self.variables = tuple(variables)
+        self._location_index = {location: i for i, location in enumerate(self.locations)}
+        shape = (12, len(self.locations))
+        self._stats = {
+            variable: {
+                'count': np.zeros(shape, dtype=np.int64),
+                'mean': np.zeros(shape),
+                'm2': np.zeros(shape),
+                'min': np.full(shape, np.inf),
+                'max': np.full(shape, -np.inf),
+            }
+            for variable in self.variables
+        }
+
+    @classmethod
+    def for_pixels(cls, n_pixels, variables=VARIABLES):
+        """
+        Climatology for a flattened raster; locations are pixel indices
+        """
+        return cls(range(n_pixels), variables)
+
+    @property
+    def n_locations(self):
+        return len(self.locations)
+
+    def _locations(self, location):
+        if location is None:
+            return slice(None)
+        if isinstance(location, str):
+            return self._location_index[location]
+        if isinstance(location, (list, tuple, np.ndarray, pd.Series)) and len(location) \
+                and isinstance(np.asarray(location).flat[0], str):
+            return np.array([self._location_index[name] for name in location])
+        return location
+
+    @staticmethod
+    def _months(month):
+        month = np.asarray(month, dtype=np.int64)
+        if np.any((month < 1) | (month > 12)):
+            raise ValueError("month must be between 1 and 12")
+        return month - 1
+
+    def update(self, month, values, location=None):
+        """
+        Fold one month of observations into the baselines.
+
+        ``values`` maps variable names to a scalar (with ``location``) or an
+        array with one value per location; NaN values (nodata) are skipped.
+        """
+        row = int(self._months(month))
+        where = self._locations(location)
+        for variable, observed in values.items():
+            stats = self._stats[variable]
+            observed = np.asarray(observed, dtype=np.float64)
+            count = stats['count'][row, where]
+            mean = stats['mean'][row, where]
+            valid = ~np.isnan(observed)
+            new_count = count + valid
+            delta = np.where(valid, observed - mean, 0.0)
+            new_mean = mean + np.divide(delta, new_count, out=np.zeros_like(delta), where=new_count > 0)
+            stats['m2'][row, where] += delta * np.where(valid, observed - new_mean, 0.0)
+            stats['count'][row, where] = new_count
+            stats['mean'][row, where] = new_mean
+            stats['min'][row, where] = np.fmin(stats['min'][row, where], observed)
+            stats['max'][row, where] = np.fmax(stats['max'][row, where], observed)
+
+    @classmethod
+    def from_frame(cls, frame, location_column=None, variables=VARIABLES):
+        """
+        Baselines from a table of monthly observations (one vectorized pass).
+
+        Without ``location_column`` all rows belong to ``DEFAULT_LOCATION``.
+        """
+        if location_column is None:
+            location = pd.Series(DEFAULT_LOCATION, index=frame.index)
+        else:
+            location = frame[location_column].astype(str)
+        climatology = cls(pd.unique(location), variables)
+        months = frame['month'].astype(int).to_numpy() - 1
+        columns = location.map(climatology._location_index).to_numpy()
+
+        for variable in climatology.variables:
+            grouped = frame[variable].groupby([months, columns])
+            summary = grouped.agg(['count', 'mean', 'min', 'max'])
+            summary['m2'] = grouped.var(ddof=0).fillna(0.0) * summary['count']
+            rows = summary.index.get_level_values(0)
+            cols = summary.index.get_level_values(1)
+            stats = climatology._stats[variable]
+            for name in ('count', 'mean', 'm2', 'min', 'max'):
+                stats[name][rows, cols] = summary[name].to_numpy()
+        return climatology
+
+    def stats(self, variable, month, location=None):
+        """
+        ``MonthlyStats`` for a month (or array of months) at ``location``
+        """
+        stats = self._stats[variable]
+        index = (self._months(month), self._locations(location))
+        count = stats['count'][index]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(stats['m2'][index] / count)
+        return MonthlyStats(count, stats['mean'][index], std, stats['min'][index], stats['max'][index])
+
+    def record_vci(self, ndvi, location=None):
+        """
+        VCI (0-100) against the whole record's NDVI range, ``ndvi`` included; the model's ``vci`` feature
+        """
+        stats = self._stats['ndvi']
+        where = self._locations(location)
+        ndvi = np.asarray(ndvi, dtype=np.float64)
+        low = np.fmin(stats['min'][:, where].min(axis=0), ndvi)
+        high = np.fmax(stats['max'][:, where].max(axis=0), ndvi)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            vci = (ndvi - low) / (high - low) * 100
+        return np.where(high > low, vci, np.nan)
+
+    def vci(self, month, ndvi, location=None):
+        """
+        Vegetation Condition Index (0-100) against the month's NDVI range; for display, see ``record_vci``
+        """
+        stats = self._stats['ndvi']
+        index = (self._months(month), self._locations(location))
+        low, high = stats['min'][index], stats['max'][index]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            vci = (np.asarray(ndvi, dtype=np.float64) - low) / (high - low) * 100
+        return np.where(high > low, np.clip(vci, 0.0, 100.0), np.nan)
+
+    def precip_anomaly(self, month, precipitation_mm, location=None):
+        """
+        Percent departure of rainfall from the month's long-term mean
+        """
+        mean = self._stats['precipitation_mm']['mean'][self._months(month), self._locations(location)]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            anomaly = (np.asarray(precipitation_mm, dtype=np.float64) - mean) / mean * 100
+        return np.where(mean != 0, anomaly, np.nan)
+
+    def observe(self, month, ndvi, precipitation_mm, location=None):
+        """
+        Add a new month and return its model features ``(vci, precip_anomaly)``.
+
+        The month is part of its own baseline, as in the processed dataset.
+        ``vci`` is ``record_vci``, the record-range VCI the model was trained on.
+        Like ``features.FeaturePipeline``'s, it is provisional until the
+        calendar year is complete, since a later month may widen the range.
+        """
+        self.update(month, {'ndvi': ndvi, 'precipitation_mm': precipitation_mm}, location)
+        return self.record_vci(ndvi, location), self.precip_anomaly(month, precipitation_mm, location)
+
+    def save(self, path):
+        """
+        Write the baselines to an uncompressed ``.npz`` file (no pickled objects)
+        """
+        metadata = {'format_version': FORMAT_VERSION, 'locations': self.locations, 'variables': list(self.variables)}
+        arrays = {
+            f'{variable}__{name}': values
+            for variable, stats in self._stats.items()
+            for name, values in stats.items()
+        }
+        with open(path, 'wb') as f:
+            np.savez(f, metadata=np.array(json.dumps(metadata)), **arrays)
+
+    @classmethod
+    def load(cls, path=CLIMATOLOGY_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data['metadata']))
+            if metadata.get('format_version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported climatology format version: {metadata.get('format_version')}")
+            climatology = cls(metadata['locations'], metadata['variables'])
+            for variable, stats in climatology._stats.items():
+                for name in stats:
+                    stats[name] = data[f'{variable}__{name}']
+        return climatology
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build per-month climatology baselines")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Compute baselines from a monthly dataset")
+    build_parser.add_argument('input', nargs='?', default=DATASET_PATH)
+    build_parser.add_argument('output', nargs='?', default=CLIMATOLOGY_PATH)
+    build_parser.add_argument('--location-column', help="Column naming the region of each row")
+
+    args = parser.parse_args(argv)
+
+    climatology = Climatology.from_frame(pd.read_csv(args.input), args.location_column)
+    climatology.save(args.output)
+    print(f"✅ Wrote baselines for {climatology.n_locations} location(s) to {args.output} "
+          f"({os.path.getsize(args.output):,} bytes)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+Compact model export: float32 arrays, small integer indices, optional tree pruning.
+
+Writes the compiled ensemble (see ``compiled``) as a ``.npz`` that loads
+straight into a ``CompiledEnsemble`` without rebuilding it from a forest
+or booster. ``prune`` can also drop trees whose removal changes no
+prediction on a reference set by more than a tolerance.
+
+Pruning is greedy backward elimination. Trees are tried in order of how
+little their removal alone moves the ensemble, and a tree is dropped if the
+pruned ensemble still gives every reference row the same class, with
+probabilities within ``tolerance`` of the original. A forest's remaining
+trees are re-weighted so they still average to probabilities.
+
+``report`` compares the original and the compact file. It covers file size,
+load time and memory held by the loaded, ready-to-predict model, plus
+accuracy against the labels in ``drought_dataset_processed.csv``.
+
+Usage:
+    python -m mekong_drought.compact models/drought_model.npz models/drought_model_compact.npz
+    python -m mekong_drought.compact models/drought_model.npz models/pruned.npz --prune-tolerance 0.02
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .compiled import CompiledEnsemble
+from .engine import DATASET_PATH, FEATURE_COLUMNS
+
+LOAD_REPEAT = 5
+
+ArtifactStats = namedtuple('ArtifactStats', ['path', 'file_bytes', 'load_seconds', 'model_bytes', 'peak_bytes'])
+ArtifactStats.__doc__ = """
+One model file: size on disk, best-of load time to a ready-to-predict model,
+bytes still allocated for that model after loading, and peak bytes during it.
+"""
+
+Accuracy = namedtuple('Accuracy', ['rows', 'accuracy', 'reference_accuracy', 'agreement', 'max_proba_delta'])
+
+
+def tree_of_node(model):
+    """
+    Tree owning each node, identified by its root's node id (as in ``model.roots``)
+    """
+    tree = np.empty(model.n_nodes, dtype=np.intp)
+    tree[:model.n_trees] = np.arange(model.n_trees)
+    starts = model._level_starts
+    for lo, hi in zip(starts[:-1], starts[1:]):
+        nodes = np.arange(lo, hi)
+        nodes = nodes[model.threshold[nodes] != np.inf]
+        children = model.child[nodes].astype(np.intp)
+        tree[children] = tree[nodes]
+        tree[children + 1] = tree[nodes]
+    return tree
+
+
+def select_trees(model, trees):
+    """
+    A new ``CompiledEnsemble`` with only ``trees`` (root node ids) of ``model``.
+
+    A forest's leaf values are re-weighted so the kept trees still average
+    to probabilities; boosted margins are kept as they are.
+    """
+    trees = np.unique(np.asarray(trees, dtype=np.intp))
+    if len(trees) == 0:
+        raise ValueError("Cannot build an ensemble with no trees")
+    kept = np.flatnonzero(np.isin(tree_of_node(model), trees))
+    remap = np.full(model.n_nodes, -1, dtype=np.intp)
+    remap[kept] = np.arange(len(kept))
+
+    leaf = model.threshold[kept] == np.inf
+    child = model.child[kept].astype(np.intp)
+    scale = model.n_trees / len(trees) if model.transform == 'identity' else 1.0
+    node_value = None if model.node_value is None else model.node_value[kept] * scale
+    return CompiledEnsemble(
+        feature=model.feature[kept], threshold=model.threshold[kept],
+        left=np.where(leaf, -1, remap[child]),
+        right=np.where(leaf, -1, remap[np.minimum(child + 1, model.n_nodes - 1)]),
+        missing_left=~model.missing_right[kept], value=model.value[kept] * scale, roots=remap[trees],
+        classes=model.classes_, feature_names=model.feature_names_in_, base_score=model.base_score,
+        transform=model.transform, node_value=node_value,
+    )
+
+
+def prune(model, X, tolerance):
+    """
+    Drop trees while predictions on ``X`` stay within ``tolerance`` of the full model.
+
+    Returns ``(pruned model, kept root ids)``; the model is returned as is
+    when no tree can go.
+    """
+    per_tree = np.stack([column.take(model.apply(X)) for column in model._value_columns], axis=2)
+    full = per_tree.sum(axis=1) + model.base_score
+    reference = model._transform(full.copy())
+    reference_class = reference.argmax(axis=1)
+    forest = model.transform == 'identity'
+
+    def deviation(total, n_kept):
+        output = total * (model.n_trees / n_kept) if forest else total
+        proba = model._transform(output + model.base_score)
+        if (proba.argmax(axis=1) != reference_class).any():
+            return np.inf
+        return np.abs(proba - reference).max()
+
+    total = full - model.base_score
+    alone = [deviation(total - per_tree[:, t], model.n_trees - 1) for t in range(model.n_trees)]
+    kept = np.ones(model.n_trees, dtype=bool)
+    for t in np.argsort(alone, kind='stable'):
+        if kept.sum() == 1:
+            break
+        candidate = total - per_tree[:, t]
+        if deviation(candidate, kept.sum() - 1) <= tolerance:
+            total = candidate
+            kept[t] = False
+
+    if kept.all():
+        return model, np.sort(model.roots.astype(np.intp))
+    trees = model.roots[kept].astype(np.intp)
+    return select_trees(model, trees), np.sort(trees)
+
+
+def labelled_rows(path=DATASET_PATH):
+    """
+    ``(features, labels)`` of the dataset rows with every feature present
+    """
+    frame = pd.read_csv(path).dropna(subset=FEATURE_COLUMNS + ['drought_label'])
+    return frame[FEATURE_COLUMNS].to_numpy(), frame['drought_label'].to_numpy()
+
+
+def load_ready(path):
+    """
+    Load a model file the way ``engine.load_model`` does: native or pickled, then compiled
+    """
+    from .engine import compile_model
+    from .model_store import load_model_file
+
+    return compile_model(load_model_file(path, verify=False).model)
+
+
+def artifact_stats(path, repeat=LOAD_REPEAT):
+    """
+    Size, load time and memory of one model file
+    """
+    best = np.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        load_ready(path)
+        best = min(best, time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        model = load_ready(path)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del model
+    return ArtifactStats(path, os.path.getsize(path), best, retained, peak)
+
+
+def accuracy(model, reference, X, labels):
+    """
+    Accuracy of ``model`` and ``reference`` on ``X``, and how closely the two agree
+    """
+    proba, reference_proba = model.predict_proba(X), reference.predict_proba(X)
+    predicted = model.classes_[proba.argmax(axis=1)]
+    reference_predicted = reference.classes_[reference_proba.argmax(axis=1)]
+    return Accuracy(
+        len(X), float((predicted == labels).mean()), float((reference_predicted == labels).mean()),
+        float((predicted == reference_predicted).mean()), float(np.abs(proba - reference_proba).max()),
+    )
+
+
+def report(source_path, compact_path, data_path=DATASET_PATH):
+    """
+    ``(source stats, compact stats, accuracy)`` of a compact export against its source
+    """
+    X, labels = labelled_rows(data_path)
+    return (artifact_stats(source_path), artifact_stats(compact_path),
+            accuracy(load_ready(compact_path), load_ready(source_path), X, labels))
+
+
+def _print_report(source, compact, scores):
+    print(f"  {'':<10}{'file':>10}{'load':>10}{'memory':>10}{'peak':>10}")
+    for label, stats in (('original', source), ('compact', compact)):
+        print(f"  {label:<10}{stats.file_bytes / 1024:>8.0f}KB{stats.load_seconds * 1000:>8.1f}ms"
+              f"{stats.model_bytes / 1024:>8.0f}KB{stats.peak_bytes / 1024:>8.0f}KB")
+    print(f"\n  accuracy on {scores.rows} labelled rows: {scores.accuracy:.1%} "
+          f"(original {scores.reference_accuracy:.1%}), agreement {scores.agreement:.1%}, "
+          f"max |Δ probability| {scores.max_proba_delta:.1e}")
+
+
+def main(argv=None):
+    from .model_store import export_native
+
+    parser = argparse.ArgumentParser(description="Export a compact, pre-compiled model file")
+    parser.add_argument('source', help="Model file, pickle or native format")
+    parser.add_argument('destination', help="Compact model file (.npz)")
+    parser.add_argument('--prune-tolerance', type=float, default=None,
+                        help="Drop trees while probabilities on the dataset move by at most this much")
+    parser.add_argument('--no-explain', action='store_true',
+                        help="Leave out internal node values (smaller file, no explanations)")
+    parser.add_argument('--data', default=DATASET_PATH, help="Labelled dataset for pruning and the report")
+    args = parser.parse_args(argv)
+
+    try:
+        model = load_ready(args.source)
+        if not isinstance(model, CompiledEnsemble):
+            raise ValueError(f"Cannot compact a model of type {type(model).__name__}")
+        if args.prune_tolerance is not None:
+            n_trees = model.n_trees
+            model, _ = prune(model, labelled_rows(args.data)[0], args.prune_tolerance)
+            print(f"✂️ Kept {model.n_trees} of {n_trees} trees (tolerance {args.prune_tolerance})")
+        if args.no_explain:
+            model.node_value = None
+        checksum = export_native(model, args.destination)
+        source, compact, scores = report(args.source, args.destination, args.data)
+    except (FileNotFoundError, ValueError) as error:
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+
+    print(f"✅ Exported {args.source} -> {args.destination} (sha256 {checksum})\n")
+    _print_report(source, compact, scores)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
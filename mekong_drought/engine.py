@@ -0,0 +1,283 @@
+"""
+Drought scoring engine.
+
+Model loading, feature assembly, prediction, short-term outlook and risk
+scoring, free of any Streamlit or Plotly imports so schedulers and workers can
+import it cheaply. The dashboard (``mekong-drought-ai.py``) is a thin client
+over these functions.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .telemetry import timed
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_DIR, 'models', 'XGBoost_drought_model.pkl')
+NATIVE_MODEL_PATH = os.path.join(BASE_DIR, 'models', 'drought_model.npz')
+COMPACT_MODEL_PATH = os.path.join(BASE_DIR, 'models', 'drought_model_compact.npz')
+SCALER_PATH = os.path.join(BASE_DIR, 'models', 'scaler.pkl')
+DATASET_PATH = os.path.join(BASE_DIR, 'data', 'drought_dataset_processed.csv')
+
+# Column order expected by the trained model
+FEATURE_COLUMNS = [
+    'ndvi', 'precipitation_mm', 'temp_mean_c', 'precip_3month', 'precip_6month',
+    'ndvi_3month_avg', 'precip_3month_avg', 'vci', 'precip_anomaly',
+    'precip_lag1', 'ndvi_lag1'
+]
+
+# 5-Level Drought Classification System - STANDARD TERMINOLOGY
+DROUGHT_CATEGORIES = ['No Drought', 'Mild Drought', 'Moderate Drought', 'Severe Drought', 'Extreme Drought']
+DROUGHT_COLORS = ['#2ecc71', '#f1c40f', '#e67e22', '#e74c3c', '#8b0000']
+DROUGHT_GRADIENTS = [
+    'linear-gradient(135deg, #2ecc71 0%, #27ae60 100%)',
+    'linear-gradient(135deg, #f1c40f 0%, #f39c12 100%)',
+    'linear-gradient(135deg, #e67e22 0%, #d35400 100%)',
+    'linear-gradient(135deg, #e74c3c 0%, #c0392b 100%)',
+    'linear-gradient(135deg, #8b0000 0%, #600000 100%)'
+]
+DROUGHT_DESCRIPTIONS = [
+    "🌿 Normal vegetation conditions with adequate rainfall patterns",
+    "💧 Minor vegetation stress with slightly below normal rainfall",
+    "⚠️ Moderate vegetation stress with significant rainfall deficit",
+    "🔥 Severe vegetation stress with prolonged rainfall deficit",
+    "🚨 Extreme vegetation stress with critical water shortage conditions"
+]
+
+DRY_SEASON = "Dry Season (Dec-Apr)"
+RAINY_SEASON = "Rainy Season (May-Nov)"
+
+# Risk levels as (highest score in level, label, color, icon)
+RISK_LEVELS = [
+    (3, "Low Risk", "#2ecc71", "✅"),
+    (6, "Medium Risk", "#f39c12", "🔴"),
+    (9, "High Risk", "#e67e22", "☀️"),
+    (15, "Severe Risk", "#e74c3c", "🚨"),
+]
+MAX_RISK_SCORE = 15
+
+
+def resolve_model_path():
+    """
+    Native model file if it has been exported, otherwise the legacy pickle
+    """
+    if os.path.exists(NATIVE_MODEL_PATH):
+        return NATIVE_MODEL_PATH
+    return MODEL_PATH
+
+
+def load_scaler(scaler_path=SCALER_PATH):
+    import joblib
+
+    if not os.path.exists(scaler_path):
+        raise FileNotFoundError(f"Model file not found: {scaler_path}")
+    return joblib.load(scaler_path)
+
+
+@timed('engine.load_model')
+def load_model(model_path=None, scaler_path=SCALER_PATH):
+    """
+    Load the trained classifier and feature scaler.
+
+    ``model_path`` may be a pickle or a native model file (see
+    ``model_store``); by default the native export is preferred.
+    Raises FileNotFoundError when either file is missing.
+    """
+    from .model_store import load_model_file
+
+    model = compile_model(load_model_file(model_path or resolve_model_path()).model)
+    scaler = load_scaler(scaler_path)
+    return model, scaler
+
+
+def compile_model(model):
+    """
+    Compile a tree model for fast NumPy inference (see ``compiled``).
+
+    Models that cannot be compiled are returned unchanged.
+    """
+    from .compiled import CompiledEnsemble
+
+    try:
+        return CompiledEnsemble.from_model(model)
+    except (TypeError, ValueError):
+        return model
+
+
+def derive_precip_3month_avg(precip_3month):
+    return precip_3month / 3
+
+
+def derive_precip_lag1(precip_current):
+    return precip_current * 0.9  # Simplified assumption; features.FeaturePipeline keeps the real lag
+
+
+# Features filled in from another input when not observed: name -> (source feature, rule)
+DERIVED_FEATURES = {
+    'precip_3month_avg': ('precip_3month', derive_precip_3month_avg),
+    'precip_lag1': ('precipitation_mm', derive_precip_lag1),
+}
+
+
+@timed('engine.build_input_data')
+def build_input_data(ndvi, precip_current, temp_mean, precip_3month, precip_6month,
+                     ndvi_3month_avg, vci, precip_anomaly, ndvi_lag1,
+                     precip_lag1=None, precip_3month_avg=None):
+    """
+    Assemble the one-row model input from dashboard-style parameters.
+
+    When not given, ``precip_3month_avg`` is derived as the 3-month total / 3
+    and ``precip_lag1`` as 90% of the current month's rainfall.
+    """
+    if precip_3month_avg is None:
+        precip_3month_avg = derive_precip_3month_avg(precip_3month)
+    if precip_lag1 is None:
+        precip_lag1 = derive_precip_lag1(precip_current)
+
+    return pd.DataFrame({
+        'ndvi': [ndvi],
+        'precipitation_mm': [precip_current],
+        'temp_mean_c': [temp_mean],
+        'precip_3month': [precip_3month],
+        'precip_6month': [precip_6month],
+        'ndvi_3month_avg': [ndvi_3month_avg],
+        'precip_3month_avg': [precip_3month_avg],
+        'vci': [vci],
+        'precip_anomaly': [precip_anomaly],
+        'precip_lag1': [precip_lag1],
+        'ndvi_lag1': [ndvi_lag1]
+    })
+
+
+@timed('engine.predict_proba')
+def predict_proba(model, input_data):
+    """
+    Class probabilities for every row of ``input_data`` (columns in FEATURE_COLUMNS order)
+    """
+    if isinstance(input_data, pd.DataFrame):
+        input_data = input_data[FEATURE_COLUMNS]
+    elif not hasattr(model, 'predict_one'):
+        # Estimators fitted on DataFrames expect the feature names back
+        input_data = pd.DataFrame(np.atleast_2d(input_data), columns=FEATURE_COLUMNS)
+    return model.predict_proba(input_data)
+
+
+@timed('engine.predict')
+def predict(model, input_data, cache=None, model_key=None):
+    """
+    Predict the drought class of the first row of ``input_data``.
+
+    Uses a single ``predict_proba`` pass (the single-row fast path for
+    compiled models) and takes the argmax as the class. With a
+    ``cache.PredictionCache``, probabilities are memoized under ``model_key``
+    (the model file's checksum).
+    Returns ``(prediction, prediction_proba)``.
+    """
+    if isinstance(input_data, pd.DataFrame):
+        input_data = input_data[FEATURE_COLUMNS].to_numpy()
+    row = np.atleast_2d(np.asarray(input_data, dtype=np.float64))[0]
+
+    def compute():
+        if hasattr(model, 'predict_one'):
+            return model.predict_one(row)
+        return predict_proba(model, row[None, :])[0]
+
+    if cache is None:
+        prediction_proba = compute()
+    else:
+        prediction_proba = cache.get_or_compute(model_key, row, compute)
+    prediction = int(np.asarray(model.classes_)[prediction_proba.argmax()])
+    return prediction, prediction_proba
+
+
+def explain(model, input_data, cache=None, model_key=None):
+    """
+    Per-feature contributions to each class probability for the first row of ``input_data``.
+
+    Returns an (n_classes, 12) array with one column per ``FEATURE_COLUMNS``
+    entry plus the bias last. For forests each row sums to that class's
+    probability; for boosted models (``transform == 'softmax'``) it sums to the
+    class's log-odds margin, before softmax (see
+    ``compiled.CompiledEnsemble.predict_contributions``). With a
+    ``cache.PredictionCache`` the result is memoized next to the row's
+    probabilities, under ``(model_key, 'contributions')``.
+    """
+    if isinstance(input_data, pd.DataFrame):
+        input_data = input_data[FEATURE_COLUMNS].to_numpy()
+    row = np.atleast_2d(np.asarray(input_data, dtype=np.float64))[0]
+    if not hasattr(model, 'contributions_one'):
+        model = compile_model(model)
+        if not hasattr(model, 'contributions_one'):
+            raise ValueError(f"Cannot explain model of type {type(model).__name__}")
+
+    if cache is None:
+        return model.contributions_one(row)
+    return cache.get_or_compute((model_key, 'contributions'), row, lambda: model.contributions_one(row))
+
+
+def top_contributions(contributions, class_index, n=None):
+    """
+    ``(feature, contribution)`` pairs for one class, largest magnitude first
+    """
+    pairs = sorted(zip(FEATURE_COLUMNS, contributions[class_index, :-1].tolist()), key=lambda pair: -abs(pair[1]))
+    return pairs[:n]
+
+
+def compute_trends(ndvi, ndvi_lag1, precip_anomaly, vci):
+    """
+    Trend inputs for the short-term outlook: ``(ndvi_trend, precip_trend, vci_trend)``
+    """
+    ndvi_trend = ndvi - ndvi_lag1
+    precip_trend = precip_anomaly
+    vci_trend = vci - 60
+    return ndvi_trend, precip_trend, vci_trend
+
+
+def predict_short_term_outlook(current_prediction, ndvi_trend, precip_trend, vci_trend, season,
+                               transitions=None, current_proba=None):
+    """
+    Forecast drought conditions for next month based on current trends.
+
+    Scalar front end to the rule tables in ``rules``; use
+    ``rules.short_term_outlook`` to score many scenarios at once. With a
+    ``transitions.TransitionModel`` the outlook label comes from the learned
+    class transitions instead: the expected class change over the next month,
+    starting from ``current_proba`` (or ``current_prediction`` alone).
+    """
+    from .rules import short_term_outlook
+
+    outlook, trend_score = short_term_outlook(ndvi_trend, precip_trend, vci_trend, season)
+    if transitions is not None:
+        from .transitions import outlook_label, trend_bin
+
+        if current_proba is None:
+            current_proba = np.eye(len(DROUGHT_CATEGORIES))[int(current_prediction)]
+        shift = transitions.expected_shift(current_proba, trend_bin(ndvi_trend, precip_trend, vci_trend),
+                                           season=season)
+        outlook = outlook_label(shift)[0]
+    return str(outlook), int(trend_score)
+
+
+def compute_risk_score(vci, precip_current, precip_3month, ndvi):
+    """
+    Combined vegetation and precipitation risk score (0-15).
+
+    Thresholds live in ``rules.RISK_RULES``; ``rules.risk_score`` is the
+    vectorized form.
+    """
+    from .rules import risk_score
+
+    return int(risk_score(vci, precip_current, precip_3month, ndvi))
+
+
+def classify_risk(risk_score):
+    """
+    Map a risk score to ``(risk_level, risk_color, risk_icon)``
+    """
+    for max_score, level, color, icon in RISK_LEVELS:
+        if risk_score <= max_score:
+            return level, color, icon
+    _, level, color, icon = RISK_LEVELS[-1]
+    return level, color, icon
@@ -0,0 +1,275 @@
+"""
+Feature engineering from raw monthly observations.
+
+Derives every model feature from raw monthly NDVI, precipitation and mean
+temperature, the same way ``data/drought_dataset_processed.csv`` was built:
+
+* ``precip_3month`` / ``precip_6month``: rolling 3/6-month rainfall sums
+  (shorter at the start of the record), ``precip_3month_avg = precip_3month / 3``
+* ``ndvi_3month_avg``: rolling 3-month mean NDVI
+* ``precip_lag1`` / ``ndvi_lag1``: previous month's values
+* ``precip_anomaly``: percent departure from the mean rainfall of the same
+  calendar month over all years so far, the current month included
+* ``vci``: NDVI scaled between the record's minimum and maximum NDVI up to
+  the end of the current calendar year
+
+``compute_features`` backfills a whole history with vectorized pandas
+operations. ``FeaturePipeline`` ingests one month at a time with O(1) work
+per month (ring buffers for the windows, running per-month rainfall totals
+and running NDVI extremes).
+
+Usage:
+    python -m mekong_drought.features build raw.csv features.csv
+    python -m mekong_drought.features verify [data/drought_dataset_processed.csv]
+"""
+
+import argparse
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .engine import DATASET_PATH, FEATURE_COLUMNS
+
+RAW_COLUMNS = ['year', 'month', 'ndvi', 'precipitation_mm', 'temp_mean_c']
+DERIVED_COLUMNS = [
+    'precip_3month', 'precip_6month', 'ndvi_3month_avg', 'precip_3month_avg',
+    'precip_lag1', 'ndvi_lag1', 'vci', 'precip_anomaly',
+]
+
+DRY_SEASON_MONTHS = (12, 1, 2, 3, 4)
+DRY_SEASON_LABEL = 'Dry Season'
+RAINY_SEASON_LABEL = 'Rainy Season'
+
+# Relative tolerance for verify(): the dataset's rolling sums differ from any
+# recomputation by float rounding only
+VERIFY_RTOL = 1e-12
+
+
+def season_label(month):
+    return DRY_SEASON_LABEL if int(month) in DRY_SEASON_MONTHS else RAINY_SEASON_LABEL
+
+
+def _month_index(year, month):
+    return np.asarray(year, dtype=np.int64) * 12 + np.asarray(month, dtype=np.int64) - 1
+
+
+def _percent_anomaly(value, mean):
+    return (value - mean) / mean * 100 if mean != 0 else np.nan
+
+
+def compute_features(raw):
+    """
+    Derived feature columns for a full monthly history (bulk mode).
+
+    ``raw`` needs ``RAW_COLUMNS`` for consecutive months; it is sorted by
+    date first. Returns a copy with ``date``, ``DERIVED_COLUMNS`` and
+    ``season`` filled in; other columns (e.g. labels) are kept.
+    """
+    missing = [column for column in RAW_COLUMNS if column not in raw.columns]
+    if missing:
+        raise ValueError(f"Missing raw columns: {', '.join(missing)}")
+
+    frame = raw.sort_values(['year', 'month'], kind='stable').reset_index(drop=True)
+    months = _month_index(frame['year'], frame['month'])
+    if len(months) > 1 and not np.all(np.diff(months) == 1):
+        raise ValueError("Raw observations must cover consecutive months without gaps")
+
+    year = frame['year'].astype(int)
+    month = frame['month'].astype(int)
+    precip = frame['precipitation_mm']
+    ndvi = frame['ndvi']
+
+    if 'date' not in frame.columns:
+        frame['date'] = [f'{y:04d}-{m:02d}' for y, m in zip(year, month)]
+    frame['precip_3month'] = precip.rolling(3, min_periods=1).sum()
+    frame['precip_6month'] = precip.rolling(6, min_periods=1).sum()
+    frame['ndvi_3month_avg'] = ndvi.rolling(3, min_periods=1).mean()
+    frame['precip_3month_avg'] = frame['precip_3month'] / 3
+    frame['precip_lag1'] = precip.shift(1)
+    frame['ndvi_lag1'] = ndvi.shift(1)
+
+    # Record extremes through the end of each calendar year
+    ndvi_min = year.map(ndvi.groupby(year).min().cummin())
+    ndvi_max = year.map(ndvi.groupby(year).max().cummax())
+    frame['vci'] = ((ndvi - ndvi_min) / (ndvi_max - ndvi_min) * 100).where(ndvi_max > ndvi_min)
+
+    monthly_mean = precip.groupby(month).transform(lambda values: values.expanding().mean())
+    frame['precip_anomaly'] = ((precip - monthly_mean) / monthly_mean * 100).where(monthly_mean != 0)
+    frame['season'] = [season_label(m) for m in month]
+    return frame
+
+
+class FeaturePipeline:
+    """
+    Incremental feature state, updated one month at a time.
+
+    Each ``update`` costs O(1): 3- and 6-month ring buffers, running lags,
+    running rainfall totals per calendar month and running NDVI extremes.
+    VCI uses the NDVI range up to the end of the calendar year, so the value
+    returned for a month is provisional until the year is complete; the VCI
+    of earlier months in the current year (at most 11 rows) is revised in
+    place when a new month extends the range, and ``frame()`` always matches
+    ``compute_features`` on the same history.
+    """
+
+    def __init__(self):
+        self._precip = deque(maxlen=6)
+        self._ndvi = deque(maxlen=3)
+        self._month_totals = np.zeros(12)
+        self._month_counts = np.zeros(12, dtype=np.int64)
+        self._ndvi_min = np.inf  # through the end of the previous year
+        self._ndvi_max = -np.inf
+        self._year_min = np.inf
+        self._year_max = -np.inf
+        self._year = None
+        self._last_month = None
+        self._year_start = 0
+        self.rows = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    @classmethod
+    def from_frame(cls, raw):
+        """
+        Pipeline warmed up with a history of raw observations
+        """
+        pipeline = cls()
+        for record in raw.sort_values(['year', 'month'], kind='stable').to_dict('records'):
+            pipeline.update(**record)
+        return pipeline
+
+    def update(self, year, month, ndvi, precipitation_mm, temp_mean_c, **extra):
+        """
+        Add the next month's raw observation and return its feature row (a dict)
+        """
+        year, month = int(year), int(month)
+        month_index = int(_month_index(year, month))
+        if self._last_month is not None and month_index != self._last_month + 1:
+            raise ValueError(f"Expected the month after {self.rows[-1]['date']}, got {year:04d}-{month:02d}")
+
+        if year != self._year:
+            self._ndvi_min = min(self._ndvi_min, self._year_min)
+            self._ndvi_max = max(self._ndvi_max, self._year_max)
+            self._year_min, self._year_max = np.inf, -np.inf
+            self._year = year
+            self._year_start = len(self.rows)
+
+        precip_lag1 = self._precip[-1] if self._precip else np.nan
+        ndvi_lag1 = self._ndvi[-1] if self._ndvi else np.nan
+        self._precip.append(precipitation_mm)
+        self._ndvi.append(ndvi)
+        precip_3month = sum(list(self._precip)[-3:])
+
+        self._month_totals[month - 1] += precipitation_mm
+        self._month_counts[month - 1] += 1
+        monthly_mean = self._month_totals[month - 1] / self._month_counts[month - 1]
+
+        row = dict(extra)
+        row.update({
+            'year': year,
+            'month': month,
+            'date': extra.get('date', f'{year:04d}-{month:02d}'),
+            'ndvi': ndvi,
+            'precipitation_mm': precipitation_mm,
+            'temp_mean_c': temp_mean_c,
+            'precip_3month': precip_3month,
+            'precip_6month': sum(self._precip),
+            'ndvi_3month_avg': sum(self._ndvi) / len(self._ndvi),
+            'precip_3month_avg': precip_3month / 3,
+            'precip_lag1': precip_lag1,
+            'ndvi_lag1': ndvi_lag1,
+            'precip_anomaly': _percent_anomaly(precipitation_mm, monthly_mean),
+            'season': season_label(month),
+        })
+        self.rows.append(row)
+        self._last_month = month_index
+
+        if ndvi < self._year_min or ndvi > self._year_max:
+            self._year_min = min(self._year_min, ndvi)
+            self._year_max = max(self._year_max, ndvi)
+            self._revise_vci(self._year_start)
+        else:
+            self._revise_vci(len(self.rows) - 1)
+        return row
+
+    def _revise_vci(self, start):
+        low = min(self._ndvi_min, self._year_min)
+        high = max(self._ndvi_max, self._year_max)
+        for row in self.rows[start:]:
+            row['vci'] = (row['ndvi'] - low) / (high - low) * 100 if high > low else np.nan
+
+    def feature_vector(self):
+        """
+        Latest month's model features in ``engine.FEATURE_COLUMNS`` order
+        """
+        if not self.rows:
+            raise ValueError("No observations yet")
+        row = self.rows[-1]
+        return np.array([row[name] for name in FEATURE_COLUMNS], dtype=np.float64)
+
+    def frame(self):
+        return pd.DataFrame(self.rows)
+
+
+def verify(dataset_path=DATASET_PATH, rtol=VERIFY_RTOL):
+    """
+    Rebuild a processed dataset from its raw columns in both modes.
+
+    Returns ``{mode: {column: max relative difference}}``; raises ValueError
+    if a column differs beyond ``rtol`` or NaNs do not line up.
+    """
+    dataset = pd.read_csv(dataset_path)
+    raw = dataset[RAW_COLUMNS + ['date']]
+    results = {}
+    for mode, rebuilt in (('bulk', compute_features(raw)), ('incremental', FeaturePipeline.from_frame(raw).frame())):
+        differences = {}
+        for column in DERIVED_COLUMNS:
+            expected = dataset[column].to_numpy(dtype=np.float64)
+            actual = rebuilt[column].to_numpy(dtype=np.float64)
+            if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+                raise ValueError(f"{mode}: missing values in {column} do not match")
+            scale = np.maximum(np.abs(expected), 1.0)
+            differences[column] = float(np.nanmax(np.abs(actual - expected) / scale, initial=0.0))
+            if differences[column] > rtol:
+                raise ValueError(f"{mode}: {column} differs by {differences[column]:.2e}")
+        if not (rebuilt['season'].to_numpy() == dataset['season'].to_numpy()).all():
+            raise ValueError(f"{mode}: season labels do not match")
+        results[mode] = differences
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Derive model features from raw monthly observations")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Backfill derived features for a raw monthly CSV")
+    build_parser.add_argument('input', help="CSV with year, month, ndvi, precipitation_mm, temp_mean_c")
+    build_parser.add_argument('output', help="CSV to write")
+
+    verify_parser = subparsers.add_parser('verify', help="Rebuild a processed dataset and compare")
+    verify_parser.add_argument('path', nargs='?', default=DATASET_PATH)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        features = compute_features(pd.read_csv(args.input))
+        features.to_csv(args.output, index=False)
+        print(f"✅ Wrote {len(features):,} months of features to {args.output}")
+        return 0
+
+    try:
+        results = verify(args.path)
+    except ValueError as error:
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+    for mode, differences in results.items():
+        worst = max(differences.values())
+        print(f"✅ {mode}: all {len(differences)} derived columns match (max relative difference {worst:.1e})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
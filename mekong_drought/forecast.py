@@ -0,0 +1,283 @@
+"""
+Monte Carlo drought forecast for the next one to three months.
+
+Samples thousands of future rainfall / NDVI / temperature trajectories from
+the history's own monthly distributions, rolls the window and lag features
+forward along every trajectory, and scores all scenarios for all horizons
+with one batched ``predict_proba`` call.
+
+Each step to calendar month m draws one analog year per scenario and takes
+that year's month-m rainfall, temperature and NDVI change from month m-1.
+Taking all three from the same year keeps them consistent. Each draw gets
+Gaussian kernel noise (a smoothed bootstrap, Silverman bandwidth), so 10,000
+scenarios are not limited to the handful of distinct analog years. Derived
+features follow ``features``: rolling 3/6-month sums and 3-month NDVI mean,
+lags, the rainfall anomaly against that month's running mean, and VCI
+against the NDVI range so far.
+
+Usage:
+    python -m mekong_drought.forecast [--region mekong_delta] [--start 2024-06] [--scenarios 10000]
+    python -m mekong_drought.forecast --data data/drought_dataset_processed.csv --horizons 6
+"""
+
+import argparse
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .engine import DROUGHT_CATEGORIES, FEATURE_COLUMNS, predict_proba
+from .features import RAW_COLUMNS, _month_index
+
+DEFAULT_SCENARIOS = 10_000
+DEFAULT_HORIZONS = 3
+MAX_HORIZONS = 12
+# Rainfall window of ``precip_6month``; shorter histories cannot seed the rolling state
+MIN_HISTORY_MONTHS = 6
+
+FAN_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Classes counted as "Severe or worse" in summaries
+SEVERE_CLASSES = (3, 4)
+
+Forecast = namedtuple('Forecast', ['start', 'months', 'features', 'proba', 'predicted_class'])
+Forecast.__doc__ = """
+Scored scenarios. ``start`` and ``months`` are ``YYYY-MM`` labels (the last
+observed month and each forecast month); ``features`` has shape
+(horizons, scenarios, 11), ``proba`` (horizons, scenarios, n_classes) and
+``predicted_class`` (horizons, scenarios).
+"""
+
+
+def _label(month_index):
+    return f'{month_index // 12:04d}-{month_index % 12 + 1:02d}'
+
+
+def _ratio(numerator, denominator):
+    """
+    Element-wise ``numerator / denominator * 100``, NaN where the denominator is 0
+    """
+    safe = np.where(denominator != 0, denominator, 1.0)
+    return np.where(denominator != 0, numerator / safe * 100, np.nan)
+
+
+def _bandwidth(values):
+    """
+    Silverman's rule-of-thumb kernel bandwidth
+    """
+    values = values[~np.isnan(values)]
+    if len(values) < 2:
+        return 0.0
+    return 1.06 * float(np.std(values)) * len(values) ** -0.2
+
+
+class ScenarioSampler:
+    """
+    Per-calendar-month analog pools built from a raw monthly history
+    """
+
+    def __init__(self, history):
+        history = history.sort_values(['year', 'month'], kind='stable')
+        months = history['month'].to_numpy(dtype=np.int64)
+        ndvi = history['ndvi'].to_numpy(dtype=np.float64)
+        ndvi_change = np.r_[np.nan, np.diff(ndvi)]
+        consecutive = np.r_[False, np.diff(_month_index(history['year'], months)) == 1]
+        ndvi_change[~consecutive] = np.nan
+
+        self.pools = {}
+        for month in range(1, 13):
+            rows = (months == month) & ~np.isnan(ndvi_change)
+            pool = {
+                'precipitation_mm': history['precipitation_mm'].to_numpy(dtype=np.float64)[rows],
+                'temp_mean_c': history['temp_mean_c'].to_numpy(dtype=np.float64)[rows],
+                'ndvi_change': ndvi_change[rows],
+            }
+            if len(pool['ndvi_change']) == 0:
+                raise ValueError(f"History has no consecutive-month record for calendar month {month}")
+            self.pools[month] = (pool, {name: _bandwidth(values) for name, values in pool.items()})
+
+    def sample(self, month, n_scenarios, rng):
+        """
+        ``(precipitation, temperature, ndvi change)`` arrays for ``n_scenarios`` draws of one month
+        """
+        pool, bandwidth = self.pools[month]
+        analog = rng.integers(0, len(pool['ndvi_change']), n_scenarios)
+        draws = [pool[name][analog] + rng.normal(0.0, bandwidth[name], n_scenarios)
+                 for name in ('precipitation_mm', 'temp_mean_c', 'ndvi_change')]
+        draws[0] = np.maximum(draws[0], 0.0)
+        return draws
+
+
+def simulate(history, n_scenarios=DEFAULT_SCENARIOS, horizons=DEFAULT_HORIZONS, seed=None, sampler=None):
+    """
+    Feature matrices for ``horizons`` months after the end of ``history``.
+
+    ``history`` holds raw monthly observations (``features.RAW_COLUMNS``) up
+    to the forecast start, ending on consecutive months, and needs at least
+    ``MIN_HISTORY_MONTHS`` rows (ValueError otherwise). The analog pools
+    come from ``sampler`` if given (for example, built from a longer
+    record), otherwise from ``history``. Returns ``(start label, month
+    labels, features)`` with features of shape (horizons, n_scenarios, 11).
+    """
+    if not 1 <= horizons <= MAX_HORIZONS:
+        raise ValueError(f"horizons must be between 1 and {MAX_HORIZONS}")
+    missing = [column for column in RAW_COLUMNS if column not in history]
+    if missing:
+        raise ValueError(f"History is missing columns: {', '.join(missing)}")
+    if len(history) < MIN_HISTORY_MONTHS:
+        raise ValueError(f"History has {len(history)} months; at least {MIN_HISTORY_MONTHS} are needed")
+    history = history.sort_values(['year', 'month'], kind='stable')
+    sampler = sampler or ScenarioSampler(history)
+    rng = np.random.default_rng(seed)
+
+    months = history['month'].to_numpy(dtype=np.int64)
+    precip = history['precipitation_mm'].to_numpy(dtype=np.float64)
+    ndvi = history['ndvi'].to_numpy(dtype=np.float64)
+    month_totals = np.bincount(months - 1, weights=precip, minlength=12)
+    month_counts = np.bincount(months - 1, minlength=12)
+    last = int(_month_index(history['year'].iloc[-1], months[-1]))
+
+    # Rolling state per scenario: last 6 rainfall values and last 3 NDVI values
+    precip_window = np.tile(np.r_[np.full(max(0, 6 - len(precip)), np.nan), precip[-6:]], (n_scenarios, 1))
+    ndvi_window = np.tile(np.r_[np.full(max(0, 3 - len(ndvi)), np.nan), ndvi[-3:]], (n_scenarios, 1))
+    ndvi_low = np.full(n_scenarios, np.nanmin(ndvi))
+    ndvi_high = np.full(n_scenarios, np.nanmax(ndvi))
+
+    columns = {name: i for i, name in enumerate(FEATURE_COLUMNS)}
+    features = np.empty((horizons, n_scenarios, len(FEATURE_COLUMNS)))
+    labels = []
+    for step in range(horizons):
+        month_index = last + step + 1
+        month = month_index % 12 + 1
+        labels.append(_label(month_index))
+        new_precip, new_temp, ndvi_change = sampler.sample(month, n_scenarios, rng)
+        new_ndvi = np.clip(ndvi_window[:, -1] + ndvi_change, -1.0, 1.0)
+
+        precip_lag1, ndvi_lag1 = precip_window[:, -1].copy(), ndvi_window[:, -1].copy()
+        precip_window = np.column_stack([precip_window[:, 1:], new_precip])
+        ndvi_window = np.column_stack([ndvi_window[:, 1:], new_ndvi])
+        ndvi_low = np.minimum(ndvi_low, new_ndvi)
+        ndvi_high = np.maximum(ndvi_high, new_ndvi)
+        monthly_mean = (month_totals[month - 1] + new_precip) / (month_counts[month - 1] + 1)
+
+        precip_3month = np.nansum(precip_window[:, -3:], axis=1)
+        row = features[step]
+        row[:, columns['ndvi']] = new_ndvi
+        row[:, columns['precipitation_mm']] = new_precip
+        row[:, columns['temp_mean_c']] = new_temp
+        row[:, columns['precip_3month']] = precip_3month
+        row[:, columns['precip_6month']] = np.nansum(precip_window, axis=1)
+        row[:, columns['ndvi_3month_avg']] = np.nanmean(ndvi_window, axis=1)
+        row[:, columns['precip_3month_avg']] = precip_3month / 3
+        row[:, columns['precip_lag1']] = precip_lag1
+        row[:, columns['ndvi_lag1']] = ndvi_lag1
+        row[:, columns['vci']] = _ratio(new_ndvi - ndvi_low, ndvi_high - ndvi_low)
+        row[:, columns['precip_anomaly']] = _ratio(new_precip - monthly_mean, monthly_mean)
+    return _label(last), labels, features
+
+
+def forecast(model, history, n_scenarios=DEFAULT_SCENARIOS, horizons=DEFAULT_HORIZONS, seed=None, sampler=None):
+    """
+    Simulate and score every scenario for every horizon in one ``predict_proba`` call
+    """
+    start, months, features = simulate(history, n_scenarios, horizons, seed, sampler)
+    flat = features.reshape(-1, len(FEATURE_COLUMNS))
+    proba = predict_proba(model, flat).reshape(horizons, n_scenarios, -1)
+    predicted = np.asarray(model.classes_)[proba.argmax(axis=2)]
+    return Forecast(start, months, features, proba, predicted)
+
+
+def class_probabilities(result):
+    """
+    Per-horizon probability of each class (mean over scenarios), one row per month
+    """
+    return pd.DataFrame(result.proba.mean(axis=1), index=pd.Index(result.months, name='month'),
+                        columns=DROUGHT_CATEGORIES[:result.proba.shape[2]])
+
+
+def fan(values, quantiles=FAN_QUANTILES):
+    """
+    Quantiles over scenarios of a (horizons, scenarios) array, shape (len(quantiles), horizons)
+    """
+    return np.quantile(values, quantiles, axis=1)
+
+
+def severe_probability(result):
+    """
+    (horizons, scenarios) probability of Severe Drought or worse in each scenario
+    """
+    return result.proba[:, :, list(SEVERE_CLASSES)].sum(axis=2)
+
+
+def summary(result):
+    """
+    Per-horizon class probabilities plus the share of scenarios predicted Severe or worse
+    """
+    table = class_probabilities(result)
+    table['P(severe or worse)'] = severe_probability(result).mean(axis=1)
+    table['scenarios severe or worse'] = np.isin(result.predicted_class, SEVERE_CLASSES).mean(axis=1)
+    return table
+
+
+def region_history(store, index, region):
+    """
+    Raw monthly history of one region from the column store, in date order
+    """
+    rows, _ = index.series(region)
+    return pd.DataFrame({name: store.column(name)[rows] for name in RAW_COLUMNS})
+
+
+def until(history, year, month):
+    """
+    Rows of ``history`` up to and including ``year``-``month``
+    """
+    return history[_month_index(history['year'], history['month']) <= _month_index(year, month)]
+
+
+def main(argv=None):
+    from .engine import compile_model, resolve_model_path
+    from .model_store import load_model_file
+    from .regions import RegionIndex
+    from .store import DEFAULT_REGION, STORE_PATH, ColumnStore
+
+    parser = argparse.ArgumentParser(description="Monte Carlo drought forecast for the coming months")
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--region', default=DEFAULT_REGION)
+    parser.add_argument('--data', help="Read the history from this CSV instead of the store")
+    parser.add_argument('--model', default=None,
+                        help="Model file, pickle or native format (default: native export if present)")
+    parser.add_argument('--scenarios', type=int, default=DEFAULT_SCENARIOS)
+    parser.add_argument('--horizons', type=int, default=DEFAULT_HORIZONS)
+    parser.add_argument('--start', help="Last observed month (YYYY-MM) to forecast from; default: end of data")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.data:
+            history = pd.read_csv(args.data, usecols=RAW_COLUMNS)
+        else:
+            store = ColumnStore.open(args.store)
+            history = region_history(store, RegionIndex.from_store(store), args.region)
+        # Analog pools use the whole record; the forecast starts after --start
+        sampler = ScenarioSampler(history)
+        if args.start:
+            history = until(history, *(int(part) for part in args.start.split('-')))
+        model = compile_model(load_model_file(args.model or resolve_model_path()).model)
+
+        started = time.perf_counter()
+        result = forecast(model, history, args.scenarios, args.horizons, args.seed, sampler)
+        elapsed = time.perf_counter() - started
+    except (FileNotFoundError, ValueError, KeyError) as error:
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+
+    print(f"Forecast from {result.start}: {args.scenarios:,} scenarios x {args.horizons} months "
+          f"in {elapsed:.2f}s\n")
+    print(summary(result).to_string(float_format='{:.1%}'.format))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
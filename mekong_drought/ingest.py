@@ -0,0 +1,461 @@
+"""
+Offline ingestion of monthly satellite grids into the monthly dataset.
+
+Reads monthly grids stored on local disk (NDVI from MODIS, rainfall from
+CHIRPS, temperature from ERA5, exported once from Earth Engine or the
+providers), reduces each to per-region means and writes the rows the model
+consumes. Nothing is fetched from a live service.
+
+Grids are files named ``<variable>_<YYYY-MM>.<ext>`` in one directory, for
+example ``ndvi_2024-01.tif`` or ``precipitation_mm_2024-01.npy``.
+``ndvi``, ``precipitation_mm`` and ``temp_mean_c`` are required for every
+month; ``temp_max_c`` and ``temp_min_c`` are optional. Supported formats:
+
+* ``.npy``, memory-mapped (a leading band axis of length 1 is dropped)
+* ``.tif`` / ``.tiff``, read in row windows with rasterio (optional)
+* ``.nc``, read in row slices with netCDF4 (optional), using
+  ``--netcdf-variable`` or the file's only 2-D data variable
+
+Values equal to the file's nodata / fill value, or to ``--nodata``, are
+ignored, as are NaNs.
+
+Regions come from an integer label grid with the same shape: pixels labelled
+``k`` (1, 2, ...) belong to the k-th region name, and 0 or negative means
+outside every region. ``RegionMasks`` turns it into one sorted array of
+in-region pixel indices plus their region codes. This happens once, and the
+result is cached next to the label grid (``<labels>.masks.npz``), rebuilt
+when the label file changes. Each grid is then read in blocks of rows.
+Blocks with no region pixels are never read. For every other block, the
+block's pixels are gathered and reduced per region with ``bincount``. Grids
+are split across a process pool; each worker loads the cached masks once.
+
+The per-region means get the derived features of ``features.compute_features``,
+continuing each region's history in the store when one is given. The rows can
+be appended to the store (as unlabelled months) and/or written to a CSV laid
+out like ``data/drought_dataset_processed.csv`` with a ``region`` column.
+
+Usage:
+    python -m mekong_drought.ingest grids/ --labels grids/regions.npy --names grids/regions.json --output new_months.csv
+    python -m mekong_drought.ingest grids/ --labels grids/regions.npy --store data/drought_store --workers 4
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .features import compute_features
+from .regions import month_key
+
+FORMAT_VERSION = 1
+
+REQUIRED_VARIABLES = ('ndvi', 'precipitation_mm', 'temp_mean_c')
+VARIABLES = REQUIRED_VARIABLES + ('temp_max_c', 'temp_min_c')
+GRID_EXTENSIONS = ('.npy', '.tif', '.tiff', '.nc')
+
+GRID_FILE_PATTERN = re.compile(r'^(?P<variable>[a-z_]+)_(?P<year>\d{4})-(?P<month>\d{2})(?P<extension>\.[a-z]+)$')
+
+MASKS_SUFFIX = '.masks.npz'
+
+# Rows per block read from a grid; 256 rows of a 10,000-pixel-wide grid is 20 MB as float64
+DEFAULT_CHUNK_ROWS = 256
+
+# Per-process state set up by _init_worker
+_WORKER = {}
+
+
+def _require(module, purpose):
+    try:
+        return __import__(module)
+    except ImportError as e:
+        raise ImportError(f"{purpose} support requires {module} (pip install {module})") from e
+
+
+class _ArrayGrid:
+    def __init__(self, array):
+        self.array = array[0] if array.ndim == 3 and array.shape[0] == 1 else array
+        if self.array.ndim != 2:
+            raise ValueError(f"Expected a 2-D grid, got shape {array.shape}")
+        self.shape = self.array.shape
+        self.nodata = None
+
+    def rows(self, start, stop):
+        return np.asarray(self.array[start:stop], dtype=np.float64)
+
+    def close(self):
+        pass
+
+
+class _GeoTiffGrid:
+    def __init__(self, path):
+        rasterio = _require('rasterio', 'GeoTIFF')
+        self._window = __import__('rasterio.windows').windows.Window
+        self.dataset = rasterio.open(path)
+        self.shape = (self.dataset.height, self.dataset.width)
+        self.nodata = self.dataset.nodata
+
+    def rows(self, start, stop):
+        return self.dataset.read(1, window=self._window(0, start, self.shape[1], stop - start)).astype(np.float64)
+
+    def close(self):
+        self.dataset.close()
+
+
+class _NetCDFGrid:
+    def __init__(self, path, variable=None):
+        netCDF4 = _require('netCDF4', 'NetCDF')
+        self.dataset = netCDF4.Dataset(path)
+        if variable is None:
+            candidates = [name for name, values in self.dataset.variables.items()
+                          if name not in self.dataset.dimensions and values.ndim >= 2]
+            if len(candidates) != 1:
+                self.dataset.close()
+                raise ValueError(f"{path}: pick one of the variables {candidates} with --netcdf-variable")
+            variable = candidates[0]
+        self.variable = self.dataset.variables[variable]
+        if self.variable.ndim == 3 and self.variable.shape[0] != 1 or self.variable.ndim not in (2, 3):
+            self.dataset.close()
+            raise ValueError(f"{path}: '{variable}' must be 2-D or have a time axis of length 1")
+        self.shape = self.variable.shape[-2:]
+        self.nodata = None  # fill values come back masked
+
+    def rows(self, start, stop):
+        block = self.variable[0, start:stop] if self.variable.ndim == 3 else self.variable[start:stop]
+        return np.ma.filled(np.ma.asarray(block, dtype=np.float64), np.nan)
+
+    def close(self):
+        self.dataset.close()
+
+
+def open_grid(path, netcdf_variable=None):
+    """
+    A 2-D grid read by blocks of rows: ``.shape``, ``.nodata``, ``.rows(start, stop)`` (float64) and ``.close()``
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        return _ArrayGrid(np.load(path, mmap_mode='r'))
+    if extension in ('.tif', '.tiff'):
+        return _GeoTiffGrid(path)
+    if extension == '.nc':
+        return _NetCDFGrid(path, netcdf_variable)
+    raise ValueError(f"Unsupported grid type '{extension}', expected one of {', '.join(GRID_EXTENSIONS)}")
+
+
+def find_grids(directory):
+    """
+    ``{(variable, month key): path}`` for every monthly grid in ``directory``
+    """
+    grids = {}
+    for name in sorted(os.listdir(directory)):
+        match = GRID_FILE_PATTERN.match(name)
+        if not match or match['extension'] not in GRID_EXTENSIONS or match['variable'] not in VARIABLES:
+            continue
+        month = int(match['month'])
+        if not 1 <= month <= 12:
+            raise ValueError(f"{name}: month out of range")
+        key = (match['variable'], int(month_key(int(match['year']), month)))
+        if key in grids:
+            raise ValueError(f"Two grids for {match['variable']} {match['year']}-{match['month']}: "
+                             f"{os.path.basename(grids[key])} and {name}")
+        grids[key] = os.path.join(directory, name)
+    if not grids:
+        raise FileNotFoundError(f"No <variable>_<YYYY-MM> grids in {directory}")
+    months = sorted({month for _, month in grids})
+    missing = [f"{variable} {month // 12}-{month % 12 + 1:02d}" for month in months
+               for variable in REQUIRED_VARIABLES if (variable, month) not in grids]
+    if missing:
+        raise FileNotFoundError(f"Missing grids: {', '.join(missing)}")
+    return grids
+
+
+class RegionMasks:
+    """
+    In-region pixels of a label grid, as ascending flat indices and their region codes
+    """
+
+    def __init__(self, names, shape, pixels, codes):
+        self.names = list(names)
+        self.shape = tuple(int(size) for size in shape)
+        self.pixels = np.asarray(pixels)
+        self.codes = np.asarray(codes)
+        self.counts = np.bincount(self.codes, minlength=len(self.names))
+
+    @classmethod
+    def from_labels(cls, labels, names=None):
+        """
+        Masks from a label grid (1..N = region, 0 or negative = outside); names default to ``region_<k>``
+        """
+        labels = np.asarray(labels)
+        if labels.ndim != 2:
+            raise ValueError(f"Label grid must be 2-D, got shape {labels.shape}")
+        flat = labels.reshape(-1)
+        pixels = np.flatnonzero(flat > 0)
+        codes = flat[pixels].astype(np.int64) - 1
+        n_regions = int(codes.max()) + 1 if len(codes) else 0
+        # Smallest index types that fit, so the cached masks load quickly
+        pixels = pixels.astype(np.uint32 if flat.size < 2 ** 32 else np.int64)
+        codes = codes.astype(np.int16 if n_regions < 2 ** 15 else np.int32)
+        names = [f'region_{k}' for k in range(1, n_regions + 1)] if names is None else list(names)
+        if n_regions > len(names):
+            raise ValueError(f"Label grid uses {n_regions} regions but only {len(names)} names were given")
+        return cls(names, labels.shape, pixels, codes)
+
+    def zonal(self, grid, chunk_rows=DEFAULT_CHUNK_ROWS, nodata=None):
+        """
+        Per-region sum and count of the valid pixels of ``grid`` (see ``open_grid``), read ``chunk_rows`` at a time
+        """
+        if tuple(grid.shape) != self.shape:
+            raise ValueError(f"Grid shape {tuple(grid.shape)} does not match the region labels {self.shape}")
+        height, width = self.shape
+        sums = np.zeros(len(self.names))
+        counts = np.zeros(len(self.names), dtype=np.int64)
+        starts = np.arange(0, height, chunk_rows)
+        bounds = np.searchsorted(self.pixels, np.r_[starts, height] * width)
+        for start, lo, hi in zip(starts.tolist(), bounds[:-1].tolist(), bounds[1:].tolist()):
+            if lo == hi:
+                continue
+            stop = min(start + chunk_rows, height)
+            values = grid.rows(start, stop).reshape(-1)[self.pixels[lo:hi] - start * width]
+            valid = ~np.isnan(values)
+            for missing in (grid.nodata, nodata):
+                if missing is not None:
+                    valid &= values != missing
+            codes = self.codes[lo:hi][valid]
+            sums += np.bincount(codes, weights=values[valid], minlength=len(self.names))
+            counts += np.bincount(codes, minlength=len(self.names))
+        return sums, counts
+
+    def save(self, path, source_stamp=None):
+        metadata = {'format_version': FORMAT_VERSION, 'names': self.names, 'shape': self.shape,
+                    'source': source_stamp}
+        with open(path, 'wb') as f:
+            np.savez(f, pixels=self.pixels, codes=self.codes, metadata=json.dumps(metadata))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            metadata = json.loads(str(data['metadata']))
+            if metadata.get('format_version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported region mask format in {path}")
+            masks = cls(metadata['names'], metadata['shape'], data['pixels'], data['codes'])
+        masks.source = metadata.get('source')
+        return masks
+
+
+def _stamp(path):
+    status = os.stat(path)
+    return {'file': os.path.basename(path), 'size': status.st_size, 'mtime_ns': status.st_mtime_ns}
+
+
+def read_names(path):
+    """
+    Region names from a JSON list, or a ``{"<label>": name}`` object
+    """
+    with open(path, encoding='utf-8') as f:
+        names = json.load(f)
+    if isinstance(names, dict):
+        labels = {int(label): name for label, name in names.items()}
+        names = [labels.get(k, f'region_{k}') for k in range(1, max(labels, default=0) + 1)]
+    return [str(name) for name in names]
+
+
+def load_masks(labels_path, names=None, cache_path=None):
+    """
+    Cached ``RegionMasks`` for a label grid; returns ``(masks, cache path, rebuilt)``
+    """
+    cache_path = cache_path or os.path.splitext(labels_path)[0] + MASKS_SUFFIX
+    stamp = _stamp(labels_path)
+    if os.path.exists(cache_path):
+        try:
+            masks = RegionMasks.load(cache_path)
+            if masks.source == stamp and (names is None or masks.names[:len(names)] == list(names)):
+                return masks, cache_path, False
+        except (ValueError, KeyError, OSError):
+            pass
+    grid = open_grid(labels_path)
+    try:
+        masks = RegionMasks.from_labels(grid.rows(0, grid.shape[0]), names)
+    finally:
+        grid.close()
+    masks.save(cache_path, stamp)
+    return masks, cache_path, True
+
+
+def _init_worker(masks_path, chunk_rows, nodata, netcdf_variable, masks=None):
+    _WORKER['masks'] = masks if masks is not None else RegionMasks.load(masks_path)
+    _WORKER['chunk_rows'] = chunk_rows
+    _WORKER['nodata'] = nodata
+    _WORKER['netcdf_variable'] = netcdf_variable
+
+
+def _zonal_grid(task):
+    """
+    Zonal sums and counts of one grid file; returns (variable, month, sums, counts, pixels, CPU seconds)
+    """
+    start = time.process_time()
+    variable, month, path = task
+    grid = open_grid(path, _WORKER['netcdf_variable'])
+    try:
+        sums, counts = _WORKER['masks'].zonal(grid, _WORKER['chunk_rows'], _WORKER['nodata'])
+    except ValueError as error:
+        raise ValueError(f"{os.path.basename(path)}: {error}") from error
+    finally:
+        grid.close()
+    return variable, month, sums, counts, grid.shape[0] * grid.shape[1], time.process_time() - start
+
+
+def zonal_means(grid_dir, labels_path, names=None, workers=None, chunk_rows=DEFAULT_CHUNK_ROWS, nodata=None,
+                netcdf_variable=None, log=None):
+    """
+    Per-region monthly means of every grid in ``grid_dir``; returns ``(table, stats)``.
+
+    ``table`` has ``region``, ``year``, ``month`` and one column per variable
+    (NaN where a region has no valid pixel or a month lacks an optional grid).
+    ``workers`` processes reduce grids in parallel (default: one per CPU; 1
+    reduces in this process).
+    """
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive")
+    workers = workers or os.cpu_count() or 1
+    grids = find_grids(grid_dir)
+    mask_start = time.perf_counter()
+    masks, masks_path, rebuilt = load_masks(labels_path, names)
+    mask_seconds = time.perf_counter() - mask_start
+
+    months = sorted({month for _, month in grids})
+    month_row = {month: i for i, month in enumerate(months)}
+    means = {variable: np.full((len(months), len(masks.names)), np.nan) for variable in VARIABLES}
+    coverage = np.zeros((len(months), len(masks.names)))
+    tasks = [(variable, month, path) for (variable, month), path in sorted(grids.items())]
+    init_args = (masks_path, chunk_rows, nodata, netcdf_variable)
+    start = time.perf_counter()
+    n_pixels = 0
+    cpu_seconds = 0.0
+
+    def collect(results):
+        nonlocal n_pixels, cpu_seconds
+        for done, (variable, month, sums, counts, pixels, seconds) in enumerate(results, 1):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means[variable][month_row[month]] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+            if variable == 'ndvi':
+                coverage[month_row[month]] = counts / np.maximum(masks.counts, 1)
+            n_pixels += pixels
+            cpu_seconds += seconds
+            if log is not None and (done % 10 == 0 or done == len(tasks)):
+                log(f"{done:,}/{len(tasks):,} grids ({n_pixels / (time.perf_counter() - start):,.0f} pixels/sec)")
+
+    if workers == 1:
+        _init_worker(*init_args, masks=masks)
+        try:
+            collect(map(_zonal_grid, tasks))
+        finally:
+            _WORKER.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            collect(pool.map(_zonal_grid, tasks))
+
+    keys = np.repeat(np.array(months, dtype=np.int64), len(masks.names))
+    table = pd.DataFrame({
+        'region': np.tile(np.array(masks.names, dtype=object), len(months)),
+        'year': keys // 12, 'month': keys % 12 + 1,
+        **{variable: values.reshape(-1) for variable, values in means.items()},
+    })
+    elapsed = time.perf_counter() - start
+    stats = {
+        'grids': len(tasks), 'months': len(months), 'regions': len(masks.names),
+        'region_pixels': int(len(masks.pixels)), 'masks_rebuilt': rebuilt, 'mask_seconds': mask_seconds,
+        'workers': workers, 'pixels': n_pixels, 'seconds': elapsed, 'cpu_seconds': cpu_seconds,
+        'pixels_per_sec': n_pixels / elapsed if elapsed > 0 else float('inf'),
+        'min_ndvi_coverage': float(coverage.min()) if coverage.size else 0.0,
+    }
+    return table, stats
+
+
+def with_features(table, store=None):
+    """
+    Monthly rows with ``compute_features``'s derived columns, per region.
+
+    With a ``ColumnStore``, each region's stored months come first, so windows,
+    lags, anomalies and VCI continue its history; months in ``table`` replace
+    stored months. Returns only the rows of ``table``, in the store's layout.
+    """
+    if store is not None:
+        from .regions import RegionIndex
+        from .store import FLOAT_COLUMNS
+
+        index = RegionIndex.from_store(store)
+        stored = store.to_frame(['region', 'year', 'month', *(name for name in VARIABLES if name in FLOAT_COLUMNS)])
+    frames = []
+    for region, rows in table.groupby('region', sort=False):
+        rows = rows.assign(new=True)
+        if store is not None and region in index.regions:
+            history = stored.iloc[index.series(region)[0]].assign(new=False)
+            history = history[~np.isin(month_key(history['year'], history['month']),
+                                       month_key(rows['year'], rows['month']))]
+            rows = pd.concat([history, rows], ignore_index=True)
+        features = compute_features(rows)
+        frames.append(features[features.pop('new').astype(bool)])
+    frame = pd.concat(frames, ignore_index=True)
+    columns = ['region', 'year', 'month', 'date', *VARIABLES, *(name for name in frame.columns
+               if name not in VARIABLES and name not in ('region', 'year', 'month', 'date', 'season')), 'season']
+    return frame[columns]
+
+
+def main(argv=None):
+    from .store import ColumnStore
+
+    parser = argparse.ArgumentParser(description="Reduce local monthly satellite grids to per-region rows")
+    parser.add_argument('grids', help="Directory of <variable>_<YYYY-MM>.npy/.tif/.nc grids")
+    parser.add_argument('--labels', required=True, help="Region label grid (.npy/.tif/.nc; 1..N = region, 0 = none)")
+    parser.add_argument('--names', default=None, help="JSON list of region names, or {\"<label>\": name}")
+    parser.add_argument('--output', default=None, help="Write the rows to this CSV")
+    parser.add_argument('--store', default=None, help="Continue and append to this column store")
+    parser.add_argument('--dry-run', action='store_true', help="Compute against --store without appending")
+    parser.add_argument('--nodata', type=float, default=None, help="Grid value marking missing pixels")
+    parser.add_argument('--netcdf-variable', default=None, help="Variable to read from NetCDF files")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help="Grid rows read per block")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--quiet', action='store_true', help="Only print the final summary")
+    args = parser.parse_args(argv)
+
+    if args.chunk_rows <= 0:
+        parser.error("--chunk-rows must be positive")
+    if args.output is None and args.store is None:
+        parser.error("give --output, --store or both")
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    try:
+        names = read_names(args.names) if args.names else None
+        store = ColumnStore.open(args.store) if args.store else None
+        table, stats = zonal_means(args.grids, args.labels, names, args.workers, args.chunk_rows, args.nodata,
+                                   args.netcdf_variable, log=None if args.quiet else log)
+        rows = with_features(table, store)
+        if args.output:
+            rows.to_csv(args.output, index=False)
+        appended = store.append(rows) if store is not None and not args.dry_run else 0
+    except (FileNotFoundError, ValueError, KeyError, ImportError) as error:
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+
+    masks = "rebuilt" if stats['masks_rebuilt'] else "cached"
+    log(f"✅ {stats['grids']:,} grids, {stats['months']:,} months x {stats['regions']:,} regions "
+        f"({stats['region_pixels']:,} region pixels, masks {masks} in {stats['mask_seconds'] * 1000:.0f} ms) "
+        f"in {stats['seconds']:.2f}s with {stats['workers']} worker(s) - {stats['pixels_per_sec']:,.0f} pixels/sec; "
+        f"lowest NDVI coverage {stats['min_ndvi_coverage']:.0%}")
+    if args.output:
+        log(f"✅ Wrote {len(rows):,} rows to {args.output}")
+    if appended:
+        log(f"✅ Appended {appended:,} rows to {args.store} ({len(store):,} rows)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
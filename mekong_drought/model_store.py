@@ -0,0 +1,269 @@
+"""
+Model file formats, checksums and hot reloading.
+
+Supported model files:
+
+* ``.pkl`` / ``.joblib`` - pickled scikit-learn / XGBoost estimators (legacy)
+* ``.json`` / ``.ubj``   - XGBoost's native booster formats
+* ``.npz``               - array-backed ``TreeEnsemble`` for scikit-learn forests, or a
+  compact ``compiled.CompiledEnsemble`` written by ``compact`` (told apart by its metadata)
+
+The shipped ``models/XGBoost_drought_model.pkl`` holds a scikit-learn random
+forest, which has no XGBoost native form, so ``export_native`` writes it as a
+``.npz`` tree ensemble instead. A true XGBoost model is written with
+``save_model``. Every export gets a ``<file>.sha256`` sidecar that is checked
+on load.
+
+Usage:
+    python -m mekong_drought.model_store export models/XGBoost_drought_model.pkl models/drought_model.npz
+    python -m mekong_drought.model_store checksum models/drought_model.npz
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .telemetry import REGISTRY
+from .trees import TreeEnsemble
+
+PICKLE_EXTENSIONS = ('.pkl', '.pickle', '.joblib')
+XGBOOST_EXTENSIONS = ('.json', '.ubj')
+ENSEMBLE_EXTENSIONS = ('.npz',)
+
+CHECKSUM_SUFFIX = '.sha256'
+
+LoadedModel = namedtuple('LoadedModel', ['model', 'path', 'checksum', 'mtime', 'load_seconds'])
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    """
+    SHA-256 hex digest of a file's contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extension(path):
+    return os.path.splitext(path)[1].lower()
+
+
+def read_checksum_sidecar(path):
+    sidecar = path + CHECKSUM_SUFFIX
+    if not os.path.exists(sidecar):
+        return None
+    with open(sidecar) as f:
+        return f.read().split()[0]
+
+
+def load_model_file(path, verify=True):
+    """
+    Load a model from any supported format.
+
+    When ``verify`` is set and a ``.sha256`` sidecar exists, the file contents
+    must match it or ValueError is raised. Returns a ``LoadedModel``.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model file not found: {path}")
+
+    start = time.perf_counter()
+    mtime = os.stat(path).st_mtime
+    checksum = file_checksum(path)
+    if verify:
+        expected = read_checksum_sidecar(path)
+        if expected is not None and expected != checksum:
+            raise ValueError(f"Checksum mismatch for {path}: expected {expected}, got {checksum}")
+
+    extension = _extension(path)
+    if extension in ENSEMBLE_EXTENSIONS:
+        model = _load_ensemble(path)
+    elif extension in XGBOOST_EXTENSIONS:
+        import xgboost
+
+        model = xgboost.XGBClassifier()
+        model.load_model(path)
+    elif extension in PICKLE_EXTENSIONS:
+        import joblib
+
+        model = joblib.load(path)
+    else:
+        raise ValueError(f"Unsupported model file type '{extension}'")
+
+    seconds = time.perf_counter() - start
+    REGISTRY.observe('model_store.load_model_file', seconds * 1000)
+    return LoadedModel(model, path, checksum, mtime, seconds)
+
+
+def _load_ensemble(path):
+    from .compiled import FORMAT_KIND, CompiledEnsemble
+
+    with np.load(path, allow_pickle=False) as data:
+        kind = json.loads(str(data['metadata'])).get('kind')
+    return CompiledEnsemble.load(path) if kind == FORMAT_KIND else TreeEnsemble.load(path)
+
+
+def export_native(model, path):
+    """
+    Write ``model`` in its pickle-free native format and a checksum sidecar.
+
+    XGBoost estimators are saved with ``save_model`` (``path`` must end in
+    .json or .ubj); scikit-learn tree classifiers become a ``.npz`` TreeEnsemble.
+    The file is written to a temporary name and renamed, so a watcher never
+    sees a half-written model. Returns the checksum.
+    """
+    extension = _extension(path)
+    tmp_path = f"{path}.tmp{extension}"
+
+    if hasattr(model, 'get_booster'):
+        if extension not in XGBOOST_EXTENSIONS:
+            raise ValueError("XGBoost models must be exported to .json or .ubj")
+        model.save_model(tmp_path)
+    elif hasattr(model, 'predict_contributions'):
+        if extension not in ENSEMBLE_EXTENSIONS:
+            raise ValueError("Compiled ensembles must be exported to .npz")
+        model.save(tmp_path)
+    else:
+        if extension not in ENSEMBLE_EXTENSIONS:
+            raise ValueError("Tree ensembles must be exported to .npz")
+        if not isinstance(model, TreeEnsemble):
+            model = TreeEnsemble.from_sklearn(model)
+        model.save(tmp_path)
+
+    checksum = file_checksum(tmp_path)
+    with open(tmp_path + CHECKSUM_SUFFIX, 'w') as f:
+        f.write(f"{checksum}  {os.path.basename(path)}\n")
+    os.replace(tmp_path + CHECKSUM_SUFFIX, path + CHECKSUM_SUFFIX)
+    os.replace(tmp_path, path)
+    return checksum
+
+
+class ModelWatcher:
+    """
+    Keeps a model loaded and swaps in a new one when its file changes.
+
+    ``current`` always returns a complete ``LoadedModel``; a reload builds the
+    new model first and then replaces the reference in one assignment, so
+    readers never see a partially loaded model. A file whose mtime changed but
+    whose checksum did not is not reloaded. Failed reloads keep the previous
+    model and are recorded in ``last_error``. ``transform`` (e.g.
+    ``engine.compile_model``) is applied to each model before it is swapped in.
+    """
+
+    def __init__(self, path, poll_interval=2.0, on_reload=None, verify=True, transform=None):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.on_reload = on_reload
+        self.verify = verify
+        self.transform = transform
+        self.reloads = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._current = self._load()
+
+    def _load(self):
+        loaded = load_model_file(self.path, verify=self.verify)
+        if self.transform is not None:
+            loaded = loaded._replace(model=self.transform(loaded.model))
+        return loaded
+
+    @property
+    def current(self):
+        return self._current
+
+    @property
+    def model(self):
+        return self._current.model
+
+    def check(self):
+        """
+        Reload the model if its file changed. Returns True when a new model was swapped in.
+        """
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except FileNotFoundError as e:
+                self.last_error = e
+                return False
+
+            current = self._current
+            if mtime == current.mtime:
+                return False
+
+            try:
+                if file_checksum(self.path) == current.checksum:
+                    self._current = current._replace(mtime=mtime)
+                    return False
+                loaded = self._load()
+            except Exception as e:
+                self.last_error = e
+                return False
+
+            self._current = loaded
+            self.reloads += 1
+            self.last_error = None
+
+        if self.on_reload is not None:
+            self.on_reload(loaded)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def start(self):
+        """
+        Poll for changes in a background daemon thread
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export and verify drought model files")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Convert a pickled model to its native format")
+    export_parser.add_argument('source', help="Pickled model (.pkl / .joblib)")
+    export_parser.add_argument('destination', help="Native model file (.npz for forests, .json/.ubj for XGBoost)")
+
+    checksum_parser = subparsers.add_parser('checksum', help="Print and verify a model file's SHA-256")
+    checksum_parser.add_argument('path')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        loaded = load_model_file(args.source)
+        checksum = export_native(loaded.model, args.destination)
+        print(f"✅ Exported {args.source} -> {args.destination} (sha256 {checksum})")
+    else:
+        checksum = file_checksum(args.path)
+        expected = read_checksum_sidecar(args.path)
+        print(f"{checksum}  {args.path}")
+        if expected is not None and expected != checksum:
+            print(f"❌ Does not match sidecar checksum {expected}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
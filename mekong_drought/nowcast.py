@@ -0,0 +1,520 @@
+"""
+Streaming partial-month nowcast from daily observations.
+
+``Nowcaster`` keeps a fixed-size state per stream (a station or region):
+
+* this month's daily rainfall, NDVI composites and temperature, one slot
+  per day, so a re-sent or corrected day replaces the earlier value;
+* the last five complete months' rainfall and the last two months' NDVI;
+* rainfall totals and counts per calendar month, and running NDVI extremes.
+
+All streams live in shared arrays, and batches of records are ingested and
+scored with vectorized operations. Memory per stream stays constant however
+long the stream runs.
+
+The month-to-date values become the features of ``features``, with this
+month counted as complete. Unobserved days are filled from the stream's
+own mean rainfall for the month (``projection='climatology'``), or counted
+as dry (``'none'``).
+
+A stream is re-scored only if its inputs might change the prediction. For
+a compiled tree model, each feature value is mapped to the interval between
+the model's split thresholds that contains it (``CompiledEnsemble.split_cells``).
+If no feature left its interval, every tree takes the same path, so the
+previous prediction is still exact. Other models re-score every stream that
+received data.
+
+Records are JSON lines, for example
+``{"region": "mekong_delta", "date": "2025-01-14", "precipitation_mm": 3.2, "ndvi": 0.41}``.
+``ndvi`` and ``temp_mean_c`` are optional. They can be read by following a
+file as it grows, or from TCP clients.
+
+Usage:
+    python -m mekong_drought.nowcast --follow daily.jsonl
+    python -m mekong_drought.nowcast --follow daily.jsonl --from-start --once --all
+    python -m mekong_drought.nowcast --listen 127.0.0.1:8766
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .engine import DROUGHT_CATEGORIES, FEATURE_COLUMNS, predict_proba
+from .regions import month_key, month_label
+
+DEFAULT_BATCH_SIZE = 4096
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_PORT = 8766
+PROJECTIONS = ('climatology', 'none')
+
+MIN_CAPACITY = 64
+
+# Daily variables kept for the current month, in this order
+DAILY_VARIABLES = ('precipitation_mm', 'ndvi', 'temp_mean_c')
+RAIN, NDVI, TEMP = range(len(DAILY_VARIABLES))
+
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+Nowcast = namedtuple('Nowcast', ['streams', 'months', 'days', 'features', 'proba', 'predicted', 'previous'])
+Nowcast.__doc__ = """
+Streams re-scored by one ``Nowcaster.score`` call: stream names, month keys,
+last observed day, features (n, 11), probabilities, predicted class and the
+class before this update (-1 if none).
+"""
+
+# Per-stream state: name -> (shape after the stream axis, dtype, fill value)
+_STATE = {
+    '_month': ((), np.int64, -1),
+    '_daily': ((len(DAILY_VARIABLES), 31), np.float64, np.nan),
+    '_precip': ((5,), np.float64, np.nan),
+    '_ndvi': ((2,), np.float64, np.nan),
+    '_temp_last': ((), np.float64, np.nan),
+    '_month_totals': ((12,), np.float64, 0.0),
+    '_month_counts': ((12,), np.int64, 0),
+    '_ndvi_low': ((), np.float64, np.inf),
+    '_ndvi_high': ((), np.float64, -np.inf),
+    '_cells': ((len(FEATURE_COLUMNS),), np.int64, -2),
+    '_proba': ((len(DROUGHT_CATEGORIES),), np.float64, np.nan),
+    '_predicted': ((), np.int64, -1),
+    '_dirty': ((), bool, False),
+}
+
+
+def days_in_month(month):
+    """
+    Days in each month key
+    """
+    month = np.asarray(month, dtype=np.int64)
+    year, index = month // 12, month % 12
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    return _DAYS_IN_MONTH[index] + ((index == 1) & leap)
+
+
+def _nanmean(values, axis=-1):
+    count = (~np.isnan(values)).sum(axis=axis)
+    total = np.where(np.isnan(values), 0.0, values).sum(axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+
+class Nowcaster:
+    """
+    Month-to-date state and latest prediction for many daily streams
+    """
+
+    def __init__(self, model, projection='climatology'):
+        if projection not in PROJECTIONS:
+            raise ValueError(f"Unknown projection '{projection}'")
+        self.model = model
+        self.projection = projection
+        self._thresholds = model.split_thresholds() if hasattr(model, 'split_cells') else None
+        self.names = []
+        self._slot = {}
+        self._allocate(MIN_CAPACITY)
+        self.records = 0
+        self.stale = 0
+        self.scored = 0
+        self.skipped = 0
+
+    def _allocate(self, capacity):
+        for name, (shape, dtype, fill) in _STATE.items():
+            array = np.full((capacity,) + shape, fill, dtype=dtype)
+            if hasattr(self, name):
+                old = getattr(self, name)
+                array[:len(old)] = old
+            setattr(self, name, array)
+
+    def __len__(self):
+        return len(self.names)
+
+    def nbytes_per_stream(self):
+        return sum(getattr(self, name)[0].nbytes for name in _STATE)
+
+    def slots(self, streams):
+        """
+        Slot of each stream name, adding new streams as needed
+        """
+        slots = np.empty(len(streams), dtype=np.int64)
+        for i, name in enumerate(streams):
+            slot = self._slot.get(name)
+            if slot is None:
+                slot = self._slot[name] = len(self.names)
+                self.names.append(name)
+            slots[i] = slot
+        if len(self.names) > len(self._month):
+            self._allocate(max(len(self.names), 2 * len(self._month)))
+        return slots
+
+    def seed(self, stream, months, precipitation_mm, ndvi, temp_mean_c):
+        """
+        Warm a stream up with its complete monthly history; daily data then continues after the last month
+        """
+        slot = self.slots([stream])[0]
+        months = np.asarray(months, dtype=np.int64)
+        if len(months) == 0:
+            return
+        order = np.argsort(months, kind='stable')
+        months = months[order]
+        precip = np.asarray(precipitation_mm, dtype=np.float64)[order]
+        ndvi = np.asarray(ndvi, dtype=np.float64)[order]
+        temp = np.asarray(temp_mean_c, dtype=np.float64)[order]
+
+        present = ~np.isnan(precip)
+        self._month_totals[slot] = np.bincount(months[present] % 12, weights=precip[present], minlength=12)
+        self._month_counts[slot] = np.bincount(months[present] % 12, minlength=12)
+        self._ndvi_low[slot] = np.nanmin(ndvi, initial=np.inf)
+        self._ndvi_high[slot] = np.nanmax(ndvi, initial=-np.inf)
+
+        last = months[-1]
+        for ring, values in ((self._precip, precip), (self._ndvi, ndvi)):
+            wanted = last - np.arange(ring.shape[1])[::-1]
+            position = np.minimum(np.searchsorted(months, wanted), len(months) - 1)
+            ring[slot] = np.where(months[position] == wanted, values[position], np.nan)
+        self._temp_last[slot] = temp[~np.isnan(temp)][-1] if (~np.isnan(temp)).any() else np.nan
+        self._month[slot] = last + 1
+        self._daily[slot] = np.nan
+
+    @classmethod
+    def from_store(cls, model, store, index, projection='climatology'):
+        """
+        Nowcaster with one stream per stored region, seeded with its monthly history
+        """
+        nowcaster = cls(model, projection)
+        columns = {name: store.column(name) for name in ('precipitation_mm', 'ndvi', 'temp_mean_c')}
+        for region in index.regions:
+            rows, months = index.series(region)
+            nowcaster.seed(region, months, *(columns[name][rows] for name in ('precipitation_mm', 'ndvi', 'temp_mean_c')))
+        return nowcaster
+
+    def _rainfall(self, slots):
+        """
+        Month's rainfall estimate: observed days plus, for the rest, the stream's mean for that month
+        """
+        rain = self._daily[slots, RAIN]
+        observed = (~np.isnan(rain)).sum(axis=1)
+        total = np.where(np.isnan(rain), 0.0, rain).sum(axis=1)
+        if self.projection == 'none':
+            return total
+        month = self._month[slots] % 12
+        counts = self._month_counts[slots, month]
+        mean = np.where(counts > 0, self._month_totals[slots, month] / np.maximum(counts, 1), 0.0)
+        days = days_in_month(self._month[slots])
+        return total + mean * (days - observed) / days
+
+    def _push(self, slots, months, rain, ndvi, temp):
+        """
+        Append one complete month to the rolling windows and running totals of ``slots``
+        """
+        self._precip[slots, :-1] = self._precip[slots, 1:]
+        self._precip[slots, -1] = rain
+        self._ndvi[slots, :-1] = self._ndvi[slots, 1:]
+        self._ndvi[slots, -1] = ndvi
+        present = ~np.isnan(rain)
+        self._month_totals[slots[present], months[present] % 12] += rain[present]
+        self._month_counts[slots[present], months[present] % 12] += 1
+        self._ndvi_low[slots] = np.fmin(self._ndvi_low[slots], ndvi)
+        self._ndvi_high[slots] = np.fmax(self._ndvi_high[slots], ndvi)
+        self._temp_last[slots] = np.where(np.isnan(temp), self._temp_last[slots], temp)
+
+    def _roll(self, slots, month):
+        """
+        Close the current month of ``slots`` (unique) and start ``month``; skipped months are missing
+        """
+        active = slots[self._month[slots] >= 0]
+        if len(active):
+            observed = ~np.isnan(self._daily[active, RAIN]).all(axis=1)
+            rain = np.where(observed, self._rainfall(active), np.nan)
+            self._push(active, self._month[active], rain, _nanmean(self._daily[active, NDVI]),
+                       _nanmean(self._daily[active, TEMP]))
+            gaps = month - self._month[active] - 1
+            for k in range(min(int(gaps.max(initial=0)), self._precip.shape[1])):
+                skipped = active[gaps > k]
+                missing = np.full(len(skipped), np.nan)
+                self._push(skipped, self._month[skipped] + k + 1, missing, missing, missing)
+        self._daily[slots] = np.nan
+        self._month[slots] = month
+
+    def ingest(self, streams, months, days, precipitation_mm=None, ndvi=None, temp_mean_c=None):
+        """
+        Add daily records (arrays of equal length; NaN or None = not observed). Returns records applied.
+
+        Records for a month before a stream's current one are counted in ``stale`` and ignored.
+        """
+        slots = self.slots(streams)
+        months = np.asarray(months, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        if ((days < 1) | (days > days_in_month(months))).any():
+            raise ValueError("Day of month out of range")
+        values = [np.full(len(slots), np.nan) if column is None else np.asarray(column, dtype=np.float64)
+                  for column in (precipitation_mm, ndvi, temp_mean_c)]
+
+        applied = 0
+        for month in np.unique(months).tolist():
+            at = np.flatnonzero(months == month)
+            behind = slots[at][self._month[slots[at]] < month]
+            if len(behind):
+                self._roll(np.unique(behind), month)
+            at = at[self._month[slots[at]] == month]
+            for variable, column in enumerate(values):
+                observed = at[~np.isnan(column[at])]
+                self._daily[slots[observed], variable, days[observed] - 1] = column[observed]
+            self._dirty[slots[at]] = True
+            applied += len(at)
+        self.records += applied
+        self.stale += len(slots) - applied
+        return applied
+
+    def features(self, slots):
+        """
+        Nowcast feature rows (``engine.FEATURE_COLUMNS`` order) for ``slots``
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        rain = self._rainfall(slots)
+        ndvi = _nanmean(self._daily[slots, NDVI])
+        ndvi = np.where(np.isnan(ndvi), self._ndvi[slots, -1], ndvi)  # no composite yet: persistence
+        temp = _nanmean(self._daily[slots, TEMP])
+        temp = np.where(np.isnan(temp), self._temp_last[slots], temp)
+
+        precip = self._precip[slots]
+        precip_3month = np.where(np.isnan(precip[:, -2:]), 0.0, precip[:, -2:]).sum(axis=1) + rain
+        low = np.fmin(self._ndvi_low[slots], ndvi)
+        high = np.fmax(self._ndvi_high[slots], ndvi)
+        month = self._month[slots] % 12
+        monthly_mean = (self._month_totals[slots, month] + rain) / (self._month_counts[slots, month] + 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            columns = {
+                'ndvi': ndvi,
+                'precipitation_mm': rain,
+                'temp_mean_c': temp,
+                'precip_3month': precip_3month,
+                'precip_6month': np.where(np.isnan(precip), 0.0, precip).sum(axis=1) + rain,
+                'ndvi_3month_avg': _nanmean(np.column_stack([self._ndvi[slots], ndvi])),
+                'precip_3month_avg': precip_3month / 3,
+                'vci': np.where(high > low, (ndvi - low) / (high - low) * 100, np.nan),
+                'precip_anomaly': np.where(monthly_mean != 0, (rain - monthly_mean) / monthly_mean * 100, np.nan),
+                'precip_lag1': precip[:, -1],
+                'ndvi_lag1': self._ndvi[slots, -1],
+            }
+        return np.column_stack([columns[name] for name in FEATURE_COLUMNS])
+
+    def score(self, slots=None):
+        """
+        Re-score streams with new data (or ``slots``) whose inputs might change the prediction.
+
+        Streams with a missing feature are not scored.
+        """
+        slots = np.flatnonzero(self._dirty[:len(self.names)]) if slots is None else np.asarray(slots, dtype=np.int64)
+        self._dirty[slots] = False
+        features = self.features(slots)
+        complete = ~np.isnan(features).any(axis=1)
+        if self._thresholds is not None:
+            cells = self.model.split_cells(features, self._thresholds)
+            changed = complete & (cells != self._cells[slots]).any(axis=1)
+            self._cells[slots[changed]] = cells[changed]
+        else:
+            changed = complete
+        self.skipped += int(complete.sum() - changed.sum())
+
+        slots, features = slots[changed], features[changed]
+        previous = self._predicted[slots].copy()
+        proba = predict_proba(self.model, features) if len(slots) else np.zeros((0, len(DROUGHT_CATEGORIES)))
+        predicted = np.asarray(self.model.classes_)[proba.argmax(axis=1)] if len(slots) else np.zeros(0, dtype=int)
+        self._proba[slots] = proba
+        self._predicted[slots] = predicted
+        self.scored += len(slots)
+        last_day = np.where(np.isnan(self._daily[slots]).all(axis=1), 0, np.arange(1, 32)).max(axis=1, initial=0)
+        return Nowcast([self.names[slot] for slot in slots.tolist()], self._month[slots], last_day,
+                       features, proba, predicted, previous)
+
+    def current(self, stream):
+        """
+        Latest ``(month label, class, probabilities)`` of one stream; class -1 if never scored
+        """
+        slot = self._slot[stream]
+        return month_label(int(self._month[slot])), int(self._predicted[slot]), self._proba[slot].copy()
+
+
+def parse_records(lines):
+    """
+    Columns of JSON-line records; returns ``(columns, rejected line count)``.
+
+    Lines that are not JSON, lack a field or carry an impossible date (month
+    13, February 30th) are rejected here, so one bad line never reaches
+    ``Nowcaster.ingest`` and takes the rest of its batch down with it.
+    """
+    streams, months, days, rain, ndvi, temp = [], [], [], [], [], []
+    rejected = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            date = record['date']
+            year, month, day = int(date[0:4]), int(date[5:7]), int(date[8:10])
+            if not 1 <= month <= 12 or not 1 <= day <= days_in_month(month_key(year, month)):
+                raise ValueError(f"Invalid date {date!r}")
+            values = (str(record['region']), int(month_key(year, month)), day,
+                      float(record.get('precipitation_mm', np.nan)), float(record.get('ndvi', np.nan)),
+                      float(record.get('temp_mean_c', np.nan)))
+        except (ValueError, KeyError, TypeError, IndexError):
+            rejected += 1
+            continue
+        for column, value in zip((streams, months, days, rain, ndvi, temp), values):
+            column.append(value)
+    return (streams, months, days, rain, ndvi, temp), rejected
+
+
+def result_records(result, changes_only=True):
+    """
+    One dict per re-scored stream (only class changes unless ``changes_only`` is False)
+    """
+    records = []
+    for i, stream in enumerate(result.streams):
+        predicted, previous = int(result.predicted[i]), int(result.previous[i])
+        if changes_only and predicted == previous:
+            continue
+        records.append({
+            'region': stream, 'month': month_label(int(result.months[i])), 'day': int(result.days[i]),
+            'predicted_category': DROUGHT_CATEGORIES[predicted],
+            'previous_category': DROUGHT_CATEGORIES[previous] if previous >= 0 else None,
+            'confidence': round(float(result.proba[i].max()), 4),
+        })
+    return records
+
+
+async def follow_file(path, queue, poll_interval=DEFAULT_POLL_INTERVAL, from_start=False, once=False):
+    """
+    Put lines appended to ``path`` on ``queue``; with ``once``, stop at the end of the file
+    """
+    with open(path, encoding='utf-8') as f:
+        if not from_start:
+            f.seek(0, 2)
+        pending = ''
+        while True:
+            chunk = f.readline()
+            if chunk:
+                pending += chunk
+                if pending.endswith('\n'):
+                    await queue.put(pending)
+                    pending = ''
+                continue
+            if once:
+                if pending:
+                    await queue.put(pending)
+                await queue.put(None)
+                return
+            await asyncio.sleep(poll_interval)
+
+
+async def listen(host, port, queue):
+    """
+    Accept TCP clients and put every line they send on ``queue``
+    """
+    async def handle(reader, writer):
+        try:
+            while line := await reader.readline():
+                await queue.put(line.decode('utf-8', errors='replace'))
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def consume(nowcaster, queue, batch_size=DEFAULT_BATCH_SIZE, on_result=None):
+    """
+    Ingest and score queued lines in batches until a ``None`` arrives
+    """
+    rejected = 0
+    done = False
+    while not done:
+        lines = [await queue.get()]
+        while len(lines) < batch_size and not queue.empty():
+            lines.append(queue.get_nowait())
+        if None in lines:
+            done = True
+            lines = [line for line in lines if line is not None]
+        columns, bad = parse_records(lines)
+        rejected += bad
+        if columns[0]:
+            nowcaster.ingest(*columns)
+            result = nowcaster.score()
+            if on_result is not None:
+                on_result(result)
+    return rejected
+
+
+def main(argv=None):
+    from .engine import compile_model, resolve_model_path
+    from .model_store import load_model_file
+    from .regions import RegionIndex
+    from .store import STORE_PATH, ColumnStore
+
+    parser = argparse.ArgumentParser(description="Nowcast the current month from streaming daily observations")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--follow', metavar='PATH', help="Follow a JSON-lines file as it grows")
+    source.add_argument('--listen', metavar='HOST:PORT', help=f"Accept JSON lines over TCP (e.g. 127.0.0.1:{DEFAULT_PORT})")
+    parser.add_argument('--from-start', action='store_true', help="Read the followed file from its beginning")
+    parser.add_argument('--once', action='store_true', help="Stop at the end of the followed file")
+    parser.add_argument('--store', default=STORE_PATH, help="Seed streams with the stored monthly history")
+    parser.add_argument('--no-seed', action='store_true', help="Start every stream without history")
+    parser.add_argument('--model', default=None,
+                        help="Model file, pickle or native format (default: native export if present)")
+    parser.add_argument('--projection', choices=PROJECTIONS, default='climatology',
+                        help="How to fill days not observed yet this month")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument('--all', action='store_true', help="Print every re-scored stream, not only class changes")
+    args = parser.parse_args(argv)
+
+    try:
+        model = compile_model(load_model_file(args.model or resolve_model_path()).model)
+        if args.no_seed:
+            nowcaster = Nowcaster(model, args.projection)
+        else:
+            store = ColumnStore.open(args.store)
+            nowcaster = Nowcaster.from_store(model, store, RegionIndex.from_store(store), args.projection)
+    except (FileNotFoundError, ValueError, KeyError) as error:
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+
+    def on_result(result):
+        for record in result_records(result, changes_only=not args.all):
+            print(json.dumps(record), flush=True)
+
+    async def run():
+        queue = asyncio.Queue(maxsize=8 * args.batch_size)
+        if args.follow:
+            reader = asyncio.create_task(follow_file(args.follow, queue, args.poll_interval, args.from_start, args.once))
+        else:
+            host, _, port = args.listen.rpartition(':')
+            reader = await listen(host or '127.0.0.1', int(port), queue)
+            print(f"✅ Listening on {args.listen}", file=sys.stderr)
+        try:
+            return await consume(nowcaster, queue, args.batch_size, on_result)
+        finally:
+            if args.listen:
+                reader.close()
+
+    started = time.perf_counter()
+    try:
+        rejected = asyncio.run(run())
+    except FileNotFoundError as error:
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        rejected = 0
+    elapsed = time.perf_counter() - started
+    print(f"✅ {nowcaster.records:,} records for {len(nowcaster):,} streams in {elapsed:.2f}s: "
+          f"{nowcaster.scored:,} re-scored, {nowcaster.skipped:,} skipped (no split crossed), "
+          f"{nowcaster.stale:,} stale, {rejected:,} rejected", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
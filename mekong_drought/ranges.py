@@ -0,0 +1,277 @@
+"""
+Prefix-sum index for date-range aggregates over a region's monthly series.
+
+``RangeIndex`` keeps, for every month from a region's first to its last,
+the running sum and count of each stored feature and the running count of
+each observed class. Any date-range sum, mean or class count is then two
+lookups and a subtraction, whatever the range's length. Months with no row
+add nothing. ``start`` / ``end`` may be arrays of month keys, so "each year's
+Dec-Apr rainfall" is one vectorized query rather than a group-by.
+
+Seasons are windows of calendar months, labelled by the year they end in,
+so the Dec 2020 - Apr 2021 dry season is 2021. ``season_bounds`` lists every
+window that overlaps the data; ``seasonal`` and ``recent_seasons`` aggregate
+over them.
+
+``append`` adds or revises one month. A new month at the end costs O(1),
+amortized. A revised or back-filled month re-accumulates only the months
+after it. ``refresh`` appends whatever rows were added to the store since
+the index was built.
+
+Usage:
+    python -m mekong_drought.ranges query precipitation_mm 2020-12 2021-04
+    python -m mekong_drought.ranges seasonal vci --months 12-4 --last 3
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .engine import DROUGHT_CATEGORIES
+from .regions import month_key, month_label
+from .store import FLOAT_COLUMNS, UNLABELLED
+
+# Dry season as in features.DRY_SEASON_MONTHS
+DRY_SEASON = (12, 4)
+
+MIN_CAPACITY = 64
+
+
+class RangeIndex:
+    """
+    Running sums, counts and class counts over one region's months
+    """
+
+    def __init__(self, months, values, labels, columns=FLOAT_COLUMNS, region=None, rows_seen=0):
+        self.columns = list(columns)
+        self._column = {name: i for i, name in enumerate(self.columns)}
+        self.region = region
+        self.rows_seen = rows_seen
+        self.first = 0
+        self._size = 0
+        self._allocate(MIN_CAPACITY)
+
+        months = np.asarray(months, dtype=np.int64)
+        if len(months):
+            self.first = int(months.min())
+            self._reserve(int(months.max()) - self.first + 1)
+            self._size = int(months.max()) - self.first + 1
+            self._values[months - self.first] = np.asarray(values, dtype=np.float64).reshape(len(months), -1)
+            self._labels[months - self.first] = labels
+            self._accumulate(0)
+
+    @classmethod
+    def from_store(cls, store, index, region, columns=FLOAT_COLUMNS):
+        """
+        Index ``region``'s series in a ``ColumnStore`` (latest row per month, as ``RegionIndex``)
+        """
+        rows, months = index.series(region)
+        values = np.column_stack([store.column(name)[rows] for name in columns]) if len(rows) else np.zeros((0, 0))
+        return cls(months, values, store.column('drought_label')[rows], columns, region, len(store))
+
+    def _allocate(self, capacity):
+        self._values = np.full((capacity, len(self.columns)), np.nan)
+        self._labels = np.full(capacity, UNLABELLED, dtype=np.int64)
+        self._sums = np.zeros((capacity + 1, len(self.columns)))
+        self._counts = np.zeros((capacity + 1, len(self.columns)), dtype=np.int64)
+        self._classes = np.zeros((capacity + 1, len(DROUGHT_CATEGORIES)), dtype=np.int64)
+
+    def _reserve(self, size, shift=0):
+        """
+        Make room for ``size`` months, moving the existing ones ``shift`` months later.
+
+        Running totals are kept when nothing moves; after a shift they must be re-accumulated from 0.
+        """
+        if size <= len(self._values) and shift == 0:
+            return
+        end = self._size + 1
+        old = self._values[:self._size], self._labels[:self._size]
+        totals = self._sums[:end], self._counts[:end], self._classes[:end]
+        self._allocate(max(MIN_CAPACITY, size, 2 * len(self._values)))
+        self._values[shift:shift + len(old[0])] = old[0]
+        self._labels[shift:shift + len(old[1])] = old[1]
+        if shift == 0:
+            self._sums[:end], self._counts[:end], self._classes[:end] = totals
+
+    def _accumulate(self, position):
+        """
+        Rebuild the running totals from month ``position`` to the end
+        """
+        values = self._values[position:self._size]
+        present = ~np.isnan(values)
+        end = self._size + 1
+        self._sums[position + 1:end] = self._sums[position] + np.where(present, values, 0.0).cumsum(axis=0)
+        self._counts[position + 1:end] = self._counts[position] + present.cumsum(axis=0)
+        labels = self._labels[position:self._size]
+        one_hot = labels[:, None] == np.arange(len(DROUGHT_CATEGORIES))
+        self._classes[position + 1:end] = self._classes[position] + one_hot.cumsum(axis=0)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last(self):
+        return self.first + self._size - 1
+
+    def append(self, month, values, label=UNLABELLED):
+        """
+        Add or replace one month; ``values`` maps column names to values (missing columns are NaN)
+        """
+        month = int(month)
+        row = np.array([values.get(name, np.nan) for name in self.columns], dtype=np.float64)
+        if self._size == 0:
+            self.first = month
+        if month < self.first:
+            shift = self.first - month
+            self._reserve(self._size + shift, shift)
+            self.first, self._size, position, start = month, self._size + shift, 0, 0
+        else:
+            position = month - self.first
+            start = min(position, self._size)
+            if position >= self._size:
+                self._reserve(position + 1)
+                self._size = position + 1
+        self._values[position] = row
+        self._labels[position] = label
+        self._accumulate(start)
+
+    def refresh(self, store):
+        """
+        Append this region's store rows added since the index was built; returns how many
+        """
+        rows = np.arange(self.rows_seen, len(store))
+        self.rows_seen = len(store)
+        if self.region is not None:
+            rows = rows[store.column('region')[rows] == store.categories['region'].index(self.region)]
+        months = month_key(store.column('year')[rows], store.column('month')[rows])
+        labels = store.column('drought_label')[rows]
+        columns = {name: store.column(name)[rows] for name in self.columns}
+        for i, month in enumerate(months.tolist()):
+            self.append(month, {name: float(values[i]) for name, values in columns.items()}, int(labels[i]))
+        return len(rows)
+
+    def _bounds(self, start, end):
+        lo = np.clip(np.asarray(start, dtype=np.int64) - self.first, 0, self._size)
+        hi = np.clip(np.asarray(end, dtype=np.int64) - self.first + 1, 0, self._size)
+        return lo, np.maximum(hi, lo)
+
+    def sum(self, column, start, end):
+        """
+        Sum of ``column`` over months ``start`` to ``end`` (month keys, inclusive)
+        """
+        i = self._column[column]
+        lo, hi = self._bounds(start, end)
+        return self._sums[hi, i] - self._sums[lo, i]
+
+    def count(self, column, start, end):
+        """
+        Months with a value of ``column`` from ``start`` to ``end``
+        """
+        i = self._column[column]
+        lo, hi = self._bounds(start, end)
+        return self._counts[hi, i] - self._counts[lo, i]
+
+    def mean(self, column, start, end):
+        """
+        Mean of ``column`` from ``start`` to ``end``, NaN where the range has no values
+        """
+        total, count = self.sum(column, start, end), self.count(column, start, end)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+    def class_counts(self, start, end):
+        """
+        Labelled months of each class from ``start`` to ``end``, shape (..., n_classes)
+        """
+        lo, hi = self._bounds(start, end)
+        return self._classes[hi] - self._classes[lo]
+
+    def season_bounds(self, first_month=DRY_SEASON[0], last_month=DRY_SEASON[1]):
+        """
+        ``(season years, start keys, end keys)`` of every window overlapping the index
+        """
+        if self._size == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        wraps = int(last_month < first_month)
+        years = np.arange(self.first // 12, self.last // 12 + 1 + wraps)
+        starts, ends = month_key(years - wraps, first_month), month_key(years, last_month)
+        keep = (ends >= self.first) & (starts <= self.last)
+        return years[keep], starts[keep], ends[keep]
+
+    def seasonal(self, column, first_month=DRY_SEASON[0], last_month=DRY_SEASON[1]):
+        """
+        Per-season sum, mean and month count of ``column``, one row per season year
+        """
+        years, starts, ends = self.season_bounds(first_month, last_month)
+        counts = self.count(column, starts, ends)
+        return pd.DataFrame({
+            'start': [month_label(key) for key in starts.tolist()],
+            'end': [month_label(key) for key in ends.tolist()],
+            'months': counts, 'complete': counts == ends - starts + 1,
+            'sum': self.sum(column, starts, ends), 'mean': self.mean(column, starts, ends),
+        }, index=pd.Index(years, name='season'))
+
+    def recent_seasons(self, column, n, first_month=DRY_SEASON[0], last_month=DRY_SEASON[1]):
+        """
+        Mean of ``column`` over all months of the last ``n`` complete seasons, and those seasons' years
+        """
+        years, starts, ends = self.season_bounds(first_month, last_month)
+        complete = self.count(column, starts, ends) == ends - starts + 1
+        years, starts, ends = years[complete][-n:], starts[complete][-n:], ends[complete][-n:]
+        count = self.count(column, starts, ends).sum()
+        return (self.sum(column, starts, ends).sum() / count if count else np.nan), years
+
+
+def _month_arg(text):
+    year, month = (int(part) for part in text.split('-'))
+    return int(month_key(year, month))
+
+
+def main(argv=None):
+    from .regions import RegionIndex
+    from .store import DEFAULT_REGION, STORE_PATH, ColumnStore
+
+    parser = argparse.ArgumentParser(description="Date-range aggregates over a region's monthly series")
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--region', default=DEFAULT_REGION)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    query_parser = subparsers.add_parser('query', help="Sum, mean and class counts over one date range")
+    query_parser.add_argument('column', choices=FLOAT_COLUMNS)
+    query_parser.add_argument('start', type=_month_arg, help="First month (YYYY-MM)")
+    query_parser.add_argument('end', type=_month_arg, help="Last month (YYYY-MM)")
+
+    seasonal_parser = subparsers.add_parser('seasonal', help="Per-season aggregates of one column")
+    seasonal_parser.add_argument('column', choices=FLOAT_COLUMNS)
+    seasonal_parser.add_argument('--months', default='12-4', help="First and last calendar month (default: 12-4)")
+    seasonal_parser.add_argument('--last', type=int, default=3, help="Also average the last N complete seasons")
+
+    args = parser.parse_args(argv)
+
+    try:
+        store = ColumnStore.open(args.store)
+        index = RangeIndex.from_store(store, RegionIndex.from_store(store), args.region)
+        if args.command == 'query':
+            counts = index.class_counts(args.start, args.end)
+            print(f"{args.column} {month_label(args.start)} to {month_label(args.end)}: "
+                  f"sum {index.sum(args.column, args.start, args.end):,.2f}, "
+                  f"mean {index.mean(args.column, args.start, args.end):,.3f} "
+                  f"over {index.count(args.column, args.start, args.end)} months")
+            for category, count in zip(DROUGHT_CATEGORIES, counts.tolist()):
+                print(f"  {category:<20}{count:>4}")
+        else:
+            first_month, last_month = (int(part) for part in args.months.split('-'))
+            print(index.seasonal(args.column, first_month, last_month).to_string(float_format='{:,.2f}'.format))
+            mean, years = index.recent_seasons(args.column, args.last, first_month, last_month)
+            print(f"\nMean over the last {len(years)} complete seasons ({', '.join(map(str, years))}): {mean:,.3f}")
+    except (FileNotFoundError, ValueError, KeyError) as error:
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
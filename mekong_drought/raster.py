@@ -0,0 +1,253 @@
+"""
+Gridded (raster) scoring.
+
+Scores per-pixel feature grids for the whole delta. Inputs are memory-mapped
+``.npy`` arrays, either one ``<feature>.npy`` per model feature in a
+directory or a single stacked array of shape (n_features, height, width) in
+``engine.FEATURE_COLUMNS`` order. The grid is cut into square tiles so memory
+stays bounded, tiles are scored in a process pool (each worker opens the
+memory maps itself, nothing large is pickled) and results are written
+straight into memory-mapped outputs:
+
+* ``drought_class.npy`` (int8, -1 for nodata)
+* ``confidence.npy`` (float32, NaN for nodata)
+* ``contributions.npy`` with ``--explain``: (n_features + 1, height, width)
+  float32 contributions of each feature (then the bias) for the predicted
+  class, NaN for nodata; they sum to the model's raw score for the class (the
+  probability for forests, the margin for boosted models)
+
+Pixels outside the mask, equal to the nodata value or with any NaN feature
+are not sent to the model. ``precip_3month_avg`` and ``precip_lag1`` grids
+may be omitted; they are derived like the dashboard does.
+
+Usage:
+    python -m mekong_drought.raster grids/ maps/ --mask grids/land_mask.npy --workers 4
+    python -m mekong_drought.raster grids/ maps/ --explain
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from .engine import DERIVED_FEATURES, FEATURE_COLUMNS, compile_model, predict_proba, resolve_model_path
+from .model_store import load_model_file
+
+CLASS_FILE = 'drought_class.npy'
+CONFIDENCE_FILE = 'confidence.npy'
+CONTRIBUTIONS_FILE = 'contributions.npy'
+NODATA_CLASS = -1
+
+DEFAULT_TILE_SIZE = 256
+
+# Per-process state set up by _init_worker
+_WORKER = {}
+
+
+def open_feature_grids(source):
+    """
+    Memory-mapped feature grids keyed by feature name.
+
+    ``source`` is a directory of ``<feature>.npy`` files or a stacked ``.npy``.
+    Derivable features that are missing are left out of the result.
+    """
+    if os.path.isdir(source):
+        grids = {}
+        for name in FEATURE_COLUMNS:
+            path = os.path.join(source, name + '.npy')
+            if os.path.exists(path):
+                grids[name] = np.load(path, mmap_mode='r')
+    else:
+        stack = np.load(source, mmap_mode='r')
+        if stack.ndim != 3 or stack.shape[0] != len(FEATURE_COLUMNS):
+            raise ValueError(f"Stacked grid must have shape ({len(FEATURE_COLUMNS)}, height, width), got {stack.shape}")
+        grids = {name: stack[i] for i, name in enumerate(FEATURE_COLUMNS)}
+
+    missing = [name for name in FEATURE_COLUMNS
+               if name not in grids and (name not in DERIVED_FEATURES or DERIVED_FEATURES[name][0] not in grids)]
+    if missing:
+        raise FileNotFoundError(f"No grid for features: {', '.join(missing)}")
+    shapes = {grid.shape for grid in grids.values()}
+    if len(shapes) != 1 or len(next(iter(shapes))) != 2:
+        raise ValueError(f"Feature grids must be 2-D and share one shape, got {sorted(shapes)}")
+    return grids
+
+
+def iter_tiles(shape, tile_size=DEFAULT_TILE_SIZE):
+    """
+    ``(row_start, row_stop, col_start, col_stop)`` for every tile, row-major
+    """
+    height, width = shape
+    for row in range(0, height, tile_size):
+        for col in range(0, width, tile_size):
+            yield row, min(row + tile_size, height), col, min(col + tile_size, width)
+
+
+def _init_worker(model_path, source, output_dir, mask_path, nodata, explain=False, model=None):
+    _WORKER['model'] = model if model is not None else compile_model(load_model_file(model_path).model)
+    _WORKER['grids'] = open_feature_grids(source)
+    _WORKER['mask'] = None if mask_path is None else np.load(mask_path, mmap_mode='r')
+    _WORKER['nodata'] = nodata
+    _WORKER['classes'] = np.load(os.path.join(output_dir, CLASS_FILE), mmap_mode='r+')
+    _WORKER['confidence'] = np.load(os.path.join(output_dir, CONFIDENCE_FILE), mmap_mode='r+')
+    _WORKER['contributions'] = (np.load(os.path.join(output_dir, CONTRIBUTIONS_FILE), mmap_mode='r+')
+                                if explain else None)
+
+
+def _score_tile(bounds):
+    """
+    Score one tile into the output maps; returns (pixels, valid pixels, CPU seconds)
+    """
+    start = time.process_time()
+    row_start, row_stop, col_start, col_stop = bounds
+    window = (slice(row_start, row_stop), slice(col_start, col_stop))
+    grids = _WORKER['grids']
+
+    n_pixels = (row_stop - row_start) * (col_stop - col_start)
+    features = np.empty((n_pixels, len(FEATURE_COLUMNS)))
+    for i, name in enumerate(FEATURE_COLUMNS):
+        if name in grids:
+            features[:, i] = grids[name][window].ravel()
+        else:
+            source, rule = DERIVED_FEATURES[name]
+            features[:, i] = rule(np.asarray(grids[source][window], dtype=np.float64).ravel())
+
+    valid = ~np.isnan(features).any(axis=1)
+    if _WORKER['nodata'] is not None:
+        valid &= ~(features == _WORKER['nodata']).any(axis=1)
+    if _WORKER['mask'] is not None:
+        valid &= np.asarray(_WORKER['mask'][window], dtype=bool).ravel()
+
+    classes = np.full(n_pixels, NODATA_CLASS, dtype=np.int8)
+    confidence = np.full(n_pixels, np.nan, dtype=np.float32)
+    explain = _WORKER['contributions'] is not None
+    if explain:
+        contributions = np.full((len(FEATURE_COLUMNS) + 1, n_pixels), np.nan, dtype=np.float32)
+    if valid.any():
+        model = _WORKER['model']
+        if explain:
+            # Contributions sum to the model output, so one tree pass gives both
+            pixel_contributions = model.predict_contributions(features[valid])
+            proba = model.proba_from_contributions(pixel_contributions)
+            best = proba.argmax(axis=1)
+            contributions[:, valid] = pixel_contributions[np.arange(len(best)), best].T
+        else:
+            proba = predict_proba(model, features[valid])
+        classes[valid] = np.asarray(model.classes_)[proba.argmax(axis=1)]
+        confidence[valid] = proba.max(axis=1)
+
+    shape = (row_stop - row_start, col_stop - col_start)
+    _WORKER['classes'][window] = classes.reshape(shape)
+    _WORKER['confidence'][window] = confidence.reshape(shape)
+    if explain:
+        _WORKER['contributions'][(slice(None),) + window] = contributions.reshape((-1,) + shape)
+    return n_pixels, int(valid.sum()), time.process_time() - start
+
+
+def score_raster(source, output_dir, model_path=None, mask_path=None, nodata=None,
+                 tile_size=DEFAULT_TILE_SIZE, workers=None, model=None, log=None, explain=False):
+    """
+    Score every pixel of ``source`` into class and confidence maps in ``output_dir``.
+
+    ``explain`` also writes per-pixel feature contributions (``CONTRIBUTIONS_FILE``).
+
+    ``workers`` processes score tiles in parallel (default: one per CPU; 1
+    scores in this process, using ``model`` if given). Returns a dict with
+    pixel counts, wall and CPU seconds, pixels/sec and pixels/sec per core.
+    """
+    if tile_size <= 0:
+        raise ValueError("tile_size must be positive")
+    workers = workers or os.cpu_count() or 1
+    model_path = model_path or resolve_model_path()
+
+    shape = next(iter(open_feature_grids(source).values())).shape
+    if mask_path is not None and np.load(mask_path, mmap_mode='r').shape != shape:
+        raise ValueError(f"Mask shape does not match the feature grids {shape}")
+    os.makedirs(output_dir, exist_ok=True)
+    open_memmap(os.path.join(output_dir, CLASS_FILE), mode='w+', dtype=np.int8, shape=shape).flush()
+    open_memmap(os.path.join(output_dir, CONFIDENCE_FILE), mode='w+', dtype=np.float32, shape=shape).flush()
+    if explain:
+        open_memmap(os.path.join(output_dir, CONTRIBUTIONS_FILE), mode='w+', dtype=np.float32,
+                    shape=(len(FEATURE_COLUMNS) + 1,) + tuple(shape)).flush()
+
+    tiles = list(iter_tiles(shape, tile_size))
+    init_args = (model_path, source, output_dir, mask_path, nodata, explain)
+    start = time.perf_counter()
+    n_pixels = n_valid = 0
+    cpu_seconds = 0.0
+
+    def collect(results):
+        nonlocal n_pixels, n_valid, cpu_seconds
+        for done, (pixels, valid, seconds) in enumerate(results, 1):
+            n_pixels += pixels
+            n_valid += valid
+            cpu_seconds += seconds
+            if log is not None and (done % 100 == 0 or done == len(tiles)):
+                log(f"{done:,}/{len(tiles):,} tiles ({n_pixels / (time.perf_counter() - start):,.0f} pixels/sec)")
+
+    if workers == 1:
+        _init_worker(*init_args, model=model)
+        try:
+            collect(map(_score_tile, tiles))
+        finally:
+            _WORKER['classes'].flush()
+            _WORKER['confidence'].flush()
+            if _WORKER['contributions'] is not None:
+                _WORKER['contributions'].flush()
+            _WORKER.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            collect(pool.map(_score_tile, tiles, chunksize=max(1, len(tiles) // (workers * 8))))
+
+    elapsed = time.perf_counter() - start
+    return {
+        'shape': shape,
+        'tiles': len(tiles),
+        'workers': workers,
+        'pixels': n_pixels,
+        'scored': n_valid,
+        'skipped': n_pixels - n_valid,
+        'seconds': elapsed,
+        'cpu_seconds': cpu_seconds,
+        'pixels_per_sec': n_pixels / elapsed if elapsed > 0 else float('inf'),
+        'pixels_per_sec_per_core': n_pixels / cpu_seconds if cpu_seconds > 0 else float('inf'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score per-pixel drought feature grids")
+    parser.add_argument('input', help="Directory of <feature>.npy grids, or a stacked (11, H, W) .npy")
+    parser.add_argument('output', help="Directory for drought_class.npy and confidence.npy")
+    parser.add_argument('--model', default=None,
+                        help="Model file, pickle or native format (default: native export if present)")
+    parser.add_argument('--mask', default=None, help=".npy grid, nonzero where pixels should be scored")
+    parser.add_argument('--nodata', type=float, default=None, help="Feature value marking missing pixels")
+    parser.add_argument('--tile-size', type=int, default=DEFAULT_TILE_SIZE, help="Tile edge length in pixels")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--explain', action='store_true',
+                        help=f"Also write per-pixel feature contributions to {CONTRIBUTIONS_FILE}")
+    parser.add_argument('--quiet', action='store_true', help="Only print the final summary")
+    args = parser.parse_args(argv)
+
+    if args.tile_size <= 0:
+        parser.error("--tile-size must be positive")
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    stats = score_raster(args.input, args.output, model_path=args.model, mask_path=args.mask,
+                         nodata=args.nodata, tile_size=args.tile_size, workers=args.workers,
+                         log=None if args.quiet else log, explain=args.explain)
+    height, width = stats['shape']
+    log(f"✅ Scored {stats['scored']:,} of {stats['pixels']:,} pixels ({height}x{width}, "
+        f"{stats['skipped']:,} nodata) in {stats['seconds']:.2f}s with {stats['workers']} worker(s) - "
+        f"{stats['pixels_per_sec']:,.0f} pixels/sec, {stats['pixels_per_sec_per_core']:,.0f} pixels/sec per core")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""
+Multi-region time series, lookup and cross-region scoring.
+
+Rows of the column store (``store``) carry a ``region``. ``RegionIndex``
+sorts row numbers by (region, month) once, so a region's whole series is a
+slice and "every region in month X" is one vectorized ``searchsorted``. When a
+(region, month) was appended more than once, the last row wins.
+
+``score_month`` gathers the region x feature matrix for one month and scores
+it with a single ``predict_proba`` call. ``RegionForecasts`` holds the same
+results for every stored row, computed once per model and store size. It is
+saved next to the store as ``forecasts.npz``, so the dashboard only does
+lookups.
+
+Usage:
+    python -m mekong_drought.regions precompute
+    python -m mekong_drought.regions score-month 2024 3
+    python -m mekong_drought.regions climatology data/region_climatology.npz
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from . import rules
+from .climatology import Climatology
+from .engine import (DROUGHT_CATEGORIES, FEATURE_COLUMNS, RISK_LEVELS, compile_model, predict_proba,
+                     resolve_model_path)
+from .model_store import load_model_file
+from .store import STORE_PATH, ColumnStore
+
+FORECASTS_FILE = 'forecasts.npz'
+FORMAT_VERSION = 1
+
+CHUNK_SIZE = 100_000
+
+PROBA_COLUMNS = ['proba_' + category.lower().replace(' ', '_') for category in DROUGHT_CATEGORIES]
+
+
+def month_key(year, month):
+    """
+    Months since year 0 (``year * 12 + month - 1``), the index's time axis
+    """
+    return np.asarray(year, dtype=np.int64) * 12 + np.asarray(month, dtype=np.int64) - 1
+
+
+def month_label(key):
+    return f'{key // 12:04d}-{key % 12 + 1:02d}'
+
+
+class RegionIndex:
+    """
+    Store rows ordered by (region, month), latest row per pair
+    """
+
+    def __init__(self, regions, region_codes, months, rows=None):
+        self.regions = list(regions)
+        self._codes = {region: code for code, region in enumerate(self.regions)}
+        region_codes = np.asarray(region_codes, dtype=np.int64)
+        months = np.asarray(months, dtype=np.int64)
+        rows = np.arange(len(months)) if rows is None else np.asarray(rows)
+
+        # lexsort is stable, so repeated (region, month) pairs stay in append order; keep the last
+        order = np.lexsort((months, region_codes))
+        self.stride = int(months.max()) + 1 if len(months) else 1
+        keys = region_codes[order] * self.stride + months[order]
+        latest = np.r_[keys[1:] != keys[:-1], True] if len(keys) else np.zeros(0, dtype=bool)
+        self.keys = keys[latest]
+        self.rows = rows[order][latest]
+        self.months = months[order][latest]
+        self.starts = np.searchsorted(self.keys, np.arange(len(self.regions) + 1) * self.stride)
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(store.categories['region'], store.column('region'),
+                   month_key(store.column('year'), store.column('month')))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def code(self, region):
+        try:
+            return self._codes[region]
+        except KeyError:
+            raise KeyError(f"Unknown region '{region}'") from None
+
+    def series(self, region):
+        """
+        ``(rows, month keys)`` of a region in date order
+        """
+        code = self.code(region)
+        window = slice(self.starts[code], self.starts[code + 1])
+        return self.rows[window], self.months[window]
+
+    def rows_for_month(self, year, month, regions=None):
+        """
+        Store row of every region (or of ``regions``) in one month; -1 where missing
+        """
+        codes = np.arange(len(self.regions)) if regions is None else np.array([self.code(r) for r in regions])
+        if len(self.keys) == 0:
+            return np.full(len(codes), -1)
+        wanted = codes * self.stride + month_key(year, month)
+        position = np.minimum(np.searchsorted(self.keys, wanted), len(self.keys) - 1)
+        return np.where(self.keys[position] == wanted, self.rows[position], -1)
+
+    def available_months(self):
+        """
+        Sorted month keys present for at least one region
+        """
+        return np.unique(self.months)
+
+
+def feature_matrix(store, rows):
+    """
+    (len(rows), 11) float64 features of the given store rows
+    """
+    return np.column_stack([store.column(name)[rows] for name in FEATURE_COLUMNS]).astype(np.float64)
+
+
+def _results(model, store, rows):
+    """
+    Class, confidence, probabilities and risk score for store ``rows`` in one pass
+    """
+    n_rows = len(rows)
+    predicted = np.full(n_rows, -1, dtype=np.int8)
+    confidence = np.full(n_rows, np.nan, dtype=np.float32)
+    proba = np.full((n_rows, len(DROUGHT_CATEGORIES)), np.nan, dtype=np.float32)
+    risk = np.full(n_rows, -1, dtype=np.int8)
+
+    features = feature_matrix(store, rows)
+    valid = ~np.isnan(features).any(axis=1)
+    if valid.any():
+        scored = predict_proba(model, features[valid])
+        predicted[valid] = np.asarray(model.classes_)[scored.argmax(axis=1)]
+        confidence[valid] = scored.max(axis=1)
+        proba[valid] = scored
+    columns = {name: store.column(name)[rows] for name in ('vci', 'precipitation_mm', 'precip_3month', 'ndvi')}
+    risk[:] = rules.risk_score(columns['vci'], columns['precipitation_mm'], columns['precip_3month'], columns['ndvi'])
+    return predicted, confidence, proba, risk
+
+
+def results_frame(regions, months, predicted, confidence, proba, risk):
+    """
+    One row per region and month, with labels for class and risk level
+    """
+    frame = pd.DataFrame({
+        'region': regions,
+        'date': [month_label(key) for key in np.asarray(months).tolist()],
+        'predicted_class': predicted,
+        'predicted_category': [DROUGHT_CATEGORIES[c] if c >= 0 else None for c in np.asarray(predicted).tolist()],
+        'confidence': confidence,
+        'risk_score': risk,
+        'risk_level': [RISK_LEVELS[i][1] for i in rules.risk_level_index(np.maximum(risk, 0))],
+    })
+    for i, name in enumerate(PROBA_COLUMNS):
+        frame[name] = proba[:, i]
+    frame.loc[frame['risk_score'] < 0, 'risk_level'] = None
+    return frame
+
+
+def score_month(model, store, index, year, month, regions=None):
+    """
+    Score every region (or ``regions``) in one month with one batched model call.
+
+    Regions without a row for that month are returned with class -1.
+    """
+    names = index.regions if regions is None else list(regions)
+    rows = index.rows_for_month(year, month, names)
+    present = rows >= 0
+    predicted = np.full(len(rows), -1, dtype=np.int8)
+    confidence = np.full(len(rows), np.nan, dtype=np.float32)
+    proba = np.full((len(rows), len(DROUGHT_CATEGORIES)), np.nan, dtype=np.float32)
+    risk = np.full(len(rows), -1, dtype=np.int8)
+    if present.any():
+        predicted[present], confidence[present], proba[present], risk[present] = _results(model, store, rows[present])
+    return results_frame(names, np.full(len(rows), month_key(year, month)), predicted, confidence, proba, risk)
+
+
+class RegionForecasts:
+    """
+    Precomputed results for every store row, valid for one model and store size
+    """
+
+    def __init__(self, predicted, confidence, proba, risk, model_checksum, rows):
+        self.predicted = predicted
+        self.confidence = confidence
+        self.proba = proba
+        self.risk = risk
+        self.model_checksum = model_checksum
+        self.rows = rows
+
+    @classmethod
+    def compute(cls, model, store, model_checksum=None, chunk_size=CHUNK_SIZE):
+        parts = [_results(model, store, np.arange(start, min(start + chunk_size, len(store))))
+                 for start in range(0, len(store), chunk_size)]
+        if not parts:
+            parts = [_results(model, store, np.arange(0))]
+        predicted, confidence, proba, risk = (np.concatenate(arrays) for arrays in zip(*parts))
+        return cls(predicted, confidence, proba, risk, model_checksum, len(store))
+
+    def is_current(self, store, model_checksum):
+        return self.rows == len(store) and self.model_checksum == model_checksum
+
+    def save(self, path):
+        metadata = {'format_version': FORMAT_VERSION, 'model_checksum': self.model_checksum, 'rows': self.rows}
+        with open(path, 'wb') as f:
+            np.savez(f, metadata=np.array(json.dumps(metadata)), predicted=self.predicted,
+                     confidence=self.confidence, proba=self.proba, risk=self.risk)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data['metadata']))
+            if metadata.get('format_version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported forecasts format version: {metadata.get('format_version')}")
+            return cls(data['predicted'], data['confidence'], data['proba'], data['risk'],
+                       metadata['model_checksum'], metadata['rows'])
+
+    def frame(self, rows, regions, months):
+        rows = np.asarray(rows)
+        present = rows >= 0
+        take = np.where(present, rows, 0)
+        return results_frame(
+            regions, months,
+            np.where(present, self.predicted[take], -1), np.where(present, self.confidence[take], np.nan),
+            np.where(present[:, None], self.proba[take], np.nan), np.where(present, self.risk[take], -1),
+        )
+
+    def for_month(self, index, year, month):
+        """
+        Every region's results in one month (class -1 where a region has no row)
+        """
+        rows = index.rows_for_month(year, month)
+        return self.frame(rows, index.regions, np.full(len(rows), month_key(year, month)))
+
+    def for_region(self, index, region):
+        """
+        One region's results over time
+        """
+        rows, months = index.series(region)
+        return self.frame(rows, [region] * len(rows), months)
+
+
+def load_forecasts(store, model, model_checksum, path=None):
+    """
+    Saved forecasts for ``store`` if they match the model and row count, else freshly computed ones
+    """
+    path = path or os.path.join(store.path, FORECASTS_FILE)
+    try:
+        forecasts = RegionForecasts.load(path)
+        if forecasts.is_current(store, model_checksum):
+            return forecasts
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+    return RegionForecasts.compute(model, store, model_checksum)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-region drought series and cross-region scoring")
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--model', default=None,
+                        help="Model file, pickle or native format (default: native export if present)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('precompute', help=f"Score every stored row into <store>/{FORECASTS_FILE}")
+
+    month_parser = subparsers.add_parser('score-month', help="Score all regions for one month")
+    month_parser.add_argument('year', type=int)
+    month_parser.add_argument('month', type=int)
+    month_parser.add_argument('--output', help="Write the results to this CSV instead of printing them")
+
+    climatology_parser = subparsers.add_parser('climatology', help="Per-region monthly baselines")
+    climatology_parser.add_argument('output')
+
+    args = parser.parse_args(argv)
+
+    try:
+        store = ColumnStore.open(args.store)
+        if args.command == 'climatology':
+            frame = store.to_frame(['region', 'month', 'ndvi', 'precipitation_mm'])
+            climatology = Climatology.from_frame(frame, location_column='region')
+            climatology.save(args.output)
+            print(f"✅ Wrote baselines for {climatology.n_locations} region(s) to {args.output}")
+            return 0
+
+        loaded = load_model_file(args.model or resolve_model_path())
+        model = compile_model(loaded.model)
+        if args.command == 'precompute':
+            forecasts = RegionForecasts.compute(model, store, loaded.checksum)
+            path = os.path.join(args.store, FORECASTS_FILE)
+            forecasts.save(path)
+            print(f"✅ Scored {forecasts.rows:,} rows for {len(store.categories['region'])} region(s) into {path}")
+        else:
+            results = score_month(model, store, RegionIndex.from_store(store), args.year, args.month)
+            if args.output:
+                results.to_csv(args.output, index=False)
+                print(f"✅ Wrote {len(results):,} regions to {args.output}")
+            else:
+                print(results.to_string(index=False))
+    except (FileNotFoundError, ValueError, KeyError) as error:
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Vectorized rule engines for the risk score and the short-term outlook.
+
+The threshold rules are stored as tables (bin edges plus points per bin)
+and evaluated with ``np.digitize``, so one call scores a single slider state,
+a DataFrame column of historical months or a whole raster. Scalar results
+are identical to the original if/elif chains, including behaviour exactly
+on the thresholds and for NaN inputs (which score 0 points).
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .engine import DRY_SEASON, RISK_LEVELS
+
+# Piecewise-constant rule: points[i] for values in bin i of np.digitize(x, edges, right)
+Step = namedtuple('Step', ['edges', 'points', 'right'])
+
+# Risk score components (0-15 in total)
+RISK_RULES = {
+    'vci': Step([15, 30, 45, 60], [4, 3, 2, 1, 0], right=True),              # vci <= 15 -> 4 ...
+    'precip_current': Step([10, 20, 35, 50], [4, 3, 2, 1, 0], right=False),  # precip < 10 -> 4 ...
+    'precip_3month': Step([30, 50, 80, 120], [4, 3, 2, 1, 0], right=False),
+    'ndvi': Step([0.35, 0.45, 0.55], [3, 2, 1, 0], right=False),
+}
+
+# Trend components: strict "<" thresholds below zero, strict ">" above, summed
+TREND_RULES = {
+    'ndvi_trend': (Step([-0.05, -0.02], [2, 1, 0], right=False), Step([0.02, 0.05], [0, -1, -2], right=True)),
+    'precip_trend': (Step([-20, -10], [2, 1, 0], right=False), Step([10, 20], [0, -1, -2], right=True)),
+    'vci_trend': (Step([-10, -5], [2, 1, 0], right=False), Step([5, 10], [0, -1, -2], right=True)),
+}
+DRY_SEASON_POINTS = 1
+
+# Season labels that get the dry-season adjustment (dashboard and dataset spellings)
+DRY_SEASON_LABELS = (DRY_SEASON, 'Dry Season')
+
+# Trend score -> outlook: <= -3, -2..-1, 0, 1..2, >= 3
+OUTLOOK_RULE = Step([-3, -1, 0, 2], ["improving", "slightly_improving", "stable", "slightly_worsening", "worsening"],
+                    right=True)
+
+RISK_LEVEL_EDGES = [max_score for max_score, _, _, _ in RISK_LEVELS[:-1]]
+
+
+def apply_step(step, values):
+    """
+    Points for every value; NaN scores 0 like a failed comparison chain would
+    """
+    values = np.asarray(values, dtype=np.float64)
+    points = np.asarray(step.points)[np.digitize(values, step.edges, right=step.right)]
+    if points.dtype.kind in 'iu':
+        points = np.where(np.isnan(values), 0, points)
+    return points
+
+
+def risk_score(vci, precip_current, precip_3month, ndvi):
+    """
+    Combined vegetation and precipitation risk score (0-15), element-wise
+    """
+    return (apply_step(RISK_RULES['vci'], vci)
+            + apply_step(RISK_RULES['precip_current'], precip_current)
+            + apply_step(RISK_RULES['precip_3month'], precip_3month)
+            + apply_step(RISK_RULES['ndvi'], ndvi))
+
+
+def risk_level_index(score):
+    """
+    Index into ``engine.RISK_LEVELS`` for every risk score
+    """
+    return np.digitize(np.asarray(score), RISK_LEVEL_EDGES, right=True)
+
+
+def is_dry_season(season):
+    """
+    Boolean mask from season labels, or passed through if already boolean
+    """
+    season = np.asarray(season)
+    if season.dtype == bool:
+        return season
+    return np.isin(season, DRY_SEASON_LABELS)
+
+
+def trend_score(ndvi_trend, precip_trend, vci_trend, season):
+    """
+    Short-term outlook trend score, element-wise
+    """
+    score = DRY_SEASON_POINTS * is_dry_season(season).astype(np.int64)
+    for name, values in (('ndvi_trend', ndvi_trend), ('precip_trend', precip_trend), ('vci_trend', vci_trend)):
+        below, above = TREND_RULES[name]
+        score = score + apply_step(below, values) + apply_step(above, values)
+    return score
+
+
+def outlook_from_score(score):
+    return np.asarray(OUTLOOK_RULE.points)[np.digitize(np.asarray(score), OUTLOOK_RULE.edges, right=True)]
+
+
+def short_term_outlook(ndvi_trend, precip_trend, vci_trend, season):
+    """
+    ``(outlook, trend_score)`` arrays for any number of scenarios
+    """
+    score = trend_score(ndvi_trend, precip_trend, vci_trend, season)
+    return outlook_from_score(score), score
+
+
+def score_frame(frame, season=None):
+    """
+    Risk and outlook columns for a table of monthly features.
+
+    Needs the columns ``ndvi``, ``ndvi_lag1``, ``vci``, ``precipitation_mm``,
+    ``precip_3month`` and ``precip_anomaly``; the season comes from ``season``
+    or the frame's ``season`` column. Trends are derived as in
+    ``engine.compute_trends``.
+    """
+    if season is None:
+        season = frame['season'].to_numpy()
+    ndvi_trend = frame['ndvi'].to_numpy() - frame['ndvi_lag1'].to_numpy()
+    vci_trend = frame['vci'].to_numpy() - 60
+    outlook, score = short_term_outlook(ndvi_trend, frame['precip_anomaly'].to_numpy(), vci_trend, season)
+    risk = risk_score(frame['vci'], frame['precipitation_mm'], frame['precip_3month'], frame['ndvi'])
+    levels = np.asarray([level for _, level, _, _ in RISK_LEVELS], dtype=object)
+    return pd.DataFrame({
+        'risk_score': risk,
+        'risk_level': levels[risk_level_index(risk)],
+        'trend_score': score,
+        'outlook': outlook,
+    }, index=frame.index)
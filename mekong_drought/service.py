@@ -0,0 +1,501 @@
+"""
+Local prediction HTTP service.
+
+One warm model shared by every client (dashboards, irrigation-planning
+tools, scripts), served over plain HTTP/1.1 with keep-alive using only
+asyncio from the standard library. Concurrent ``/score`` requests that
+arrive while a batch is being scored (plus an optional extra window) are
+coalesced by ``MicroBatcher`` into one batched ``predict_proba`` call.
+
+Endpoints (JSON in, JSON out; POST bodies are one record or ``{"rows": [...]}``):
+
+* ``POST /score``: model features -> class, category, confidence, probabilities
+* ``POST /outlook``: ndvi, ndvi_lag1, precip_anomaly, vci, season -> outlook
+* ``POST /risk``: vci, precipitation_mm, precip_3month, ndvi -> risk score and level
+* ``GET /stats``: request latency p50/p99 and histograms, batch-size histogram
+* ``GET /metrics``: the same histograms plus ``telemetry`` spans as Prometheus text
+* ``GET /health``: model path and checksum
+* ``GET /tiles``: months with precomputed map tiles (see ``tiles``);
+  ``GET /tiles/<YYYY-MM>/<class|confidence>/<z>/<x>/<y>.png`` serves one tile
+  from an in-memory LRU cache
+
+Add ``?profile=1`` to any request to run it under cProfile; the dump's path
+comes back in the ``X-Profile`` header. ``--log-requests`` prints one JSON
+line per request with its spans.
+
+Usage:
+    python -m mekong_drought.service --port 8765
+    curl -s localhost:8765/score -d '{"ndvi": 0.55, "precipitation_mm": 80, ...}'
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from collections import deque
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from . import rules
+from .engine import (DERIVED_FEATURES, DROUGHT_CATEGORIES, FEATURE_COLUMNS, RISK_LEVELS, compile_model,
+                     predict_proba, resolve_model_path)
+from . import telemetry
+from .model_store import ModelWatcher
+from .regions import month_key, month_label
+from .telemetry import Histogram, prometheus_counter, prometheus_histogram
+from .tiles import TILES_DIR, TileStore
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_BATCH_WINDOW = 0.0  # requests still coalesce while the previous batch is scored
+DEFAULT_MAX_BATCH = 1024
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+LATENCY_BUCKETS_MS = (0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+LATENCY_WINDOW = 10_000
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+TILE_PATH = re.compile(r'^/tiles/(\d{4})-(\d{2})/([a-z]+)/(\d+)/(\d+)/(\d+)\.png$')
+TILE_MAX_AGE = 300
+
+
+class RequestError(Exception):
+    """
+    Client error reported back with an HTTP status
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceStats:
+    """
+    Per-endpoint request latencies and micro-batch sizes.
+
+    Percentiles come from the last ``LATENCY_WINDOW`` requests per endpoint;
+    histograms count every request since start.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.endpoints = {}
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+
+    def record_request(self, endpoint, seconds, status):
+        entry = self.endpoints.get(endpoint)
+        if entry is None:
+            entry = self.endpoints[endpoint] = {
+                'requests': 0, 'errors': 0,
+                'recent_ms': deque(maxlen=LATENCY_WINDOW), 'latency_ms': Histogram(LATENCY_BUCKETS_MS),
+            }
+        milliseconds = seconds * 1000
+        entry['requests'] += 1
+        entry['errors'] += status >= 400
+        entry['recent_ms'].append(milliseconds)
+        entry['latency_ms'].observe(milliseconds)
+
+    def record_batch(self, size):
+        self.batch_sizes.observe(size)
+
+    def snapshot(self):
+        endpoints = {}
+        for endpoint, entry in self.endpoints.items():
+            recent = np.asarray(entry['recent_ms'])
+            p50, p99 = np.percentile(recent, [50, 99]) if len(recent) else (0.0, 0.0)
+            endpoints[endpoint] = {
+                'requests': entry['requests'],
+                'errors': entry['errors'],
+                'p50_ms': float(p50),
+                'p99_ms': float(p99),
+                'latency_histogram_ms': entry['latency_ms'].as_dict(),
+            }
+        batches = self.batch_sizes
+        return {
+            'uptime_seconds': time.time() - self.started,
+            'endpoints': endpoints,
+            'batches': {
+                'count': batches.total,
+                'mean_size': batches.sum / batches.total if batches.total else 0.0,
+                'size_histogram': batches.as_dict(),
+            },
+        }
+
+    def prometheus_lines(self):
+        return [
+            *prometheus_counter('mekong_http_requests_total', "Requests served",
+                                {endpoint: entry['requests'] for endpoint, entry in self.endpoints.items()},
+                                label='endpoint'),
+            *prometheus_counter('mekong_http_request_errors_total', "Requests answered with status >= 400",
+                                {endpoint: entry['errors'] for endpoint, entry in self.endpoints.items()},
+                                label='endpoint'),
+            *prometheus_histogram('mekong_http_request_duration_seconds', "Request latency",
+                                  {endpoint: entry['latency_ms'] for endpoint, entry in self.endpoints.items()},
+                                  label='endpoint', scale=0.001),
+            *prometheus_histogram('mekong_batch_size_rows', "Rows per micro-batched model call",
+                                  {None: self.batch_sizes}),
+            '# HELP mekong_uptime_seconds Seconds since the service started',
+            '# TYPE mekong_uptime_seconds gauge',
+            f'mekong_uptime_seconds {time.time() - self.started!r}',
+        ]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests into batched model calls.
+
+    ``submit`` queues a block of feature rows and waits for its
+    probabilities. The collector takes the first waiting block, gives other
+    requests ``window`` seconds to arrive, then scores up to ``max_batch``
+    rows with one ``predict(rows)`` call and hands each request its slice.
+    """
+
+    def __init__(self, predict, window=DEFAULT_BATCH_WINDOW, max_batch=DEFAULT_MAX_BATCH, stats=None):
+        self.predict = predict
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = stats
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, rows):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((rows, future))
+        return await future
+
+    def _drain(self, pending, n_rows):
+        while n_rows < self.max_batch and not self._queue.empty():
+            item = self._queue.get_nowait()
+            pending.append(item)
+            n_rows += len(item[0])
+        return n_rows
+
+    async def _run(self):
+        while True:
+            pending = [await self._queue.get()]
+            n_rows = self._drain(pending, len(pending[0][0]))
+            if self.window > 0 and n_rows < self.max_batch:
+                await asyncio.sleep(self.window)
+                n_rows = self._drain(pending, n_rows)
+
+            try:
+                proba = self.predict(np.vstack([rows for rows, _ in pending]))
+            except Exception as error:  # hand the failure to every waiting request
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            if self.stats is not None:
+                self.stats.record_batch(n_rows)
+            offset = 0
+            for rows, future in pending:
+                if not future.done():
+                    future.set_result(proba[offset:offset + len(rows)])
+                offset += len(rows)
+
+
+def _records(payload):
+    if isinstance(payload, dict) and 'rows' in payload:
+        payload = payload['rows']
+        if not isinstance(payload, list) or not payload:
+            raise RequestError("'rows' must be a non-empty list of records")
+        return payload, True
+    if not isinstance(payload, dict):
+        raise RequestError("Body must be a JSON object")
+    return [payload], False
+
+
+def _column(records, name):
+    try:
+        return np.array([record[name] for record in records], dtype=np.float64)
+    except KeyError:
+        raise RequestError(f"Missing field '{name}'") from None
+    except (TypeError, ValueError):
+        raise RequestError(f"Field '{name}' must be a number") from None
+
+
+def feature_matrix(records):
+    """
+    (n, 11) feature matrix from request records; derivable features may be omitted
+    """
+    columns = []
+    for name in FEATURE_COLUMNS:
+        if name in DERIVED_FEATURES and not all(name in record for record in records):
+            source, rule = DERIVED_FEATURES[name]
+            columns.append(rule(_column(records, source)))
+        else:
+            columns.append(_column(records, name))
+    return np.column_stack(columns)
+
+
+class PredictionService:
+    """
+    HTTP front end: routing, JSON handling and stats around a ``MicroBatcher``
+    """
+
+    def __init__(self, model_path=None, window=DEFAULT_BATCH_WINDOW, max_batch=DEFAULT_MAX_BATCH,
+                 poll_interval=2.0, log_requests=False, tiles_dir=TILES_DIR):
+        self.watcher = ModelWatcher(model_path or resolve_model_path(), poll_interval=poll_interval,
+                                    transform=compile_model)
+        self.stats = ServiceStats()
+        self.batcher = MicroBatcher(self._predict, window, max_batch, self.stats)
+        self.routes = {
+            ('POST', '/score'): self.score,
+            ('POST', '/outlook'): self.outlook,
+            ('POST', '/risk'): self.risk,
+            ('GET', '/stats'): self.get_stats,
+            ('GET', '/metrics'): self.metrics,
+            ('GET', '/health'): self.health,
+            ('GET', '/tiles'): self.tile_months,
+        }
+        self.tiles = TileStore(tiles_dir)
+        self.log_requests = log_requests
+        self.server = None
+
+    def _predict(self, rows):
+        return predict_proba(self.watcher.model, rows)
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.watcher.start()
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.batcher.stop()
+        self.watcher.stop()
+
+    async def score(self, payload):
+        records, many = _records(payload)
+        with telemetry.span('service.feature_matrix'):
+            rows = feature_matrix(records)
+        with telemetry.span('service.batch_wait'):
+            proba = await self.batcher.submit(rows)
+        classes = np.asarray(self.watcher.model.classes_)[proba.argmax(axis=1)]
+        results = [
+            {
+                'predicted_class': int(predicted),
+                'predicted_category': DROUGHT_CATEGORIES[predicted],
+                'confidence': float(row.max()),
+                'probabilities': dict(zip(DROUGHT_CATEGORIES, row.tolist())),
+            }
+            for predicted, row in zip(classes, proba)
+        ]
+        return {'results': results} if many else results[0]
+
+    async def outlook(self, payload):
+        records, many = _records(payload)
+        try:
+            season = [record['season'] for record in records]
+        except KeyError:
+            raise RequestError("Missing field 'season'") from None
+        vci = _column(records, 'vci')
+        outlook, trend_score = rules.short_term_outlook(
+            _column(records, 'ndvi') - _column(records, 'ndvi_lag1'), _column(records, 'precip_anomaly'),
+            vci - 60, season
+        )
+        results = [{'outlook': str(o), 'trend_score': int(s)} for o, s in zip(outlook, trend_score)]
+        return {'results': results} if many else results[0]
+
+    async def risk(self, payload):
+        records, many = _records(payload)
+        score = rules.risk_score(_column(records, 'vci'), _column(records, 'precipitation_mm'),
+                                 _column(records, 'precip_3month'), _column(records, 'ndvi'))
+        results = []
+        for value, level_index in zip(score, rules.risk_level_index(score)):
+            _, level, color, icon = RISK_LEVELS[level_index]
+            results.append({'risk_score': int(value), 'risk_level': level, 'color': color, 'icon': icon})
+        return {'results': results} if many else results[0]
+
+    async def get_stats(self, payload):
+        return self.stats.snapshot()
+
+    async def metrics(self, payload):
+        lines = self.stats.prometheus_lines() + telemetry.REGISTRY.prometheus_lines()
+        return '\n'.join(lines) + '\n'
+
+    async def health(self, payload):
+        loaded = self.watcher.current
+        return {'status': 'ok', 'model': loaded.path, 'checksum': loaded.checksum, 'reloads': self.watcher.reloads}
+
+    async def tile_months(self, payload):
+        months = []
+        for month in self.tiles.months():
+            metadata = self.tiles.metadata(month)
+            months.append({'month': month_label(month), 'bounds': metadata['bounds'], 'zooms': metadata['zooms'],
+                           'layers': metadata['layers']})
+        cache = self.tiles.cache
+        return {'months': months, 'url': '/tiles/{month}/{layer}/{z}/{x}/{y}.png',
+                'cache': {'size': len(cache), 'hits': cache.hits, 'misses': cache.misses,
+                          'evictions': cache.evictions}}
+
+    def tile(self, match):
+        year, month, layer, zoom, x, y = match.groups()
+        try:
+            return self.tiles.tile(int(month_key(int(year), int(month))), layer, int(zoom), int(x), int(y))
+        except (FileNotFoundError, KeyError):
+            raise RequestError(f"No {layer} tiles for {year}-{month}", status=404) from None
+
+    async def dispatch(self, method, path, body):
+        """
+        ``(status, response)`` for one request; the response is a dict, Prometheus text or PNG bytes
+        """
+        match = TILE_PATH.match(path) if method == 'GET' else None
+        if match is not None:
+            try:
+                return 200, self.tile(match)
+            except RequestError as error:
+                return error.status, {'error': str(error)}
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                return 405, {'error': f"{method} not allowed on {path}"}
+            return 404, {'error': f"Unknown path {path}"}
+        try:
+            payload = json.loads(body) if body else None
+            return 200, await handler(payload)
+        except json.JSONDecodeError as error:
+            return 400, {'error': f"Invalid JSON: {error}"}
+        except RequestError as error:
+            return error.status, {'error': str(error)}
+        except Exception as error:
+            return 500, {'error': str(error)}
+
+    async def _handle_connection(self, reader, writer):
+        trace = None
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start = time.perf_counter()
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                path, _, query = target.partition('?')
+                profile = parse_qs(query).get('profile', ['0'])[0] != '0'
+                trace = None
+                if profile or self.log_requests:
+                    trace = telemetry.trace('service.request', profile=profile, method=method, path=path).start()
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The body cannot be framed, so answer and close the connection
+                    status, response = 400, {'error': "Invalid Content-Length"}
+                    keep_alive = False
+                elif length > MAX_BODY_BYTES:
+                    status, response = 413, {'error': "Request body too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, response = await self.dispatch(method, path, body)
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection != 'close' and (version != 'HTTP/1.0' or connection == 'keep-alive')
+
+                extra_headers = ''
+                if isinstance(response, bytes):
+                    extra_headers = f"Cache-Control: max-age={TILE_MAX_AGE}\r\n"
+                if trace is not None:
+                    trace.finish(status=status)
+                    if trace.profile_path is not None:
+                        extra_headers += f"X-Profile: {trace.profile_path}\r\n"
+                if isinstance(response, bytes):
+                    data, content_type = response, 'image/png'
+                elif isinstance(response, str):
+                    data, content_type = response.encode(), telemetry.PROMETHEUS_CONTENT_TYPE
+                else:
+                    data, content_type = json.dumps(response).encode(), 'application/json'
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n{extra_headers}"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                endpoint = path if (method, path) in self.routes else '/tiles' if TILE_PATH.match(path) else 'other'
+                self.stats.record_request(endpoint, time.perf_counter() - start, status)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if trace is not None:
+                trace.finish()  # a request cut short still stops its profiler; no-op if already finished
+            writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, **options):
+    service = await PredictionService(**options).start(host, port)
+    print(f"✅ Serving drought predictions on http://{host}:{service.port} "
+          f"(model {service.watcher.current.path})", file=sys.stderr)
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve drought predictions over HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--model', default=None,
+                        help="Model file, pickle or native format (default: native export if present)")
+    parser.add_argument('--batch-window-ms', type=float, default=DEFAULT_BATCH_WINDOW * 1000,
+                        help="How long the batcher waits for more requests after the first")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH, help="Most rows per model call")
+    parser.add_argument('--log-requests', action='store_true', help="Print one JSON line per request to stderr")
+    parser.add_argument('--tiles', default=TILES_DIR, help="Precomputed map tiles to serve under /tiles")
+    args = parser.parse_args(argv)
+
+    if args.log_requests:
+        telemetry.log_to_stderr()
+    try:
+        asyncio.run(serve(args.host, args.port, model_path=args.model, window=args.batch_window_ms / 1000,
+                          max_batch=args.max_batch, log_requests=args.log_requests, tiles_dir=args.tiles))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
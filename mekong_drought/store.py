@@ -0,0 +1,341 @@
+"""
+Columnar, append-only storage for the monthly drought dataset.
+
+``drought_dataset_processed.csv`` keeps ``year``/``month`` as floats, ``date``
+as text and the class twice (``drought_label`` and ``drought_category``), and
+has to be re-parsed on every start. A ``ColumnStore`` is a directory with one
+raw little-endian file per column plus ``store.json`` (schema, row count,
+category names):
+
+* ``region`` int16 codes into the region names kept in ``store.json``
+* ``year`` int16, ``month`` int8, ``drought_label`` int8 (-1 = not labelled)
+* every measured or derived feature float32 (NaN for missing lags)
+* ``season`` int8 codes into the category list kept in ``store.json``
+
+``date`` and ``drought_category`` are rebuilt from those on load. Columns
+are opened as read-only memory maps, so ``column`` and ``to_frame`` copy
+nothing; the data is paged in on first touch.
+
+Appends write to the end of each column file and then replace
+``store.json`` with the new row count. Readers only see committed rows, and
+bytes left over from an interrupted append are truncated by the next one.
+
+Usage:
+    python -m mekong_drought.store import data/drought_dataset_processed.csv data/drought_store
+    python -m mekong_drought.store append data/drought_store new_months.csv
+    python -m mekong_drought.store info data/drought_store
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .climatology import DEFAULT_LOCATION
+from .engine import BASE_DIR, DATASET_PATH
+
+STORE_PATH = os.path.join(BASE_DIR, 'data', 'drought_store')
+MANIFEST_FILE = 'store.json'
+
+FORMAT_VERSION = 1
+
+UNLABELLED = -1
+
+# Region of rows imported from a CSV without a region column
+DEFAULT_REGION = DEFAULT_LOCATION
+
+Column = namedtuple('Column', ['name', 'dtype', 'categorical'])
+
+FLOAT_COLUMNS = (
+    'ndvi', 'precipitation_mm', 'temp_mean_c', 'temp_max_c', 'temp_min_c',
+    'precip_3month', 'precip_6month', 'ndvi_3month_avg', 'precip_3month_avg',
+    'precip_lag1', 'ndvi_lag1', 'vci', 'precip_anomaly',
+)
+
+SCHEMA = (
+    Column('region', '<i2', True),
+    Column('year', '<i2', False),
+    Column('month', 'i1', False),
+    *(Column(name, '<f4', False) for name in FLOAT_COLUMNS),
+    Column('drought_label', 'i1', False),
+    Column('season', 'i1', True),
+)
+
+# Columns rebuilt on load rather than stored
+DERIVED_COLUMNS = ('date', 'drought_category')
+
+
+def _to_dtype(values, column):
+    """
+    ``values`` as ``column``'s dtype; integers must be whole and in range
+    """
+    dtype = np.dtype(column.dtype)
+    if dtype.kind == 'f':
+        return np.asarray(values, dtype=np.float64).astype(dtype)
+    values = np.asarray(values, dtype=np.float64)
+    info = np.iinfo(dtype)
+    if not (np.isfinite(values).all() and (values == np.round(values)).all()
+            and values.min(initial=info.min) >= info.min and values.max(initial=info.max) <= info.max):
+        raise ValueError(f"Column '{column.name}' needs whole numbers in [{info.min}, {info.max}]")
+    return values.astype(dtype)
+
+
+class ColumnStore:
+    """
+    Typed, memory-mapped columns of the monthly dataset
+    """
+
+    def __init__(self, path, manifest):
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported store format version: {manifest.get('format_version')}")
+        self.path = path
+        self.rows = manifest['rows']
+        self.schema = tuple(Column(column['name'], column['dtype'], column['categorical'])
+                            for column in manifest['columns'])
+        self.categories = {name: list(values) for name, values in manifest['categories'].items()}
+        self.label_names = manifest['label_names']
+        self._columns = {column.name: column for column in self.schema}
+
+    @classmethod
+    def create(cls, path, schema=SCHEMA, label_names=()):
+        """
+        Empty store at ``path`` (which must not hold one already)
+        """
+        if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            raise FileExistsError(f"A store already exists at {path}")
+        os.makedirs(path, exist_ok=True)
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'rows': 0,
+            'columns': [column._asdict() for column in schema],
+            'categories': {column.name: [] for column in schema if column.categorical},
+            'label_names': list(label_names),
+        }
+        for column in schema:
+            open(os.path.join(path, column.name + '.bin'), 'wb').close()
+        store = cls(path, manifest)
+        store._write_manifest()
+        return store
+
+    @classmethod
+    def open(cls, path=STORE_PATH):
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No column store at {path}")
+        with open(manifest_path) as f:
+            return cls(path, json.load(f))
+
+    @classmethod
+    def import_csv(cls, csv_path, path):
+        """
+        New store at ``path`` holding every row of a processed-dataset CSV.
+
+        Rows of a CSV without a ``region`` column go to ``DEFAULT_REGION``.
+        """
+        frame = pd.read_csv(csv_path)
+        if 'region' not in frame:
+            frame.insert(0, 'region', DEFAULT_REGION)
+        label_names = []
+        if 'drought_category' in frame:
+            pairs = frame[['drought_label', 'drought_category']].drop_duplicates()
+            names = dict(zip(pairs['drought_label'].astype(int), pairs['drought_category']))
+            label_names = [names.get(label) for label in range(max(names) + 1)]
+        store = cls.create(path, label_names=label_names)
+        store.append(frame)
+        return store
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def names(self):
+        return [column.name for column in self.schema]
+
+    def _file(self, name):
+        return os.path.join(self.path, name + '.bin')
+
+    def _write_manifest(self):
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'rows': self.rows,
+            'columns': [column._asdict() for column in self.schema],
+            'categories': self.categories,
+            'label_names': self.label_names,
+        }
+        temporary = os.path.join(self.path, MANIFEST_FILE + '.tmp')
+        with open(temporary, 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, os.path.join(self.path, MANIFEST_FILE))
+
+    def column(self, name):
+        """
+        Read-only memory map of one stored column (categorical columns as codes)
+        """
+        column = self._columns[name]
+        if self.rows == 0:
+            return np.empty(0, dtype=column.dtype)
+        return np.memmap(self._file(name), dtype=column.dtype, mode='r', shape=(self.rows,))
+
+    def _date_column(self):
+        """
+        ``YYYY-MM`` labels as a categorical: one label per distinct month, not per row
+        """
+        months = self.column('year').astype(np.int32) * 12 + self.column('month') - 1
+        if self.rows == 0:
+            return pd.Categorical.from_codes(months, categories=[])
+        first = int(months.min())
+        present = np.zeros(int(months.max()) - first + 1, dtype=bool)
+        present[months - first] = True
+        codes = (np.cumsum(present) - 1)[months - first]
+        labels = [f'{month // 12:04d}-{month % 12 + 1:02d}' for month in (np.flatnonzero(present) + first).tolist()]
+        return pd.Categorical.from_codes(codes, categories=labels, validate=False)
+
+    def to_frame(self, columns=None, derived=True):
+        """
+        DataFrame over the memory-mapped columns (no copies).
+
+        Categorical columns become ``pd.Categorical``; with ``derived``,
+        ``date`` (``YYYY-MM``) and ``drought_category`` are added as
+        categoricals when their inputs are selected. The numeric columns are
+        read-only.
+        """
+        names = self.names if columns is None else [name for name in columns if name not in DERIVED_COLUMNS]
+        data = {}
+        for name in names:
+            values = self.column(name)
+            if self._columns[name].categorical:
+                values = pd.Categorical.from_codes(values, categories=self.categories[name], validate=False)
+            data[name] = values
+        frame = pd.DataFrame(data, copy=False)
+
+        wanted = DERIVED_COLUMNS if columns is None else [name for name in columns if name in DERIVED_COLUMNS]
+        if derived and 'date' in wanted and {'year', 'month'} <= set(names):
+            frame.insert(frame.columns.get_loc('month') + 1, 'date', self._date_column())
+        if derived and 'drought_category' in wanted and 'drought_label' in names and self.label_names:
+            labels = self.column('drought_label')
+            codes = np.where(labels < len(self.label_names), labels, UNLABELLED)
+            frame.insert(frame.columns.get_loc('drought_label') + 1, 'drought_category',
+                         pd.Categorical.from_codes(codes, categories=self.label_names, validate=False))
+        return frame
+
+    def append(self, rows):
+        """
+        Append rows (a DataFrame or dict of equal-length columns) and commit them.
+
+        Derived columns are ignored; a missing or NaN ``drought_label`` (new
+        months arrive unlabelled) is stored as ``UNLABELLED``, and rows without
+        a ``region`` column go to ``DEFAULT_REGION``, as in ``import_csv``. Any other
+        missing column raises ValueError, as do values that do not fit their
+        column. Returns the number of rows added.
+
+        Assumes a single writer: column files are first cut back to this
+        store's ``rows``, so a writer opened before another one's append would
+        drop the rows that append committed.
+        """
+        frame = pd.DataFrame(rows)
+        if 'region' not in frame:
+            frame.insert(0, 'region', DEFAULT_REGION)
+        missing = [name for name in self.names if name not in frame and name != 'drought_label']
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        n_rows = len(frame)
+        if n_rows == 0:
+            return 0
+
+        encoded, categories = {}, {}
+        for column in self.schema:
+            if column.name not in frame:
+                values = np.full(n_rows, UNLABELLED)
+            elif column.name == 'drought_label':
+                values = frame[column.name].fillna(UNLABELLED)
+            else:
+                values = frame[column.name]
+            if column.categorical:
+                # New categories are added at the end so existing codes stay valid; missing -> -1
+                present = values.notna().to_numpy()
+                labels = values[present].astype(str)
+                categories[column.name] = self.categories[column.name] + [
+                    label for label in pd.unique(labels) if label not in self.categories[column.name]
+                ]
+                values = np.full(n_rows, -1)
+                values[present] = pd.Categorical(labels, categories=categories[column.name]).codes
+            encoded[column.name] = _to_dtype(values, column)
+
+        for name, values in encoded.items():
+            with open(self._file(name), 'r+b') as f:
+                f.truncate(self.rows * values.dtype.itemsize)  # drop bytes from an interrupted append
+                f.seek(0, os.SEEK_END)
+                f.write(values.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        self.rows += n_rows
+        self.categories.update(categories)
+        self._write_manifest()
+        return n_rows
+
+    def nbytes(self):
+        return sum(self.rows * np.dtype(column.dtype).itemsize for column in self.schema)
+
+
+def load_dataset(columns=None, store_path=STORE_PATH, csv_path=DATASET_PATH):
+    """
+    The monthly dataset from the column store, or from the CSV when no store exists
+    """
+    try:
+        return ColumnStore.open(store_path).to_frame(columns)
+    except FileNotFoundError:
+        return pd.read_csv(csv_path, usecols=columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Columnar storage for the monthly drought dataset")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="Create a store from a processed-dataset CSV")
+    import_parser.add_argument('input', nargs='?', default=DATASET_PATH)
+    import_parser.add_argument('output', nargs='?', default=STORE_PATH)
+
+    append_parser = subparsers.add_parser('append', help="Append the rows of a CSV to a store")
+    append_parser.add_argument('store')
+    append_parser.add_argument('input')
+
+    info_parser = subparsers.add_parser('info', help="Show a store's schema and size")
+    info_parser.add_argument('store', nargs='?', default=STORE_PATH)
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'import':
+            store = ColumnStore.import_csv(args.input, args.output)
+            original, loaded = pd.read_csv(args.input), store.to_frame()
+            error = 0.0
+            for name in FLOAT_COLUMNS:
+                expected = original[name].to_numpy()
+                difference = np.abs(loaded[name].to_numpy(np.float64) - expected) / np.maximum(np.abs(expected), 1e-12)
+                error = max(error, float(np.nanmax(difference, initial=0.0)))
+            print(f"✅ Imported {len(store):,} rows into {args.output} ({store.nbytes():,} bytes, "
+                  f"CSV {os.path.getsize(args.input):,} bytes); max float32 relative error {error:.1e}")
+        elif args.command == 'append':
+            store = ColumnStore.open(args.store)
+            added = store.append(pd.read_csv(args.input))
+            print(f"✅ Appended {added:,} rows to {args.store} ({len(store):,} rows)")
+        else:
+            store = ColumnStore.open(args.store)
+            print(f"{args.store}: {len(store):,} rows, {store.nbytes():,} bytes")
+            for column in store.schema:
+                categories = f"  {store.categories[column.name]}" if column.categorical else ''
+                print(f"  {column.name:<20}{np.dtype(column.dtype).name:<10}{categories}")
+    except (FileNotFoundError, FileExistsError, ValueError) as error:
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
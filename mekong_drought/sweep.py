@@ -0,0 +1,111 @@
+"""
+What-if sensitivity sweeps.
+
+Starting from one set of inputs, vary one or two features over a grid, build
+the whole grid as a single feature matrix and score it with one batched
+``predict_proba`` call. Answers questions like "how much 3-month rainfall
+would move us out of Severe Drought?" without one rerun per value.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .engine import DERIVED_FEATURES, FEATURE_COLUMNS, predict_proba
+
+# Features that can be swept, with display labels and the dashboard's input ranges
+SWEEP_FEATURES = {
+    'ndvi': ("NDVI", 0.20, 0.80),
+    'vci': ("VCI (%)", 0.0, 100.0),
+    'ndvi_3month_avg': ("3-Month Average NDVI", 0.20, 0.80),
+    'ndvi_lag1': ("Previous Month NDVI", 0.20, 0.80),
+    'precipitation_mm': ("Current Month Rainfall (mm)", 0.0, 500.0),
+    'precip_3month': ("3-Month Cumulative Rainfall (mm)", 0.0, 1500.0),
+    'precip_6month': ("6-Month Cumulative Rainfall (mm)", 0.0, 3000.0),
+    'precip_anomaly': ("Precipitation Anomaly (%)", -100.0, 150.0),
+    'temp_mean_c': ("Mean Temperature (°C)", 20.0, 35.0),
+}
+
+SweepResult = namedtuple('SweepResult', [
+    'x_feature', 'x_values', 'y_feature', 'y_values', 'proba', 'predicted_class', 'confidence'
+])
+SweepResult.__doc__ = """
+Scored sweep grid. ``proba`` has shape (len(y_values), len(x_values), n_classes)
+for a 2-D sweep and (len(x_values), n_classes) for a 1-D sweep;
+``predicted_class`` and ``confidence`` drop the last axis.
+"""
+
+
+def _base_vector(base_features):
+    if isinstance(base_features, pd.DataFrame):
+        return base_features[FEATURE_COLUMNS].to_numpy(dtype=np.float64)[0]
+    if isinstance(base_features, dict):
+        return np.array([base_features[name] for name in FEATURE_COLUMNS], dtype=np.float64)
+    return np.asarray(base_features, dtype=np.float64).reshape(-1)
+
+
+def sweep_values(feature, n_points):
+    """
+    Evenly spaced grid over a feature's dashboard input range
+    """
+    _, low, high = SWEEP_FEATURES[feature]
+    return np.linspace(low, high, n_points)
+
+
+def build_grid(base_features, x_feature, x_values, y_feature=None, y_values=None, derive=True):
+    """
+    Feature matrix for a sweep, one row per grid point (y-major for 2-D sweeps).
+
+    With ``derive`` set, features the dashboard derives from a swept feature
+    (e.g. ``precip_3month_avg`` from ``precip_3month``) follow it.
+    """
+    base = _base_vector(base_features)
+    x_values = np.asarray(x_values, dtype=np.float64)
+    swept = {x_feature: x_values}
+    if y_feature is None:
+        grid = np.tile(base, (len(x_values), 1))
+    else:
+        if y_feature == x_feature:
+            raise ValueError("x_feature and y_feature must differ")
+        y_values = np.asarray(y_values, dtype=np.float64)
+        xx, yy = np.meshgrid(x_values, y_values)
+        swept = {x_feature: xx.ravel(), y_feature: yy.ravel()}
+        grid = np.tile(base, (xx.size, 1))
+
+    for feature, values in swept.items():
+        grid[:, FEATURE_COLUMNS.index(feature)] = values
+    if derive:
+        for derived, (source, rule) in DERIVED_FEATURES.items():
+            if source in swept and derived not in swept:
+                grid[:, FEATURE_COLUMNS.index(derived)] = rule(swept[source])
+    return grid
+
+
+def sweep(model, base_features, x_feature, x_values, y_feature=None, y_values=None, derive=True):
+    """
+    Score a 1-D or 2-D what-if grid around ``base_features`` in one batched call
+    """
+    grid = build_grid(base_features, x_feature, x_values, y_feature, y_values, derive)
+    proba = predict_proba(model, grid)
+    predicted_class = np.asarray(model.classes_)[proba.argmax(axis=1)]
+    confidence = proba.max(axis=1)
+
+    shape = (len(x_values),) if y_feature is None else (len(y_values), len(x_values))
+    return SweepResult(
+        x_feature, np.asarray(x_values), y_feature, None if y_values is None else np.asarray(y_values),
+        proba.reshape(shape + (proba.shape[1],)), predicted_class.reshape(shape), confidence.reshape(shape)
+    )
+
+
+def first_value_below(result, drought_class):
+    """
+    First swept x value (1-D sweep) where the predicted class is below ``drought_class``.
+
+    Returns None when no value on the grid gets there. With ``drought_class=3``
+    this is the smallest amount that moves the forecast out of Severe Drought.
+    """
+    if result.y_feature is not None:
+        raise ValueError("first_value_below needs a 1-D sweep")
+    below = np.flatnonzero(result.predicted_class < drought_class)
+    return None if len(below) == 0 else result.x_values[below[0]]
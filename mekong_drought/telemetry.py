@@ -0,0 +1,312 @@
+"""
+Timing spans, histograms and on-demand profiling.
+
+Hot paths are wrapped in named spans (``with telemetry.span('engine.predict')``
+or ``@telemetry.timed(...)``). Every span lands in a per-name histogram of
+the process-wide ``REGISTRY``; a span costs two ``perf_counter`` calls and a
+bucket increment, so it stays on all the time. The histograms are exported as
+Prometheus text (``prometheus_text``, the service's ``GET /metrics`` and
+``serve_metrics`` for the dashboard).
+
+A ``Trace`` groups the spans of one dashboard rerun or service request and
+logs them as a single JSON line on the ``mekong_drought.telemetry`` logger.
+With ``profile=True`` the trace also runs cProfile and dumps a ``.prof`` file
+to ``PROFILE_DIR`` (open it with ``python -m pstats`` or snakeviz). Profiling
+is off unless asked for per trace.
+"""
+
+import bisect
+import cProfile
+import contextvars
+import functools
+import itertools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+SPAN_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 10000)
+PROFILE_DIR = os.environ.get('MEKONG_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'mekong-drought-profiles'))
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger(__name__)
+
+# Trace collecting spans in the current thread or asyncio task
+_CURRENT_TRACE = contextvars.ContextVar('mekong_drought_trace', default=None)
+_PROFILE_IDS = itertools.count(1)
+
+
+class Histogram:
+    """
+    Counts of values per bucket (up to each bound, plus an overflow bucket)
+    """
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def as_dict(self):
+        labels = [f'<={bound:g}' for bound in self.bounds] + [f'>{self.bounds[-1]:g}']
+        return dict(zip(labels, self.counts))
+
+
+def _label(name, value):
+    escaped = str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return f'{name}="{escaped}"'
+
+
+def prometheus_histogram(metric, help_text, histograms, label=None, scale=1.0):
+    """
+    Prometheus text lines for ``{label value: Histogram}`` (``{None: Histogram}`` when unlabelled).
+
+    ``scale`` converts recorded values to the exported unit (0.001 for ms -> seconds).
+    """
+    lines = [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+    for label_value, histogram in sorted(histograms.items(), key=lambda item: str(item[0])):
+        labels = [] if label is None else [_label(label, label_value)]
+        cumulative = 0
+        for bound, count in zip(histogram.bounds, histogram.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{",".join(labels + [_label("le", f"{bound * scale:g}")])}}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{",".join(labels + [_label("le", "+Inf")])}}} {histogram.total}')
+        suffix = f'{{{",".join(labels)}}}' if labels else ''
+        lines.append(f'{metric}_sum{suffix} {histogram.sum * scale!r}')
+        lines.append(f'{metric}_count{suffix} {histogram.total}')
+    return lines
+
+
+def prometheus_counter(metric, help_text, values, label=None):
+    """
+    Prometheus text lines for ``{label value: count}``
+    """
+    lines = [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+    for label_value, value in sorted(values.items(), key=lambda item: str(item[0])):
+        suffix = '' if label is None else f'{{{_label(label, label_value)}}}'
+        lines.append(f'{metric}{suffix} {value}')
+    return lines
+
+
+class Span:
+    """
+    Context manager timing one block into ``registry`` under ``name``
+    """
+
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, (time.perf_counter() - self.start) * 1000)
+
+
+class Trace:
+    """
+    Spans of one rerun or request, logged as one JSON line when finished.
+
+    Use as a context manager, or call ``start`` and ``finish`` where the
+    work cannot be wrapped in a block (a Streamlit script body). Spans
+    observed in the same thread or asyncio task while the trace is active
+    are summed per name.
+    """
+
+    def __init__(self, registry, name, profile=False, **fields):
+        self.registry = registry
+        self.name = name
+        self.profile = profile
+        self.fields = fields
+        self.spans = {}
+        self.profile_path = None
+        self.milliseconds = None
+        self.last_activity = None
+        self._start = None
+        self._token = None
+        self._profiler = None
+
+    def add(self, name, milliseconds):
+        self.spans[name] = self.spans.get(name, 0.0) + milliseconds
+        self.last_activity = time.perf_counter()
+
+    def start(self):
+        self._token = _CURRENT_TRACE.set(self)
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def finish(self, end=None, **fields):
+        """
+        Stop timing, record the trace's own span and log it; later calls do nothing.
+
+        ``end`` (a ``time.perf_counter`` value, e.g. ``last_activity``) times a
+        trace whose work stopped before ``finish`` could be called.
+        """
+        if self._start is None or self.milliseconds is not None:
+            return self
+        self.milliseconds = ((time.perf_counter() if end is None else end) - self._start) * 1000
+        if self._profiler is not None:
+            self._profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            self.profile_path = os.path.join(
+                PROFILE_DIR, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_PROFILE_IDS)}.prof"
+            )
+            self._profiler.dump_stats(self.profile_path)
+        try:
+            _CURRENT_TRACE.reset(self._token)
+        except ValueError:  # finished from another context
+            _CURRENT_TRACE.set(None)
+        self.registry.observe(self.name, self.milliseconds)
+        self.fields.update(fields)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(self.as_dict()))
+        return self
+
+    def as_dict(self):
+        record = {'trace': self.name, 'ms': round(self.milliseconds, 3),
+                  'spans': {name: round(ms, 3) for name, ms in self.spans.items()}}
+        record.update(self.fields)
+        if self.profile_path is not None:
+            record['profile'] = self.profile_path
+        return record
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.finish(**({'error': exc_type.__name__} if exc_type is not None else {}))
+
+
+class Registry:
+    """
+    Thread-safe per-name histograms of span durations in milliseconds
+    """
+
+    def __init__(self, buckets=SPAN_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, milliseconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.buckets)
+            histogram.observe(milliseconds)
+        trace = _CURRENT_TRACE.get()
+        if trace is not None:
+            trace.add(name, milliseconds)
+
+    def span(self, name):
+        return Span(self, name)
+
+    def timed(self, name):
+        """
+        Decorator recording every call of the function as span ``name``
+        """
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(name, (time.perf_counter() - start) * 1000)
+            return wrapper
+        return decorate
+
+    def trace(self, name, profile=False, **fields):
+        return Trace(self, name, profile, **fields)
+
+    def histograms(self):
+        """
+        Copies of the histograms, safe to read while spans are recorded
+        """
+        with self._lock:
+            copies = {}
+            for name, histogram in self._histograms.items():
+                copy = Histogram(histogram.bounds)
+                copy.counts, copy.total, copy.sum = list(histogram.counts), histogram.total, histogram.sum
+                copies[name] = copy
+            return copies
+
+    def snapshot(self):
+        return {
+            name: {
+                'count': histogram.total,
+                'total_ms': histogram.sum,
+                'mean_ms': histogram.sum / histogram.total if histogram.total else 0.0,
+                'histogram_ms': histogram.as_dict(),
+            }
+            for name, histogram in sorted(self.histograms().items())
+        }
+
+    def prometheus_lines(self):
+        return prometheus_histogram('mekong_span_duration_seconds', "Duration of instrumented code paths",
+                                    self.histograms(), label='span', scale=0.001)
+
+    def prometheus_text(self):
+        return '\n'.join(self.prometheus_lines()) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+REGISTRY = Registry()
+span = REGISTRY.span
+timed = REGISTRY.timed
+trace = REGISTRY.trace
+
+
+def log_to_stderr(level=logging.INFO):
+    """
+    Print trace JSON lines to stderr (idempotent)
+    """
+    if not any(getattr(handler, '_mekong_telemetry', False) for handler in logger.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler._mekong_telemetry = True
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def serve_metrics(port, host='127.0.0.1', registry=REGISTRY):
+    """
+    Serve ``GET /metrics`` for ``registry`` from a daemon thread; returns the server
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='mekong-metrics', daemon=True).start()
+    return server
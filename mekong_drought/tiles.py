@@ -0,0 +1,526 @@
+"""
+Precomputed map tiles of predicted drought class and confidence.
+
+Builds a Web Mercator tile pyramid (``{z}/{x}/{y}.png``, 256 x 256 pixels,
+the layout every web map understands) from a month's gridded predictions,
+i.e. the ``drought_class.npy`` and ``confidence.npy`` written by
+``raster.py``. The grid is taken to span ``bounds`` (south, west, north,
+east, in degrees) in plain latitude / longitude.
+
+* At the deepest zoom, each tile pixel takes the grid cell under its centre.
+  That zoom is the first whose pixels are no larger than a grid cell.
+* Each coarser tile is its four children reduced 2 x 2. A pixel keeps its
+  worst class and its mean confidence, as in ``timeline.downsample``, so a
+  single severe pixel stays visible when zoomed out.
+* Work is split into sub-pyramids ``--split-depth`` levels deep. Worker
+  processes build them depth-first from memory-mapped grids, so only a few
+  tiles are in memory at a time. The coarser levels are then built from the
+  sub-pyramid roots.
+* Tiles are palette PNGs: ``class`` in the dashboard's category colours,
+  ``confidence`` on a light-to-dark ramp. Nodata is transparent, and tiles
+  with no data are not written.
+
+Tiles for each month go under ``<tiles>/<YYYY-MM>/<layer>/{z}/{x}/{y}.png``
+next to a ``tiles.json`` with the bounds, zoom range and source stamp.
+Building again skips months whose grids have not changed. ``TileStore``
+serves tiles through a bounded, thread-safe ``cache.LRUCache``. That makes
+switching months in the dashboard, or panning a map on the prediction
+service's ``/tiles`` endpoint, a cache lookup rather than a recomputation.
+
+Usage:
+    python -m mekong_drought.tiles build maps/2025-01 maps/2025-02 --bounds 8.5 104.4 11.2 107.0 --workers 4
+    python -m mekong_drought.tiles info
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cache import LRUCache
+from .engine import BASE_DIR, DROUGHT_COLORS
+from .raster import CLASS_FILE, CONFIDENCE_FILE, NODATA_CLASS
+from .regions import month_key, month_label
+
+TILES_DIR = os.path.join(BASE_DIR, 'data', 'tiles')
+METADATA_FILE = 'tiles.json'
+FORMAT_VERSION = 1
+
+TILE_SIZE = 256
+LAYERS = ('class', 'confidence')
+
+# Mekong Delta: south, west, north, east (degrees)
+DELTA_BOUNDS = (8.5, 104.4, 11.2, 107.0)
+
+DEFAULT_MIN_ZOOM = 6
+MAX_ZOOM = 16
+# Sub-pyramids handed to workers are this many levels above the deepest zoom
+DEFAULT_SPLIT_DEPTH = 4
+
+DEFAULT_CACHE_SIZE = 2048
+
+# Confidence ramp: palette index i is confidence i / (CONFIDENCE_STEPS - 1)
+CONFIDENCE_STEPS = 101
+TRANSPARENT_INDEX = 255
+
+MONTH_DIR = re.compile(r'^\d{4}-\d{2}$')
+
+# Per-process state set up by _init_worker
+_WORKER = {}
+
+
+def _hex_rgb(color):
+    return [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+
+
+def _palette(layer):
+    """
+    256-entry RGB palette and the transparent index for a layer
+    """
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    if layer == 'class':
+        palette[:len(DROUGHT_COLORS)] = [_hex_rgb(color) for color in DROUGHT_COLORS]
+    else:
+        # Light yellow to dark blue
+        ramp = np.linspace(0, 1, CONFIDENCE_STEPS)[:, None]
+        palette[:CONFIDENCE_STEPS] = np.round((1 - ramp) * [255, 247, 188] + ramp * [8, 48, 107])
+    return palette
+
+
+def encode_png(indices, layer):
+    """
+    Palette PNG of a (height, width) uint8 index array; ``TRANSPARENT_INDEX`` is see-through
+    """
+    from PIL import Image
+
+    image = Image.fromarray(indices, mode='P')
+    image.putpalette(_palette(layer).reshape(-1).tolist())
+    image.info['transparency'] = TRANSPARENT_INDEX
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=False, transparency=TRANSPARENT_INDEX)
+    return buffer.getvalue()
+
+
+def tile_indices(classes, confidence):
+    """
+    Palette indices of both layers for one tile's class and confidence arrays
+    """
+    nodata = classes < 0
+    class_indices = np.where(nodata, TRANSPARENT_INDEX, classes).astype(np.uint8)
+    steps = np.round(np.nan_to_num(confidence, nan=0.0) * (CONFIDENCE_STEPS - 1))
+    confidence_indices = np.where(nodata | np.isnan(confidence), TRANSPARENT_INDEX,
+                                  np.clip(steps, 0, CONFIDENCE_STEPS - 1)).astype(np.uint8)
+    return {'class': class_indices, 'confidence': confidence_indices}
+
+
+def lon_to_x(lon, zoom):
+    """
+    Global Web Mercator pixel x of a longitude at ``zoom``
+    """
+    return (np.asarray(lon, dtype=np.float64) + 180) / 360 * TILE_SIZE * 2 ** zoom
+
+
+def lat_to_y(lat, zoom):
+    """
+    Global Web Mercator pixel y of a latitude at ``zoom``
+    """
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    return (1 - np.log(np.tan(phi) + 1 / np.cos(phi)) / np.pi) / 2 * TILE_SIZE * 2 ** zoom
+
+
+def x_to_lon(x, zoom):
+    return np.asarray(x, dtype=np.float64) / (TILE_SIZE * 2 ** zoom) * 360 - 180
+
+
+def y_to_lat(y, zoom):
+    return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y, dtype=np.float64) / (TILE_SIZE * 2 ** zoom)))))
+
+
+def tile_range(bounds, zoom):
+    """
+    ``(x_min, x_max, y_min, y_max)`` of the tiles covering ``bounds`` at ``zoom`` (inclusive)
+    """
+    south, west, north, east = bounds
+    last = 2 ** zoom - 1
+    x_min, x_max = (int(np.clip(lon_to_x(lon, zoom) // TILE_SIZE, 0, last)) for lon in (west, east))
+    y_min, y_max = (int(np.clip(lat_to_y(lat, zoom) // TILE_SIZE, 0, last)) for lat in (north, south))
+    return x_min, x_max, y_min, y_max
+
+
+def native_zoom(bounds, shape):
+    """
+    First zoom whose pixels are no wider than a grid cell, capped at ``MAX_ZOOM``
+    """
+    south, west, north, east = bounds
+    cell = min((east - west) / shape[1], (north - south) / shape[0])
+    return int(min(MAX_ZOOM, max(0, math.ceil(math.log2(360 / (TILE_SIZE * cell))))))
+
+
+def _sample(classes, confidence, bounds, zoom, x, y):
+    """
+    Class and confidence of the grid cell under each pixel centre of tile (zoom, x, y)
+    """
+    south, west, north, east = bounds
+    height, width = classes.shape
+    pixels = np.arange(TILE_SIZE) + 0.5
+    lon = x_to_lon(x * TILE_SIZE + pixels, zoom)
+    lat = y_to_lat(y * TILE_SIZE + pixels, zoom)
+    cols = np.floor((lon - west) / (east - west) * width).astype(np.int64)
+    rows = np.floor((north - lat) / (north - south) * height).astype(np.int64)
+    col_ok, row_ok = (cols >= 0) & (cols < width), (rows >= 0) & (rows < height)
+    if not col_ok.any() or not row_ok.any():
+        return None
+    # Rows depend only on the tile row and columns only on the tile column: gather the covered block
+    window = np.ix_(rows[row_ok], cols[col_ok])
+    tile_classes = np.full((TILE_SIZE, TILE_SIZE), NODATA_CLASS, dtype=np.int8)
+    tile_confidence = np.full((TILE_SIZE, TILE_SIZE), np.nan, dtype=np.float32)
+    inner = np.ix_(np.flatnonzero(row_ok), np.flatnonzero(col_ok))
+    tile_classes[inner] = classes[window]
+    tile_confidence[inner] = confidence[window]
+    return tile_classes, tile_confidence
+
+
+def reduce_children(children):
+    """
+    One tile from its four children ``[[top-left, top-right], [bottom-left, bottom-right]]`` (None = empty)
+    """
+    if all(child is None for row in children for child in row):
+        return None
+    classes = np.full((2 * TILE_SIZE, 2 * TILE_SIZE), NODATA_CLASS, dtype=np.int8)
+    confidence = np.full((2 * TILE_SIZE, 2 * TILE_SIZE), np.nan, dtype=np.float32)
+    for dy, row in enumerate(children):
+        for dx, child in enumerate(row):
+            if child is not None:
+                window = (slice(dy * TILE_SIZE, (dy + 1) * TILE_SIZE), slice(dx * TILE_SIZE, (dx + 1) * TILE_SIZE))
+                classes[window], confidence[window] = child
+    # 2 x 2 blocks: worst class, mean of the valid confidences
+    blocks = classes.reshape(TILE_SIZE, 2, TILE_SIZE, 2)
+    confidence_blocks = confidence.reshape(TILE_SIZE, 2, TILE_SIZE, 2)
+    valid = ~np.isnan(confidence_blocks)
+    counts = valid.sum(axis=(1, 3))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(valid, confidence_blocks, 0).sum(axis=(1, 3)) / counts
+    reduced_classes = blocks.max(axis=(1, 3))
+    if (reduced_classes < 0).all():
+        return None
+    return reduced_classes, np.where(counts > 0, mean, np.nan).astype(np.float32)
+
+
+def _tile_path(root, layer, zoom, x, y):
+    return os.path.join(root, layer, str(zoom), str(x), f'{y}.png')
+
+
+def _write_tile(root, zoom, x, y, tile):
+    """
+    Write both layers of a non-empty tile; returns bytes written
+    """
+    written = 0
+    for layer, indices in tile_indices(*tile).items():
+        path = _tile_path(root, layer, zoom, x, y)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = encode_png(indices, layer)
+        with open(path, 'wb') as f:
+            f.write(data)
+        written += len(data)
+    return written
+
+
+def _init_worker(source, output, bounds, max_zoom):
+    _WORKER['classes'] = np.load(os.path.join(source, CLASS_FILE), mmap_mode='r')
+    _WORKER['confidence'] = np.load(os.path.join(source, CONFIDENCE_FILE), mmap_mode='r')
+    _WORKER['output'] = output
+    _WORKER['bounds'] = bounds
+    _WORKER['max_zoom'] = max_zoom
+    _WORKER['tiles'] = 0
+    _WORKER['bytes'] = 0
+
+
+def _build(zoom, x, y):
+    """
+    Tile (zoom, x, y) and everything below it down to the deepest zoom, depth first; writes non-empty tiles
+    """
+    if zoom == _WORKER['max_zoom']:
+        tile = _sample(_WORKER['classes'], _WORKER['confidence'], _WORKER['bounds'], zoom, x, y)
+        if tile is not None and (tile[0] < 0).all():
+            tile = None
+    else:
+        x_min, x_max, y_min, y_max = tile_range(_WORKER['bounds'], zoom + 1)
+        children = [[_build(zoom + 1, 2 * x + dx, 2 * y + dy)
+                     if x_min <= 2 * x + dx <= x_max and y_min <= 2 * y + dy <= y_max else None
+                     for dx in (0, 1)] for dy in (0, 1)]
+        tile = reduce_children(children)
+    if tile is not None:
+        _WORKER['bytes'] += _write_tile(_WORKER['output'], zoom, x, y, tile)
+        _WORKER['tiles'] += 1
+    return tile
+
+
+def _build_subpyramid(task):
+    """
+    Build one sub-pyramid; returns (x, y, root tile or None, tiles written, bytes written, CPU seconds)
+    """
+    start = time.process_time()
+    zoom, x, y = task
+    tiles, written = _WORKER['tiles'], _WORKER['bytes']
+    root = _build(zoom, x, y)
+    return x, y, root, _WORKER['tiles'] - tiles, _WORKER['bytes'] - written, time.process_time() - start
+
+
+def _source_stamp(source):
+    stamp = {}
+    for name in (CLASS_FILE, CONFIDENCE_FILE):
+        status = os.stat(os.path.join(source, name))
+        stamp[name] = [status.st_size, status.st_mtime_ns]
+    return stamp
+
+
+def build_tiles(source, tiles_dir, month, bounds=DELTA_BOUNDS, min_zoom=DEFAULT_MIN_ZOOM, max_zoom=None,
+                split_depth=DEFAULT_SPLIT_DEPTH, workers=None, force=False, log=None):
+    """
+    Tile pyramid of one month's class and confidence grids (``raster.py`` output in ``source``).
+
+    ``month`` is a month key. Returns a stats dict; ``skipped`` is True when
+    the month's tiles were already built from the same grids.
+    """
+    south, west, north, east = bounds
+    if not (south < north and west < east and -85 < south and north < 85):
+        raise ValueError(f"Invalid bounds {bounds}: expected south < north, west < east, within +-85 degrees")
+    shape = np.load(os.path.join(source, CLASS_FILE), mmap_mode='r').shape
+    if np.load(os.path.join(source, CONFIDENCE_FILE), mmap_mode='r').shape != shape:
+        raise ValueError(f"{source}: class and confidence grids differ in shape")
+    max_zoom = native_zoom(bounds, shape) if max_zoom is None else max_zoom
+    min_zoom = min(min_zoom, max_zoom)
+    workers = workers or os.cpu_count() or 1
+
+    output = os.path.join(tiles_dir, month_label(month))
+    metadata_path = os.path.join(output, METADATA_FILE)
+    stamp = _source_stamp(source)
+    if not force and os.path.exists(metadata_path):
+        with open(metadata_path, encoding='utf-8') as f:
+            previous = json.load(f)
+        if (previous.get('source') == stamp and previous.get('bounds') == list(bounds)
+                and previous.get('zooms') == [min_zoom, max_zoom]):
+            return {'month': month_label(month), 'skipped': True, 'tiles': previous['tiles'],
+                    'bytes': previous['bytes'], 'seconds': 0.0, 'zooms': (min_zoom, max_zoom)}
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)  # readers treat the month as missing until the rebuild is committed
+    for layer in LAYERS:
+        _remove_tree(os.path.join(output, layer))
+
+    split_zoom = max(min_zoom, max_zoom - split_depth)
+    x_min, x_max, y_min, y_max = tile_range(bounds, split_zoom)
+    tasks = [(split_zoom, x, y) for y in range(y_min, y_max + 1) for x in range(x_min, x_max + 1)]
+    init_args = (source, output, bounds, max_zoom)
+    start = time.perf_counter()
+    roots = {}
+    n_tiles = n_bytes = 0
+    cpu_seconds = 0.0
+
+    def collect(results):
+        nonlocal n_tiles, n_bytes, cpu_seconds
+        for done, (x, y, root, tiles, written, seconds) in enumerate(results, 1):
+            roots[(x, y)] = root
+            n_tiles += tiles
+            n_bytes += written
+            cpu_seconds += seconds
+            if log is not None and (done % 16 == 0 or done == len(tasks)):
+                log(f"{month_label(month)}: {done:,}/{len(tasks):,} sub-pyramids, {n_tiles:,} tiles")
+
+    if workers == 1 or len(tasks) == 1:
+        _init_worker(*init_args)
+        try:
+            collect(map(_build_subpyramid, tasks))
+        finally:
+            _WORKER.clear()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            collect(pool.map(_build_subpyramid, tasks))
+
+    # Levels above the split, from the sub-pyramid roots
+    level = roots
+    for zoom in range(split_zoom - 1, min_zoom - 1, -1):
+        parents = {}
+        for x, y in {(x // 2, y // 2) for x, y in level}:
+            tile = reduce_children([[level.get((2 * x + dx, 2 * y + dy)) for dx in (0, 1)] for dy in (0, 1)])
+            if tile is not None:
+                n_bytes += _write_tile(output, zoom, x, y, tile)
+                n_tiles += 1
+            parents[(x, y)] = tile
+        level = parents
+
+    metadata = {
+        'format_version': FORMAT_VERSION, 'month': month_label(month), 'bounds': list(bounds),
+        'shape': list(shape), 'zooms': [min_zoom, max_zoom], 'layers': list(LAYERS),
+        'tiles': n_tiles, 'bytes': n_bytes, 'source': stamp, 'built': time.time_ns(),
+    }
+    os.makedirs(output, exist_ok=True)
+    temporary = metadata_path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(temporary, metadata_path)
+    return {'month': month_label(month), 'skipped': False, 'tiles': n_tiles, 'bytes': n_bytes,
+            'seconds': time.perf_counter() - start, 'cpu_seconds': cpu_seconds, 'zooms': (min_zoom, max_zoom),
+            'workers': workers}
+
+
+def _remove_tree(path):
+    if not os.path.isdir(path):
+        return
+    for directory, subdirectories, files in os.walk(path, topdown=False):
+        for name in files:
+            os.remove(os.path.join(directory, name))
+        for name in subdirectories:
+            os.rmdir(os.path.join(directory, name))
+    os.rmdir(path)
+
+
+class TileStore:
+    """
+    Read access to a tiles directory through a bounded ``cache.LRUCache`` of encoded tiles
+    """
+
+    def __init__(self, root=TILES_DIR, cache=None):
+        self.root = root
+        self.cache = cache if cache is not None else LRUCache(DEFAULT_CACHE_SIZE)
+        self._empty = {}
+
+    def months(self):
+        """
+        Month keys with a complete pyramid, oldest first
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(int(month_key(int(name[:4]), int(name[5:]))) for name in os.listdir(self.root)
+                      if MONTH_DIR.match(name) and os.path.exists(os.path.join(self.root, name, METADATA_FILE)))
+
+    def metadata(self, month):
+        with open(os.path.join(self.root, month_label(month), METADATA_FILE), encoding='utf-8') as f:
+            return json.load(f)
+
+    def empty_tile(self, layer):
+        if layer not in self._empty:
+            self._empty[layer] = encode_png(np.full((TILE_SIZE, TILE_SIZE), TRANSPARENT_INDEX, dtype=np.uint8), layer)
+        return self._empty[layer]
+
+    def tile(self, month, layer, zoom, x, y, built=None):
+        """
+        PNG bytes of one tile; a transparent tile where there is no data.
+
+        ``built`` (from ``metadata``) keys the cache, so a rebuilt month is never served stale.
+        """
+        if layer not in LAYERS:
+            raise KeyError(f"Unknown layer '{layer}'")
+        built = self.metadata(month)['built'] if built is None else built
+
+        def load():
+            try:
+                with open(_tile_path(os.path.join(self.root, month_label(month)), layer, zoom, x, y), 'rb') as f:
+                    return f.read()
+            except FileNotFoundError:
+                return self.empty_tile(layer)
+
+        return self.cache.get_or_load((month, built, layer, zoom, x, y), load)
+
+    def overview(self, month, layer, max_pixels=1024):
+        """
+        One image of the whole month at the deepest zoom at most ``max_pixels`` wide, built from cached tiles.
+
+        Returns ``(PNG bytes, [[south, west], [north, east]])`` of the image,
+        aligned to the tile grid. The image itself is cached too.
+        """
+        metadata = self.metadata(month)
+        return self.cache.get_or_load(('overview', month, metadata['built'], layer, max_pixels),
+                                      lambda: self._compose(month, layer, max_pixels, metadata))
+
+    def _compose(self, month, layer, max_pixels, metadata):
+        from PIL import Image
+
+        min_zoom, max_zoom = metadata['zooms']
+        zoom = min_zoom
+        for candidate in range(min_zoom, max_zoom + 1):
+            x_min, x_max, _, _ = tile_range(metadata['bounds'], candidate)
+            if (x_max - x_min + 1) * TILE_SIZE <= max_pixels:
+                zoom = candidate
+        x_min, x_max, y_min, y_max = tile_range(metadata['bounds'], zoom)
+        image = Image.new('RGBA', ((x_max - x_min + 1) * TILE_SIZE, (y_max - y_min + 1) * TILE_SIZE))
+        for y in range(y_min, y_max + 1):
+            for x in range(x_min, x_max + 1):
+                data = self.tile(month, layer, zoom, x, y, metadata['built'])
+                if data is not self._empty.get(layer):
+                    tile = Image.open(io.BytesIO(data)).convert('RGBA')
+                    image.paste(tile, ((x - x_min) * TILE_SIZE, (y - y_min) * TILE_SIZE))
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        south, north = y_to_lat((y_max + 1) * TILE_SIZE, zoom), y_to_lat(y_min * TILE_SIZE, zoom)
+        west, east = x_to_lon(x_min * TILE_SIZE, zoom), x_to_lon((x_max + 1) * TILE_SIZE, zoom)
+        return buffer.getvalue(), [[float(south), float(west)], [float(north), float(east)]]
+
+
+def _month_from_dir(path):
+    name = os.path.basename(os.path.normpath(path))
+    if not MONTH_DIR.match(name):
+        raise ValueError(f"Cannot tell the month of {path}: name the directory YYYY-MM or pass --month")
+    return int(month_key(int(name[:4]), int(name[5:])))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precomputed drought map tiles")
+    parser.add_argument('--tiles', default=TILES_DIR, help="Tiles directory")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Build the pyramid of one or more months of raster output")
+    build_parser.add_argument('maps', nargs='+', help="raster.py output directories, named YYYY-MM")
+    build_parser.add_argument('--month', default=None, help="Month of a single map directory (YYYY-MM)")
+    build_parser.add_argument('--bounds', type=float, nargs=4, default=DELTA_BOUNDS,
+                              metavar=('SOUTH', 'WEST', 'NORTH', 'EAST'), help="Grid extent in degrees")
+    build_parser.add_argument('--min-zoom', type=int, default=DEFAULT_MIN_ZOOM)
+    build_parser.add_argument('--max-zoom', type=int, default=None,
+                              help="Deepest zoom (default: where tile pixels match the grid cells)")
+    build_parser.add_argument('--split-depth', type=int, default=DEFAULT_SPLIT_DEPTH,
+                              help="Levels per sub-pyramid handed to a worker")
+    build_parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    build_parser.add_argument('--force', action='store_true', help="Rebuild months whose grids have not changed")
+
+    subparsers.add_parser('info', help="List the months with tiles")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'info':
+            store = TileStore(args.tiles)
+            for month in store.months():
+                metadata = store.metadata(month)
+                print(f"{metadata['month']}: zoom {metadata['zooms'][0]}-{metadata['zooms'][1]}, "
+                      f"{metadata['tiles']:,} tiles, {metadata['bytes'] / 1024:,.0f} KB")
+            return 0
+        if args.month is not None and len(args.maps) != 1:
+            parser.error("--month needs exactly one map directory")
+        for source in args.maps:
+            if args.month is not None:
+                year, month = (int(part) for part in args.month.split('-'))
+                key = int(month_key(year, month))
+            else:
+                key = _month_from_dir(source)
+            stats = build_tiles(source, args.tiles, key, tuple(args.bounds), args.min_zoom, args.max_zoom,
+                                args.split_depth, args.workers, args.force,
+                                log=lambda message: print(message, file=sys.stderr))
+            if stats['skipped']:
+                print(f"✅ {stats['month']}: up to date ({stats['tiles']:,} tiles)", file=sys.stderr)
+            else:
+                print(f"✅ {stats['month']}: {stats['tiles']:,} tiles, zoom {stats['zooms'][0]}-{stats['zooms'][1]}, "
+                      f"{stats['bytes'] / 1024:,.0f} KB in {stats['seconds']:.2f}s with {stats['workers']} worker(s)",
+                      file=sys.stderr)
+    except (FileNotFoundError, ValueError, KeyError) as error:
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
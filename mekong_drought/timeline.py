@@ -0,0 +1,164 @@
+"""
+Historical prediction timelines with server-side downsampling for charts.
+
+A ``Timeline`` is one region's precomputed results over time (from
+``regions.RegionForecasts``, so nothing is re-scored) next to the observed
+labels in the store. ``Timeline.window`` cuts a date range with a binary
+search. ``downsample`` reduces any range to at most ``max_points`` buckets
+of consecutive months, so a chart's payload stays the same size however
+long the history grows.
+
+Buckets keep what a drought chart must not lose. Each bucket shows its
+worst predicted and observed class, plus the mean of P(Severe or worse)
+with its minimum and maximum. A single severe month in a decade is still
+visible after downsampling. Ranges that already fit are returned
+unchanged, one point per month.
+
+Usage:
+    python -m mekong_drought.timeline [--region mekong_delta] [--start 2015-01] [--end 2024-12] [--max-points 240]
+"""
+
+import argparse
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .engine import DROUGHT_CATEGORIES
+from .forecast import SEVERE_CLASSES
+from .regions import month_key, month_label
+
+# Points per chart trace; 20 years of monthly data are shown without downsampling
+MAX_POINTS = 240
+
+Downsampled = namedtuple('Downsampled', ['start', 'end', 'predicted', 'observed', 'severe',
+                                         'severe_low', 'severe_high', 'confidence', 'bucket_months'])
+Downsampled.__doc__ = """
+One entry per bucket: first and last month key, worst predicted and observed
+class (-1 where no month in the bucket is scored / labelled), mean / min / max
+P(Severe or worse), mean confidence, and the bucket's month count (all 1 when
+the range was not downsampled).
+"""
+
+
+class Timeline:
+    """
+    One region's predicted classes, probabilities and observed labels by month
+    """
+
+    def __init__(self, months, predicted, confidence, severe, observed):
+        self.months = np.asarray(months, dtype=np.int64)
+        self.predicted = np.asarray(predicted)
+        self.confidence = np.asarray(confidence, dtype=np.float64)
+        self.severe = np.asarray(severe, dtype=np.float64)
+        self.observed = np.asarray(observed)
+
+    @classmethod
+    def from_forecasts(cls, forecasts, index, store, region):
+        """
+        Look a region's series up in precomputed ``RegionForecasts``
+        """
+        rows, months = index.series(region)
+        return cls(months, forecasts.predicted[rows], forecasts.confidence[rows],
+                   forecasts.proba[rows][:, list(SEVERE_CLASSES)].sum(axis=1), store.column('drought_label')[rows])
+
+    def __len__(self):
+        return len(self.months)
+
+    def window(self, start=None, end=None):
+        """
+        Months from ``start`` to ``end`` (month keys, inclusive), as a new timeline of views
+        """
+        lo = 0 if start is None else np.searchsorted(self.months, start, side='left')
+        hi = len(self.months) if end is None else np.searchsorted(self.months, end, side='right')
+        return Timeline(self.months[lo:hi], self.predicted[lo:hi], self.confidence[lo:hi],
+                        self.severe[lo:hi], self.observed[lo:hi])
+
+
+def downsample(timeline, max_points=MAX_POINTS):
+    """
+    At most ``max_points`` buckets of consecutive months (see module docstring)
+    """
+    n = len(timeline)
+    if max_points < 1:
+        raise ValueError("max_points must be at least 1")
+    if n <= max_points:
+        return Downsampled(timeline.months, timeline.months, timeline.predicted, timeline.observed,
+                           timeline.severe, timeline.severe, timeline.severe, timeline.confidence,
+                           np.ones(n, dtype=np.int64))
+
+    size = -(-n // max_points)
+    starts = np.arange(0, n, size)
+    # Unscored / unlabelled months are -1, below every class, so they never win the max;
+    # their NaN probabilities are skipped by fmin / fmax and left out of the means
+    scored = ~np.isnan(timeline.severe)
+    scored_counts = np.add.reduceat(scored, starts)
+    with np.errstate(invalid='ignore'):
+        severe = np.add.reduceat(np.where(scored, timeline.severe, 0.0), starts) / scored_counts
+        confidence = np.add.reduceat(np.where(scored, timeline.confidence, 0.0), starts) / scored_counts
+    return Downsampled(
+        timeline.months[starts], timeline.months[np.r_[starts[1:], n] - 1],
+        np.maximum.reduceat(timeline.predicted, starts), np.maximum.reduceat(timeline.observed, starts),
+        severe, np.fmin.reduceat(timeline.severe, starts), np.fmax.reduceat(timeline.severe, starts),
+        confidence, np.diff(np.r_[starts, n]),
+    )
+
+
+def to_frame(points):
+    """
+    Downsampled points as a table with month labels and category names
+    """
+    # Class -1 indexes the last entry
+    predicted_names = np.array(DROUGHT_CATEGORIES + ['Not scored'], dtype=object)
+    observed_names = np.array(DROUGHT_CATEGORIES + ['Unlabelled'], dtype=object)
+    return pd.DataFrame({
+        'start': [month_label(key) for key in points.start.tolist()],
+        'end': [month_label(key) for key in points.end.tolist()],
+        'months': points.bucket_months,
+        'predicted_category': predicted_names[points.predicted],
+        'observed_category': observed_names[points.observed],
+        'p_severe': points.severe, 'p_severe_min': points.severe_low, 'p_severe_max': points.severe_high,
+        'confidence': points.confidence,
+    })
+
+
+def _month_arg(text):
+    year, month = (int(part) for part in text.split('-'))
+    return int(month_key(year, month))
+
+
+def main(argv=None):
+    from .engine import compile_model, resolve_model_path
+    from .model_store import load_model_file
+    from .regions import RegionIndex, load_forecasts
+    from .store import DEFAULT_REGION, STORE_PATH, ColumnStore
+
+    parser = argparse.ArgumentParser(description="Print a region's downsampled prediction history")
+    parser.add_argument('--store', default=STORE_PATH)
+    parser.add_argument('--region', default=DEFAULT_REGION)
+    parser.add_argument('--model', default=None,
+                        help="Model file, pickle or native format (default: native export if present)")
+    parser.add_argument('--start', type=_month_arg, help="First month (YYYY-MM)")
+    parser.add_argument('--end', type=_month_arg, help="Last month (YYYY-MM)")
+    parser.add_argument('--max-points', type=int, default=MAX_POINTS)
+    args = parser.parse_args(argv)
+
+    try:
+        loaded = load_model_file(args.model or resolve_model_path())
+        store = ColumnStore.open(args.store)
+        index = RegionIndex.from_store(store)
+        forecasts = load_forecasts(store, compile_model(loaded.model), loaded.checksum)
+        timeline = Timeline.from_forecasts(forecasts, index, store, args.region).window(args.start, args.end)
+        points = downsample(timeline, args.max_points)
+    except (FileNotFoundError, ValueError, KeyError) as error:
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+
+    print(f"{args.region}: {len(timeline)} months in {len(points.start)} points\n")
+    print(to_frame(points).to_string(index=False, float_format='{:.2f}'.format))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
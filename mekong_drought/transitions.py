@@ -0,0 +1,292 @@
+"""
+Learned month-to-month drought class transitions.
+
+A ``TransitionModel`` counts how the labelled drought class moved from one
+month to the next in the history (``drought_label``, consecutive months of
+the same region). Counts are kept per season of the starting month (dry /
+rainy) and per trend bin (improving / stable / worsening, from the rule-based
+trend score without its season point). Cells with few transitions are shrunk
+towards the season's matrix, and the season matrices towards the pooled one.
+
+The k-month outlook of a class-probability vector p is p @ P1 @ ... @ Pk.
+P1 is the matrix for the current season and trend. Later steps use the
+season matrix of each following calendar month, or the current season's
+matrix when no month is given. These products are precomputed when the
+model is built, so scoring every region and month is one small matrix
+product per (month, trend) group.
+
+Usage:
+    python -m mekong_drought.transitions fit [--store data/drought_store]
+    python -m mekong_drought.transitions outlook [--horizons 3]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .engine import BASE_DIR, DROUGHT_CATEGORIES
+from .features import DRY_SEASON_MONTHS
+from .rules import Step, apply_step, is_dry_season, trend_score
+
+TRANSITIONS_PATH = os.path.join(BASE_DIR, 'data', 'transitions.npz')
+
+FORMAT_VERSION = 1
+
+MAX_HORIZON = 12
+
+N_CLASSES = len(DROUGHT_CATEGORIES)
+
+TREND_BINS = ('improving', 'stable', 'worsening')
+SEASONS = ('rainy', 'dry')
+
+# Trend score without the season point -> bin: <= -1, 0, >= 1
+TREND_BIN_RULE = Step([-1, 0], [0, 1, 2], right=True)
+
+# Pseudo-counts pulling a sparse row towards its parent matrix (cell -> season -> pooled)
+PRIOR_STRENGTH = 4.0
+
+# Expected class change over the next month -> outlook label
+SHIFT_RULE = Step([-0.5, -0.15, 0.15, 0.5],
+                  ["improving", "slightly_improving", "stable", "slightly_worsening", "worsening"], right=False)
+
+FIT_COLUMNS = ['year', 'month', 'drought_label', 'ndvi', 'ndvi_lag1', 'precip_anomaly', 'vci']
+
+
+def trend_bin(ndvi_trend, precip_trend, vci_trend):
+    """
+    Index into ``TREND_BINS`` for every row of trend inputs (``engine.compute_trends``)
+    """
+    score = trend_score(ndvi_trend, precip_trend, vci_trend, np.zeros(np.shape(ndvi_trend), dtype=bool))
+    return apply_step(TREND_BIN_RULE, score)
+
+
+def season_index(month):
+    """
+    Index into ``SEASONS`` for calendar months (1 = dry)
+    """
+    return np.isin(np.asarray(month), DRY_SEASON_MONTHS).astype(np.int64)
+
+
+def _normalize(counts, prior):
+    """
+    Row-stochastic matrices from ``counts`` plus ``PRIOR_STRENGTH`` x ``prior`` rows
+    """
+    smoothed = counts + PRIOR_STRENGTH * prior
+    return smoothed / smoothed.sum(axis=-1, keepdims=True)
+
+
+class TransitionModel:
+    """
+    Smoothed transition matrices and their precomputed multi-month products
+    """
+
+    def __init__(self, counts):
+        # counts[season, trend bin, from class, to class]
+        self.counts = np.asarray(counts, dtype=np.float64)
+        pooled = _normalize(self.counts.sum(axis=(0, 1)), np.full(N_CLASSES, 1.0 / N_CLASSES))
+        self.season_matrices = _normalize(self.counts.sum(axis=1), pooled)
+        self.matrices = _normalize(self.counts, self.season_matrices[:, None])
+
+        # paths[start month - 1, trend bin, horizon - 1]: seasons follow the calendar
+        self.paths = np.empty((12, len(TREND_BINS), MAX_HORIZON, N_CLASSES, N_CLASSES))
+        for month in range(1, 13):
+            following = season_index((np.arange(month, month + MAX_HORIZON - 1) % 12) + 1)
+            for trend in range(len(TREND_BINS)):
+                product = self.matrices[season_index(month), trend]
+                self.paths[month - 1, trend, 0] = product
+                for step, season in enumerate(following, start=1):
+                    product = product @ self.season_matrices[season]
+                    self.paths[month - 1, trend, step] = product
+
+        # season_paths[season, trend bin, horizon - 1]: the current season persists
+        self.season_paths = np.empty((len(SEASONS), len(TREND_BINS), MAX_HORIZON, N_CLASSES, N_CLASSES))
+        for season in range(len(SEASONS)):
+            powers = [np.linalg.matrix_power(self.season_matrices[season], step) for step in range(MAX_HORIZON)]
+            for trend in range(len(TREND_BINS)):
+                self.season_paths[season, trend] = self.matrices[season, trend] @ np.stack(powers)
+
+    @property
+    def n_transitions(self):
+        return int(self.counts.sum())
+
+    @classmethod
+    def fit(cls, labels, months, trend_bins, follows):
+        """
+        Count transitions into row i from row i-1 wherever ``follows[i]``.
+
+        ``follows[i]`` is true when row i is the month after row i-1 in the
+        same region; rows without a label (negative or NaN) are skipped.
+        """
+        labels = np.asarray(labels, dtype=np.float64)
+        valid = np.asarray(follows, dtype=bool)[1:] & (labels[:-1] >= 0) & (labels[1:] >= 0)
+        counts = np.zeros((len(SEASONS), len(TREND_BINS), N_CLASSES, N_CLASSES))
+        np.add.at(counts, (season_index(np.asarray(months)[:-1][valid]), np.asarray(trend_bins)[:-1][valid],
+                           labels[:-1][valid].astype(np.int64), labels[1:][valid].astype(np.int64)), 1)
+        return cls(counts)
+
+    @classmethod
+    def from_frame(cls, frame, group_column=None):
+        """
+        Transitions from a monthly table with ``FIT_COLUMNS`` (plus ``group_column`` for regions)
+        """
+        keys = ([group_column] if group_column else []) + ['year', 'month']
+        frame = frame.drop_duplicates(keys, keep='last').sort_values(keys, kind='stable')
+        month_index = frame['year'].to_numpy(dtype=np.int64) * 12 + frame['month'].to_numpy(dtype=np.int64)
+        follows = np.r_[False, np.diff(month_index) == 1]
+        if group_column:
+            group = frame[group_column].to_numpy()
+            follows[1:] &= group[1:] == group[:-1]
+        trends = trend_bin(frame['ndvi'].to_numpy() - frame['ndvi_lag1'].to_numpy(),
+                           frame['precip_anomaly'].to_numpy(), frame['vci'].to_numpy() - 60)
+        return cls.fit(frame['drought_label'].to_numpy(), frame['month'].to_numpy(), trends, follows)
+
+    def outlook(self, proba, trend, month=None, season=None, horizons=3):
+        """
+        (n, horizons, n_classes) class probabilities for the next ``horizons`` months.
+
+        ``proba`` is (n, n_classes) or one vector; ``trend`` holds ``TREND_BINS``
+        indices. Give the calendar ``month`` of each row, or else its ``season``
+        (``SEASONS`` index or season label), which is then assumed to persist.
+        """
+        if not 1 <= horizons <= MAX_HORIZON:
+            raise ValueError(f"horizons must be between 1 and {MAX_HORIZON}")
+        proba = np.atleast_2d(np.asarray(proba, dtype=np.float64))
+        n_rows = len(proba)
+        if month is not None:
+            paths, condition = self.paths, np.broadcast_to(np.asarray(month, dtype=np.int64) - 1, n_rows)
+        else:
+            season = np.asarray(season)
+            if season.dtype.kind in 'iu':
+                season = season.astype(bool)
+            paths, condition = self.season_paths, np.broadcast_to(is_dry_season(season).astype(np.int64), n_rows)
+        trend = np.broadcast_to(np.asarray(trend, dtype=np.int64), n_rows)
+
+        # One matrix product per (condition, trend) group instead of a per-row gather
+        result = np.empty((n_rows, horizons, N_CLASSES))
+        group = condition * len(TREND_BINS) + trend
+        for key in np.unique(group):
+            rows = group == key
+            path = paths[key // len(TREND_BINS), key % len(TREND_BINS), :horizons]
+            result[rows] = (proba[rows] @ path.transpose(1, 0, 2).reshape(N_CLASSES, -1)).reshape(-1, horizons,
+                                                                                                  N_CLASSES)
+        return result
+
+    def expected_shift(self, proba, trend, month=None, season=None):
+        """
+        Expected change in class index over the next month, per row
+        """
+        proba = np.atleast_2d(np.asarray(proba, dtype=np.float64))
+        classes = np.arange(N_CLASSES)
+        return self.outlook(proba, trend, month, season, horizons=1)[:, 0] @ classes - proba @ classes
+
+    def save(self, path):
+        """
+        Write the transition counts to an uncompressed ``.npz`` (matrices are rebuilt on load)
+        """
+        metadata = {'format_version': FORMAT_VERSION, 'seasons': list(SEASONS), 'trend_bins': list(TREND_BINS),
+                    'classes': DROUGHT_CATEGORIES}
+        with open(path, 'wb') as f:
+            np.savez(f, metadata=np.array(json.dumps(metadata)), counts=self.counts)
+
+    @classmethod
+    def load(cls, path=TRANSITIONS_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data['metadata']))
+            if metadata.get('format_version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported transitions format version: {metadata.get('format_version')}")
+            return cls(data['counts'])
+
+
+def outlook_label(shift):
+    """
+    Outlook label for every expected class shift
+    """
+    return np.asarray(SHIFT_RULE.points)[np.digitize(np.asarray(shift), SHIFT_RULE.edges, right=SHIFT_RULE.right)]
+
+
+def load_transitions(path=TRANSITIONS_PATH):
+    """
+    Saved transitions, or transitions fitted from the dataset when none are saved
+    """
+    from .store import load_dataset
+
+    try:
+        return TransitionModel.load(path)
+    except FileNotFoundError:
+        frame = load_dataset()
+        return TransitionModel.from_frame(frame, 'region' if 'region' in frame else None)
+
+
+def main(argv=None):
+    from .store import STORE_PATH, load_dataset
+
+    parser = argparse.ArgumentParser(description="Markov transition outlook learned from labelled history")
+    parser.add_argument('--store', default=STORE_PATH)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fit_parser = subparsers.add_parser('fit', help="Count labelled month-to-month transitions")
+    fit_parser.add_argument('output', nargs='?', default=TRANSITIONS_PATH)
+
+    outlook_parser = subparsers.add_parser('outlook', help="Outlook for every stored region and month")
+    outlook_parser.add_argument('--horizons', type=int, default=3)
+    outlook_parser.add_argument('--model', default=None,
+                                help="Model file, pickle or native format (default: native export if present)")
+    outlook_parser.add_argument('--output', help="Write the outlook to this CSV instead of a summary")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'fit':
+            frame = load_dataset(store_path=args.store)
+            transitions = TransitionModel.from_frame(frame, 'region' if 'region' in frame else None)
+            transitions.save(args.output)
+            print(f"✅ Wrote {transitions.n_transitions} transitions to {args.output}")
+            print(pd.DataFrame(transitions.counts.sum(axis=(0, 1)).astype(int),
+                               index=DROUGHT_CATEGORIES, columns=DROUGHT_CATEGORIES).to_string())
+            return 0
+
+        from .engine import compile_model, resolve_model_path
+        from .model_store import load_model_file
+        from .regions import PROBA_COLUMNS, RegionIndex, load_forecasts, month_label
+        from .store import ColumnStore
+
+        store = ColumnStore.open(args.store)
+        loaded = load_model_file(args.model or resolve_model_path())
+        forecasts = load_forecasts(store, compile_model(loaded.model), loaded.checksum)
+        transitions = load_transitions()
+        index = RegionIndex.from_store(store)
+        rows = index.rows[forecasts.predicted[index.rows] >= 0]
+
+        started = time.perf_counter()
+        trend = trend_bin(store.column('ndvi')[rows] - store.column('ndvi_lag1')[rows],
+                          store.column('precip_anomaly')[rows], store.column('vci')[rows] - 60)
+        outlook = transitions.outlook(forecasts.proba[rows], trend, month=store.column('month')[rows],
+                                      horizons=args.horizons)
+        elapsed = time.perf_counter() - started
+    except (FileNotFoundError, ValueError, KeyError) as error:
+        print(f"❌ {error}", file=sys.stderr)
+        return 1
+
+    regions = np.asarray(store.categories['region'], dtype=object)[store.column('region')[rows]]
+    months = [month_label(key) for key in (store.column('year')[rows].astype(np.int64) * 12
+                                           + store.column('month')[rows] - 1).tolist()]
+    frame = pd.DataFrame({'region': regions, 'date': months})
+    for step in range(args.horizons):
+        for i, name in enumerate(PROBA_COLUMNS):
+            frame[f'{name}_{step + 1}m'] = outlook[:, step, i]
+    if args.output:
+        frame.to_csv(args.output, index=False)
+        print(f"✅ Wrote {len(frame):,} region-months to {args.output}")
+    else:
+        print(f"Scored {len(frame):,} region-months x {args.horizons} months in {elapsed * 1000:.1f} ms\n")
+        print(frame.tail(6).to_string(index=False, float_format='{:.2f}'.format))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Array-backed tree ensembles.
+
+A ``TreeEnsemble`` stores every node of a trained forest in flat NumPy arrays
+(split feature, threshold, child pointers, missing-value direction and leaf
+class values). It is saved as a plain ``.npz`` file that loads without
+unpickling, so it does not depend on the library versions the model was
+trained with. Prediction goes through ``compiled.CompiledEnsemble``.
+"""
+
+import json
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+LEAF = -1
+
+
+class TreeEnsemble:
+    """
+    Tree ensemble stored as flat node arrays.
+
+    ``roots[t]`` is the index of tree ``t``'s root node. Leaves have
+    ``feature == LEAF`` and carry per-class probabilities in ``value``; the
+    ensemble probability is the mean of the leaf values over all trees.
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots,
+                 classes, feature_names):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.missing_left = np.asarray(missing_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.classes_ = np.asarray(classes)
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self._compiled = None
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Convert a fitted scikit-learn forest (or single decision tree) classifier
+        """
+        estimators = getattr(model, 'estimators_', [model])
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            if tree.n_outputs != 1:
+                raise ValueError("Only single-output classifiers are supported")
+
+            is_leaf = tree.children_left < 0
+            feature = np.where(is_leaf, LEAF, tree.feature)
+            left = np.where(is_leaf, -1, tree.children_left + offset)
+            right = np.where(is_leaf, -1, tree.children_right + offset)
+            missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+
+            # Leaf values may be stored as class counts or fractions depending on the sklearn version
+            value = tree.value[:, 0, :]
+            totals = value.sum(axis=1, keepdims=True)
+            value = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+
+            features.append(feature)
+            thresholds.append(tree.threshold)
+            lefts.append(left)
+            rights.append(right)
+            missing.append(np.asarray(missing_left, dtype=bool))
+            values.append(value)
+            roots.append(offset)
+            offset += tree.node_count
+
+        feature_names = getattr(model, 'feature_names_in_', None)
+        if feature_names is None:
+            feature_names = [f'f{i}' for i in range(model.n_features_in_)]
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+            np.concatenate(rights), np.concatenate(missing), np.concatenate(values),
+            roots, model.classes_, feature_names
+        )
+
+    def compile(self):
+        """
+        Compiled form used for prediction (built once and cached)
+        """
+        if self._compiled is None:
+            from .compiled import CompiledEnsemble
+
+            self._compiled = CompiledEnsemble.from_tree_ensemble(self)
+        return self._compiled
+
+    def predict_proba(self, X):
+        return self.compile().predict_proba(X)
+
+    def predict(self, X):
+        return self.compile().predict(X)
+
+    def save(self, path):
+        """
+        Write the ensemble to an uncompressed ``.npz`` file (no pickled objects)
+        """
+        metadata = {
+            'format_version': FORMAT_VERSION,
+            'feature_names': [str(name) for name in self.feature_names_in_],
+        }
+        with open(path, 'wb') as f:
+            np.savez(
+                f, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                missing_left=self.missing_left, value=self.value, roots=self.roots,
+                classes=self.classes_, metadata=np.array(json.dumps(metadata))
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data['metadata']))
+            if metadata.get('format_version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported tree ensemble format version: {metadata.get('format_version')}")
+            return cls(
+                data['feature'], data['threshold'], data['left'], data['right'],
+                data['missing_left'], data['value'], data['roots'], data['classes'],
+                metadata['feature_names']
+            )
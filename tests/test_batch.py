@@ -0,0 +1,21 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from mekong_drought import engine
+from mekong_drought.batch import score_frame
+from mekong_drought.model_store import load_model_file
+
+
+def test_explain_matches_plain_scoring_for_boosted_models():
+    model = engine.compile_model(load_model_file(engine.resolve_model_path()).model)
+    boosted = copy.copy(model)
+    boosted.transform = 'softmax'  # same trees read as boosted margins
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.uniform(0, 100, (50, len(engine.FEATURE_COLUMNS))), columns=engine.FEATURE_COLUMNS)
+    for candidate in (model, boosted):
+        explained = score_frame(candidate, frame, explain=True)
+        plain = score_frame(candidate, frame)
+        columns = ['predicted_class', 'confidence'] + [name for name in plain.columns if name.startswith('proba_')]
+        np.testing.assert_allclose(explained[columns].to_numpy(float), plain[columns].to_numpy(float), atol=1e-12)
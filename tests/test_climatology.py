@@ -0,0 +1,15 @@
+import numpy as np
+import pandas as pd
+
+from mekong_drought.climatology import Climatology
+from mekong_drought.engine import DATASET_PATH
+
+
+def test_observe_matches_training_features():
+    dataset = pd.read_csv(DATASET_PATH)
+    climatology = Climatology()
+    observed = np.array([climatology.observe(row.month, row.ndvi, row.precipitation_mm, 'mekong_delta')
+                         for row in dataset.itertuples()], dtype=np.float64)
+    # VCI is provisional within a calendar year; the final year is complete
+    np.testing.assert_allclose(observed[-12:, 0], dataset['vci'].to_numpy()[-12:], atol=1e-9)
+    np.testing.assert_allclose(observed[:, 1], dataset['precip_anomaly'].to_numpy(), atol=1e-9)
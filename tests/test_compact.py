@@ -0,0 +1,51 @@
+import joblib
+import numpy as np
+import pytest
+
+from mekong_drought.compact import labelled_rows, prune, select_trees
+from mekong_drought.compiled import CompiledEnsemble
+from mekong_drought.engine import MODEL_PATH
+from mekong_drought.model_store import load_model_file
+
+
+@pytest.fixture(scope='module')
+def model():
+    return CompiledEnsemble.from_model(joblib.load(MODEL_PATH))
+
+
+def test_round_trip_matches_source(model, tmp_path):
+    X, _ = labelled_rows()
+    X = np.vstack([X, np.random.default_rng(0).uniform(-50, 500, (300, X.shape[1]))])
+    path = tmp_path / 'compact.npz'
+    model.save(path)
+    loaded = load_model_file(str(path)).model
+
+    assert isinstance(loaded, CompiledEnsemble)
+    assert loaded.feature.dtype.itemsize < model.feature.dtype.itemsize
+    np.testing.assert_array_equal(loaded.classes_, model.classes_)
+    np.testing.assert_allclose(loaded.predict_proba(X), model.predict_proba(X), atol=1e-6)
+    assert (loaded.predict(X) == model.predict(X)).all()
+    np.testing.assert_allclose(loaded.predict_contributions(X[:50]), model.predict_contributions(X[:50]), atol=1e-6)
+
+
+def test_round_trip_without_explanations(model, tmp_path):
+    X, _ = labelled_rows()
+    path = tmp_path / 'compact.npz'
+    model.save(path, explain=False)
+    loaded = CompiledEnsemble.load(path)
+    np.testing.assert_allclose(loaded.predict_proba(X), model.predict_proba(X), atol=1e-6)
+    with pytest.raises(ValueError):
+        loaded.predict_contributions(X)
+
+
+def test_select_and_prune(model):
+    X, _ = labelled_rows()
+    everything = select_trees(model, model.roots)
+    np.testing.assert_allclose(everything.predict_proba(X), model.predict_proba(X), atol=1e-12)
+
+    tolerance = 0.02
+    pruned, kept = prune(model, X, tolerance)
+    assert 0 < len(kept) < model.n_trees
+    assert (pruned.predict(X) == model.predict(X)).all()
+    assert np.abs(pruned.predict_proba(X) - model.predict_proba(X)).max() <= tolerance + 1e-9
+    np.testing.assert_allclose(pruned.predict_proba(X).sum(axis=1), 1.0)
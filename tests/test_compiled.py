@@ -0,0 +1,48 @@
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from mekong_drought.compiled import CompiledEnsemble
+from mekong_drought.engine import DATASET_PATH, FEATURE_COLUMNS, MODEL_PATH
+
+
+def random_features(rng, n_rows):
+    return rng.normal(0, 1, (n_rows, len(FEATURE_COLUMNS))) * rng.uniform(0.1, 100, len(FEATURE_COLUMNS))
+
+
+def test_matches_shipped_forest():
+    model = joblib.load(MODEL_PATH)
+    compiled = CompiledEnsemble.from_model(model)
+    rows = pd.read_csv(DATASET_PATH)[FEATURE_COLUMNS].dropna()
+    X = np.vstack([rows.to_numpy(), random_features(np.random.default_rng(0), 500)])
+    expected = model.predict_proba(pd.DataFrame(X, columns=FEATURE_COLUMNS))
+
+    np.testing.assert_allclose(compiled.predict_proba(X), expected, atol=1e-6)
+    np.testing.assert_allclose(compiled.predict_proba(X, block_size=7), expected, atol=1e-6)
+    assert (compiled.predict(X) == model.classes_[expected.argmax(axis=1)]).all()
+    np.testing.assert_allclose(compiled.predict_one(X[0]), expected[0], atol=1e-6)
+
+
+def test_matches_random_sklearn_models():
+    rng = np.random.default_rng(1)
+    X = random_features(rng, 400)
+    y = rng.integers(0, 4, len(X))
+    X_test = random_features(rng, 300)
+    for model in (RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0),
+                  RandomForestClassifier(n_estimators=10, random_state=0),
+                  DecisionTreeClassifier(max_depth=5, random_state=0)):
+        model.fit(X, y)
+        compiled = CompiledEnsemble.from_model(model)
+        np.testing.assert_allclose(compiled.predict_proba(X_test), model.predict_proba(X_test), atol=1e-6)
+
+
+def test_contributions_sum_to_probabilities():
+    model = joblib.load(MODEL_PATH)
+    compiled = CompiledEnsemble.from_model(model)
+    X = random_features(np.random.default_rng(2), 200)
+    contributions = compiled.predict_contributions(X)
+    assert contributions.shape == (len(X), compiled.n_outputs, len(FEATURE_COLUMNS) + 1)
+    expected = model.predict_proba(pd.DataFrame(X, columns=FEATURE_COLUMNS))
+    np.testing.assert_allclose(contributions.sum(axis=-1), expected, atol=1e-6)
@@ -0,0 +1,17 @@
+import pandas as pd
+import pytest
+
+from mekong_drought import forecast
+from mekong_drought.engine import DATASET_PATH, FEATURE_COLUMNS
+
+
+def test_simulate_rejects_short_history():
+    history = pd.read_csv(DATASET_PATH)
+    sampler = forecast.ScenarioSampler(history)
+    for short in (forecast.until(history, 1990, 1), history.head(forecast.MIN_HISTORY_MONTHS - 1)):
+        with pytest.raises(ValueError):
+            forecast.simulate(short, n_scenarios=10, sampler=sampler)
+    _, months, features = forecast.simulate(history.head(forecast.MIN_HISTORY_MONTHS), n_scenarios=10,
+                                            sampler=sampler, seed=0)
+    assert len(months) == forecast.DEFAULT_HORIZONS
+    assert features.shape == (forecast.DEFAULT_HORIZONS, 10, len(FEATURE_COLUMNS))
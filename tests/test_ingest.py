@@ -0,0 +1,61 @@
+import numpy as np
+
+from mekong_drought.ingest import RegionMasks, open_grid, zonal_means
+
+NODATA = -9999.0
+
+
+def random_grids(rng, shape=(97, 61), n_regions=4):
+    labels = rng.integers(-1, n_regions + 1, shape)
+    labels[:5] = 0  # a band of rows outside every region
+    values = rng.normal(0.5, 0.2, shape)
+    values[rng.random(shape) < 0.1] = np.nan
+    values[rng.random(shape) < 0.05] = NODATA
+    return labels, values
+
+
+def masked_means(labels, values, n_regions):
+    """
+    Per-region mean over a boolean mask of each region's valid pixels
+    """
+    means = []
+    for k in range(1, n_regions + 1):
+        inside = (labels == k) & ~np.isnan(values) & (values != NODATA)
+        means.append(values[inside].mean() if inside.any() else np.nan)
+    return np.array(means)
+
+
+def test_zonal_matches_boolean_masks(tmp_path):
+    rng = np.random.default_rng(0)
+    labels, values = random_grids(rng)
+    masks = RegionMasks.from_labels(labels)
+    path = tmp_path / 'ndvi.npy'
+    np.save(path, values)
+    for chunk_rows in (1, 7, 256):
+        sums, counts = masks.zonal(open_grid(str(path)), chunk_rows=chunk_rows, nodata=NODATA)
+        assert counts.tolist() == [int(((labels == k) & ~np.isnan(values) & (values != NODATA)).sum())
+                                   for k in range(1, 5)]
+        np.testing.assert_allclose(sums / counts, masked_means(labels, values, 4))
+
+
+def test_zonal_means_match_boolean_masks(tmp_path):
+    rng = np.random.default_rng(1)
+    labels, _ = random_grids(rng, n_regions=3)
+    labels[labels == 3] = 0  # region 3 has no pixels, so its means are NaN
+    np.save(tmp_path / 'labels.npy', labels)
+    grid_dir = tmp_path / 'grids'
+    grid_dir.mkdir()
+    expected = {}
+    for month in (1, 2):
+        for variable in ('ndvi', 'precipitation_mm', 'temp_mean_c'):
+            _, values = random_grids(rng)
+            np.save(grid_dir / f'{variable}_2024-{month:02d}.npy', values)
+            expected[variable, month] = masked_means(labels, values, 3)
+
+    names = ['an_giang', 'ben_tre', 'ca_mau']
+    table, stats = zonal_means(str(grid_dir), str(tmp_path / 'labels.npy'), names, workers=1, chunk_rows=10,
+                               nodata=NODATA)
+    assert stats['grids'] == 6
+    assert table['region'].tolist() == names * 2
+    for (variable, month), means in expected.items():
+        np.testing.assert_allclose(table.loc[table['month'] == month, variable].to_numpy(), means)
@@ -0,0 +1,39 @@
+import asyncio
+import json
+
+from mekong_drought.engine import compile_model, resolve_model_path
+from mekong_drought.model_store import load_model_file
+from mekong_drought.nowcast import Nowcaster, consume, follow_file, parse_records
+
+
+def test_parse_records_rejects_impossible_dates():
+    lines = [
+        '{"region": "a", "date": "2025-02-30", "ndvi": 0.4}',
+        '{"region": "a", "date": "2025-13-01", "ndvi": 0.4}',
+        '{"region": "a", "date": "2024-02-29", "ndvi": 0.4}',
+    ]
+    (streams, months, days, *_), rejected = parse_records(lines)
+    assert rejected == 2
+    assert streams == ['a'] and days == [29]
+
+
+def test_malformed_line_does_not_drop_its_batch(tmp_path):
+    path = tmp_path / 'daily.jsonl'
+    records = [
+        {'region': 'a', 'date': '2025-02-01', 'precipitation_mm': 3.0, 'ndvi': 0.5, 'temp_mean_c': 27.0},
+        {'region': 'b', 'date': '2025-02-30', 'precipitation_mm': 1.0},
+        {'region': 'b', 'date': '2025-02-02', 'precipitation_mm': 0.0, 'temp_mean_c': 28.0},
+    ]
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records) + 'not json\n')
+    nowcaster = Nowcaster(compile_model(load_model_file(resolve_model_path()).model), 'none')
+
+    async def run():
+        queue = asyncio.Queue()
+        reader = asyncio.create_task(follow_file(str(path), queue, from_start=True, once=True))
+        rejected = await consume(nowcaster, queue)
+        await reader
+        return rejected
+
+    assert asyncio.run(run()) == 2
+    assert nowcaster.records == 2
+    assert len(nowcaster) == 2
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from mekong_drought.engine import DROUGHT_CATEGORIES
+from mekong_drought.ranges import RangeIndex
+from mekong_drought.regions import RegionIndex, month_key
+from mekong_drought.store import FLOAT_COLUMNS, UNLABELLED, ColumnStore
+
+REGIONS = ['delta_north', 'delta_south']
+COLUMNS = ['precipitation_mm', 'vci']
+
+
+def random_rows(rng, n_rows, first_year=2000, n_years=8):
+    months = rng.integers(0, n_years * 12, n_rows)
+    frame = pd.DataFrame({
+        'region': rng.choice(REGIONS, n_rows),
+        'year': first_year + months // 12,
+        'month': months % 12 + 1,
+        'drought_label': rng.choice([UNLABELLED, 0, 1, 2, 3, 4], n_rows),
+        'season': rng.choice(['Dry Season', 'Rainy Season'], n_rows),
+    })
+    for name in FLOAT_COLUMNS:
+        values = rng.gamma(2.0, 50.0, n_rows)
+        values[rng.random(n_rows) < 0.2] = np.nan
+        frame[name] = values
+    return frame
+
+
+def brute_force(store, region, start, end):
+    """
+    Sums, counts and class counts of ``region`` over ``start``-``end`` by a pandas group-by
+    """
+    frame = pd.DataFrame({name: store.column(name).astype(np.float64) for name in COLUMNS})
+    frame['label'] = store.column('drought_label')
+    frame['key'] = month_key(store.column('year'), store.column('month'))
+    frame = frame[store.column('region') == store.categories['region'].index(region)]
+    latest = frame.groupby('key').tail(1)
+    window = latest[(latest['key'] >= start) & (latest['key'] <= end)]
+    classes = window['label'].value_counts().reindex(range(len(DROUGHT_CATEGORIES)), fill_value=0)
+    return window[COLUMNS].sum(), window[COLUMNS].count(), classes.to_numpy()
+
+
+def assert_matches(index, store, region, rng, n_queries=40):
+    bounds = rng.integers(month_key(1999, 1), month_key(2031, 12), (n_queries, 2))
+    for start, end in np.sort(bounds, axis=1).tolist():
+        sums, counts, classes = brute_force(store, region, start, end)
+        for name in COLUMNS:
+            assert np.isclose(index.sum(name, start, end), sums[name])
+            assert index.count(name, start, end) == counts[name]
+        assert index.class_counts(start, end).tolist() == classes.tolist()
+
+
+def test_from_store_matches_group_by(tmp_path):
+    rng = np.random.default_rng(0)
+    store = ColumnStore.create(str(tmp_path / 'store'))
+    store.append(random_rows(rng, 300))
+    regions = RegionIndex.from_store(store)
+    for region in REGIONS:
+        assert_matches(RangeIndex.from_store(store, regions, region), store, region, rng)
+
+
+def test_refresh_matches_group_by(tmp_path):
+    rng = np.random.default_rng(1)
+    store = ColumnStore.create(str(tmp_path / 'store'))
+    # Start in the middle, so later appends add new months at both ends and revise existing ones
+    store.append(random_rows(rng, 80, first_year=2003, n_years=2))
+    regions = RegionIndex.from_store(store)
+    indexes = {region: RangeIndex.from_store(store, regions, region) for region in REGIONS}
+    for _ in range(5):
+        new_rows = random_rows(rng, 40)
+        store.append(new_rows)
+        added = sum(index.refresh(store) for index in indexes.values())
+        assert added == len(new_rows)
+        for region, index in indexes.items():
+            assert index.rows_seen == len(store)
+            assert_matches(index, store, region, rng)
+
+
+def test_append_in_any_order_matches_group_by(tmp_path):
+    rng = np.random.default_rng(2)
+    store = ColumnStore.create(str(tmp_path / 'store'))
+    store.append(random_rows(rng, 200))
+    region = REGIONS[0]
+    code = store.categories['region'].index(region)
+    index = RangeIndex(np.zeros(0, dtype=np.int64), np.zeros((0, len(COLUMNS))), [], COLUMNS)
+    keys = month_key(store.column('year'), store.column('month'))
+    for row in np.flatnonzero(store.column('region') == code).tolist():
+        index.append(keys[row], {name: float(store.column(name)[row]) for name in COLUMNS},
+                     int(store.column('drought_label')[row]))
+    assert_matches(index, store, region, rng)
+
+
+def test_refresh_past_capacity_keeps_totals(tmp_path):
+    rng = np.random.default_rng(3)
+    store = ColumnStore.create(str(tmp_path / 'store'))
+    store.append(random_rows(rng, 100, n_years=4))
+    regions = RegionIndex.from_store(store)
+    index = RangeIndex.from_store(store, regions, REGIONS[0])
+    # Only later months, far enough ahead that the index grows without any back-fill
+    for year in (2010, 2030):
+        new_rows = random_rows(rng, 10, first_year=year, n_years=1)
+        new_rows['region'] = REGIONS[0]
+        store.append(new_rows)
+        assert index.refresh(store) == len(new_rows)
+        assert_matches(index, store, REGIONS[0], rng)
@@ -0,0 +1,129 @@
+import itertools
+
+import numpy as np
+
+from mekong_drought import rules
+from mekong_drought.engine import DRY_SEASON, RAINY_SEASON, RISK_LEVELS, classify_risk
+
+
+def original_risk_score(vci, precip_current, precip_3month, ndvi):
+    """
+    The if/elif chain the risk rule tables replaced
+    """
+    risk_score = 0
+    if vci <= 15:
+        risk_score += 4
+    elif vci <= 30:
+        risk_score += 3
+    elif vci <= 45:
+        risk_score += 2
+    elif vci <= 60:
+        risk_score += 1
+
+    if precip_current < 10:
+        risk_score += 4
+    elif precip_current < 20:
+        risk_score += 3
+    elif precip_current < 35:
+        risk_score += 2
+    elif precip_current < 50:
+        risk_score += 1
+
+    if precip_3month < 30:
+        risk_score += 4
+    elif precip_3month < 50:
+        risk_score += 3
+    elif precip_3month < 80:
+        risk_score += 2
+    elif precip_3month < 120:
+        risk_score += 1
+
+    if ndvi < 0.35:
+        risk_score += 3
+    elif ndvi < 0.45:
+        risk_score += 2
+    elif ndvi < 0.55:
+        risk_score += 1
+    return risk_score
+
+
+def original_trend_points(trend, slight, sharp):
+    if trend < -sharp:
+        return 2
+    elif trend < -slight:
+        return 1
+    elif trend > sharp:
+        return -2
+    elif trend > slight:
+        return -1
+    return 0
+
+
+def original_outlook(ndvi_trend, precip_trend, vci_trend, season):
+    """
+    The if/elif chain the outlook rule tables replaced
+    """
+    trend_score = (original_trend_points(ndvi_trend, 0.02, 0.05) + original_trend_points(precip_trend, 10, 20)
+                   + original_trend_points(vci_trend, 5, 10))
+    if season == DRY_SEASON:
+        trend_score += 1
+
+    if trend_score >= 3:
+        outlook = "worsening"
+    elif trend_score >= 1:
+        outlook = "slightly_worsening"
+    elif trend_score <= -3:
+        outlook = "improving"
+    elif trend_score <= -1:
+        outlook = "slightly_improving"
+    else:
+        outlook = "stable"
+    return outlook, trend_score
+
+
+def around(*thresholds, eps=1e-9):
+    """
+    Every threshold, values just either side of it, far-off values and NaN
+    """
+    values = [-1e6, 1e6, np.nan]
+    for threshold in thresholds:
+        values += [threshold - eps, threshold, threshold + eps]
+    return values
+
+
+def test_risk_score_matches_if_chain():
+    grid = np.array(list(itertools.product(around(15, 30, 45, 60), around(10, 20, 35, 50),
+                                           around(30, 50, 80, 120), around(0.35, 0.45, 0.55))))
+    expected = [original_risk_score(*row) for row in grid.tolist()]
+    assert rules.risk_score(*grid.T).tolist() == expected
+
+
+def test_risk_level_matches_classify_risk():
+    scores = np.arange(0, 16)
+    levels = [level for _, level, _, _ in RISK_LEVELS]
+    assert [levels[i] for i in rules.risk_level_index(scores).tolist()] == [classify_risk(s)[0] for s in scores]
+
+
+def test_outlook_matches_if_chain():
+    grid = list(itertools.product(around(-0.05, -0.02, 0.02, 0.05), around(-20, -10, 10, 20),
+                                  around(-10, -5, 5, 10), (DRY_SEASON, RAINY_SEASON)))
+    ndvi_trend, precip_trend, vci_trend = (np.array([row[i] for row in grid]) for i in range(3))
+    season = np.array([row[3] for row in grid])
+    outlook, score = rules.short_term_outlook(ndvi_trend, precip_trend, vci_trend, season)
+    expected = [original_outlook(*row) for row in grid]
+    assert list(zip(outlook.tolist(), score.tolist())) == expected
+
+
+def test_random_values_match_if_chains():
+    rng = np.random.default_rng(0)
+    n_rows = 5000
+    vci, precip, precip_3month = rng.uniform(0, 100, n_rows), rng.gamma(2, 20, n_rows), rng.gamma(3, 40, n_rows)
+    ndvi = rng.uniform(0.2, 0.8, n_rows)
+    assert rules.risk_score(vci, precip, precip_3month, ndvi).tolist() == [
+        original_risk_score(*row) for row in zip(vci, precip, precip_3month, ndvi)]
+
+    ndvi_trend, precip_trend, vci_trend = rng.normal(0, 0.05, n_rows), rng.normal(0, 20, n_rows), vci - 60
+    season = np.where(rng.random(n_rows) < 0.4, DRY_SEASON, RAINY_SEASON)
+    outlook, score = rules.short_term_outlook(ndvi_trend, precip_trend, vci_trend, season)
+    assert list(zip(outlook.tolist(), score.tolist())) == [
+        original_outlook(*row) for row in zip(ndvi_trend, precip_trend, vci_trend, season)]
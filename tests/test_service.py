@@ -0,0 +1,32 @@
+import asyncio
+
+from mekong_drought.service import PredictionService
+
+
+async def _request(port, raw):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def test_invalid_content_length_answers_400():
+    async def run():
+        service = await PredictionService(log_requests=True).start('127.0.0.1', 0)
+        try:
+            responses = [
+                await _request(service.port, f"POST /score HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+                for length in ('abc', '-5')
+            ]
+            healthy = await _request(service.port, b"GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n")
+        finally:
+            await service.stop()
+        return responses, healthy
+
+    responses, healthy = asyncio.run(run())
+    for response in responses:
+        assert response.startswith(b"HTTP/1.1 400 ")
+        assert b"Invalid Content-Length" in response
+    assert healthy.startswith(b"HTTP/1.1 200 ")
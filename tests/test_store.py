@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from mekong_drought.engine import DATASET_PATH
+from mekong_drought.store import DEFAULT_REGION, UNLABELLED, ColumnStore, main
+
+
+def test_append_unlabelled_month(tmp_path):
+    path = tmp_path / 'store'
+    store = ColumnStore.import_csv(DATASET_PATH, str(path))
+    new_rows = store.to_frame(derived=False).tail(2).reset_index(drop=True)
+    new_rows['drought_label'] = [np.nan, 2]
+
+    assert store.append(new_rows) == 2
+    reopened = ColumnStore.open(str(path))
+    assert reopened.rows == store.rows
+    assert reopened.column('drought_label')[-2:].tolist() == [UNLABELLED, 2]
+
+
+def test_append_csv_without_region(tmp_path):
+    path = tmp_path / 'store'
+    ColumnStore.import_csv(DATASET_PATH, str(path))
+    csv_path = tmp_path / 'new_months.csv'
+    pd.read_csv(DATASET_PATH).tail(2).to_csv(csv_path, index=False)
+
+    assert main(['append', str(path), str(csv_path)]) == 0
+    store = ColumnStore.open(str(path))
+    assert store.to_frame(['region']).tail(2)['region'].astype(str).tolist() == [DEFAULT_REGION] * 2
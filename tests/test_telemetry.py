@@ -0,0 +1,14 @@
+import time
+
+from mekong_drought import telemetry
+
+
+def test_unfinished_trace_is_timed_up_to_its_last_span():
+    trace = telemetry.trace('test.rerun').start()
+    with telemetry.span('test.step'):
+        pass
+    time.sleep(0.05)  # idle until the next rerun finishes it
+    trace.finish(end=trace.last_activity, completed=False)
+    assert trace.milliseconds < 50
+    assert trace.as_dict()['completed'] is False
+    assert 'test.step' in trace.spans
@@ -0,0 +1,54 @@
+import warnings
+
+import numpy as np
+
+from mekong_drought.raster import NODATA_CLASS
+from mekong_drought.tiles import TILE_SIZE, reduce_children
+
+
+def random_tile(rng, nodata_fraction=0.3):
+    classes = rng.integers(0, 5, (TILE_SIZE, TILE_SIZE)).astype(np.int8)
+    confidence = rng.uniform(0.2, 1.0, (TILE_SIZE, TILE_SIZE)).astype(np.float32)
+    nodata = rng.random((TILE_SIZE, TILE_SIZE)) < nodata_fraction
+    classes[nodata] = NODATA_CLASS
+    confidence[nodata] = np.nan
+    return classes, confidence
+
+
+def reference(children):
+    """
+    Worst class and mean confidence of every 2 x 2 block, from the four strided corner views
+    """
+    full = [np.full((TILE_SIZE, TILE_SIZE), NODATA_CLASS, dtype=np.int8),
+            np.full((TILE_SIZE, TILE_SIZE), np.nan, dtype=np.float32)]
+    classes, confidence = (np.block([[child[i] if child is not None else full[i] for child in row]
+                                     for row in children]) for i in range(2))
+    corners = [(dy, dx) for dy in range(2) for dx in range(2)]
+    worst = np.max([classes[dy::2, dx::2] for dy, dx in corners], axis=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN blocks
+        mean = np.nanmean([confidence[dy::2, dx::2].astype(np.float64) for dy, dx in corners], axis=0)
+    return worst, mean
+
+
+def test_reduce_children_matches_block_reduction():
+    rng = np.random.default_rng(0)
+    cases = [
+        [[random_tile(rng), random_tile(rng)], [random_tile(rng), random_tile(rng)]],
+        [[random_tile(rng, 0.9), None], [None, random_tile(rng, 0.0)]],
+        [[None, None], [random_tile(rng), None]],
+    ]
+    for children in cases:
+        classes, confidence = reduce_children(children)
+        worst, mean = reference(children)
+        assert classes.dtype == np.int8 and confidence.dtype == np.float32
+        np.testing.assert_array_equal(classes, worst)
+        np.testing.assert_allclose(confidence, mean, rtol=1e-6)
+        # A block has a confidence exactly when it has a class
+        np.testing.assert_array_equal(np.isnan(confidence), classes == NODATA_CLASS)
+
+
+def test_reduce_children_empty():
+    rng = np.random.default_rng(1)
+    assert reduce_children([[None, None], [None, None]]) is None
+    assert reduce_children([[random_tile(rng, 1.0), None], [None, None]]) is None
@@ -0,0 +1,66 @@
+import numpy as np
+
+from mekong_drought.transitions import (MAX_HORIZON, N_CLASSES, SEASONS, TREND_BINS, TransitionModel,
+                                        season_index)
+
+
+def random_model(rng):
+    counts = rng.poisson(3.0, (len(SEASONS), len(TREND_BINS), N_CLASSES, N_CLASSES)).astype(np.float64)
+    counts[0, 1, 2] = 0  # a row with no transitions falls back to the season matrix
+    return TransitionModel(counts)
+
+
+def explicit_outlook(model, p, trend, month=None, season=None, horizons=3):
+    """
+    p @ P1 @ ... @ Pk, one matrix at a time
+    """
+    start = season_index(month) if month is not None else season
+    result, state = [], p @ model.matrices[start, trend]
+    for step in range(horizons):
+        if step:
+            following = season_index((month + step - 1) % 12 + 1) if month is not None else season
+            state = state @ model.season_matrices[following]
+        result.append(state)
+    return np.array(result)
+
+
+def test_matrices_are_stochastic():
+    model = random_model(np.random.default_rng(0))
+    np.testing.assert_allclose(model.matrices.sum(axis=-1), 1.0)
+    np.testing.assert_allclose(model.season_matrices.sum(axis=-1), 1.0)
+    np.testing.assert_allclose(model.matrices[0, 1, 2], model.season_matrices[0, 2])
+
+
+def test_outlook_matches_explicit_products():
+    rng = np.random.default_rng(1)
+    model = random_model(rng)
+    n_rows = 200
+    proba = rng.dirichlet(np.ones(N_CLASSES), n_rows)
+    trend = rng.integers(0, len(TREND_BINS), n_rows)
+    month = rng.integers(1, 13, n_rows)
+    season = rng.integers(0, len(SEASONS), n_rows)
+
+    by_month = model.outlook(proba, trend, month=month, horizons=MAX_HORIZON)
+    by_season = model.outlook(proba, trend, season=season, horizons=MAX_HORIZON)
+    for i in range(n_rows):
+        np.testing.assert_allclose(by_month[i], explicit_outlook(model, proba[i], trend[i], month=month[i],
+                                                                 horizons=MAX_HORIZON), atol=1e-12)
+        np.testing.assert_allclose(by_season[i], explicit_outlook(model, proba[i], trend[i], season=season[i],
+                                                                  horizons=MAX_HORIZON), atol=1e-12)
+    np.testing.assert_allclose(by_month.sum(axis=-1), 1.0)
+
+
+def test_expected_shift_and_round_trip(tmp_path):
+    rng = np.random.default_rng(2)
+    model = random_model(rng)
+    proba = rng.dirichlet(np.ones(N_CLASSES), 20)
+    month = rng.integers(1, 13, 20)
+    classes = np.arange(N_CLASSES)
+    next_month = np.array([explicit_outlook(model, p, 1, month=m, horizons=1)[0] for p, m in zip(proba, month)])
+    np.testing.assert_allclose(model.expected_shift(proba, 1, month=month), next_month @ classes - proba @ classes)
+
+    path = tmp_path / 'transitions.npz'
+    model.save(path)
+    loaded = TransitionModel.load(path)
+    np.testing.assert_array_equal(loaded.counts, model.counts)
+    np.testing.assert_allclose(loaded.outlook(proba, 2, month=month), model.outlook(proba, 2, month=month))